@@ -1,51 +1,146 @@
 """
 Python 工具函数库
 提供常用的数学计算和字符串处理功能
+
+导入包本身几乎没有开销：导出的名字在第一次访问时才导入对应的子模块（PEP 562），
+NumPy 等可选后端也推迟到第一次真正用到时才导入。
+`python benchmarks.py importtime` 用 -X importtime 检查导入耗时。
 """
 
-# 从数学工具模块导入所有函数
-from .math_utils import (
-    sum_numbers,
-    average,
-    find_max,
-    find_min,
-    median,
-    variance,
-    standard_deviation
-)
-
-# 从字符串工具模块导入所有函数
-from .string_utils import (
-    reverse_string,
-    capitalize_words,
-    count_words,
-    remove_extra_spaces
-)
-
-# 导入装饰器
-from .decorators import (
-    validate_non_empty,
-    validate_string_not_empty
-)
-
-__all__ = [
+# 子模块 → 导出的名字；第一次访问某个名字时才导入它所在的子模块
+_SUBMODULE_EXPORTS = {
     # 数学工具
-    'sum_numbers',
-    'average',
-    'find_max',
-    'find_min',
-    'median',
-    'variance',
-    'standard_deviation',
+    'math_utils': (
+        'sum_numbers',
+        'average',
+        'find_max',
+        'find_min',
+        'median',
+        'quantile',
+        'quantiles',
+        'variance',
+        'standard_deviation',
+        'describe',
+        'StatsSummary',
+        'RunningStats',
+        'RunningMinMax',
+        'rolling_mean',
+        'rolling_std',
+        'rolling_min',
+        'rolling_max',
+        'rolling_median',
+        'describe_many',
+        'describe_ragged',
+        'StatsColumns',
+        'SUMMATION_MODES',
+        'NAN_POLICIES',
+        'KLLSketch',
+        'histogram',
+        'Histogram',
+        'mode',
+        'multimode',
+        'frequency_table',
+        'FrequencyTable',
+    ),
+    # 保持有序的数值序列
+    'sorted_series': (
+        'SortedSeries',
+    ),
+    # 分组 / 加权聚合
+    'grouping': (
+        'group_stats',
+        'GroupAccumulator',
+        'GroupStats',
+        'GROUP_AGGS',
+    ),
+    # 统计状态的二进制编码
+    'state_codec': (
+        'encode_states',
+        'decode_states',
+        'decode_state',
+    ),
+    # 并行归约
+    'parallel': (
+        'ParallelReducer',
+        'parallel_describe',
+    ),
+    # asyncio 统计
+    'async_stats': (
+        'astats',
+        'aaverage',
+        'avariance',
+        'amedian',
+        'aquantiles',
+    ),
+    # 内存映射输入
+    'mmap_io': (
+        'write_binary',
+        'open_binary',
+        'MappedArray',
+        'bounded_quantiles',
+        'bounded_median',
+    ),
     # 字符串工具
-    'reverse_string',
-    'capitalize_words',
-    'count_words',
-    'remove_extra_spaces',
-    # 装饰器
-    'validate_non_empty',
-    'validate_string_not_empty',
-]
+    'string_utils': (
+        'reverse_string',
+        'capitalize_words',
+        'count_words',
+        'remove_extra_spaces',
+        'capitalize_words_many',
+        'remove_extra_spaces_many',
+        'reverse_string_many',
+        'count_words_many',
+        'iter_chunks',
+        'stream_words',
+        'stream_word_counts',
+        'count_words_stream',
+        'stream_remove_extra_spaces',
+        'stream_capitalize_words',
+        'stream_reverse',
+        'WordIndex',
+        'CountMinSketch',
+        'word_frequencies',
+        'count_words_bytes',
+        'remove_extra_spaces_bytes',
+        'reverse_bytes',
+    ),
+    # 装饰器和调用统计
+    'decorators': (
+        'validate_non_empty',
+        'validate_string_not_empty',
+        'set_validation_enabled',
+        'memoize',
+        'CacheInfo',
+        'instrument',
+        'set_instrumentation_enabled',
+        'METRICS',
+    ),
+}
+
+_EXPORTS = {name: module for module, names in _SUBMODULE_EXPORTS.items() for name in names}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    """按需导入子模块并缓存导出的名字"""
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # 相当于 from .<module_name> import <name>；与 importlib.import_module 不同，
+    # 这样导入的模块会出现在 -X importtime 的输出里
+    module = __import__(module_name, globals(), None, (name,), 1)
+    namespace = globals()
+    namespace[name] = getattr(module, name)
+    # 给导出的工具函数加上调用统计（默认关闭，开销只有一次属性判断）
+    from .decorators import instrument_exports
+    instrument_exports(namespace, [name])
+    return namespace[name]
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
 
 __version__ = '1.0.0'
 __author__ = 'Claude Code 学习者'
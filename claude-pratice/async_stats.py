@@ -0,0 +1,241 @@
+"""
+asyncio 版本的统计函数
+让异步服务直接对异步可迭代对象（async generator 等）做统计，而不阻塞事件循环
+
+以前的做法是先把数据收集成列表，再同步调用 average / variance / median，
+大批数据的归约会占住事件循环，同一进程里其他上万个数据流的延迟跟着变差。
+这里的协程函数:
+1. 逐个到达的数字先攒成 batch_size 大小的批次，交给流式累加器
+   （RunningStats / RunningMinMax / KLLSketch）一次处理
+2. 每处理完一批就 await asyncio.sleep(0) 让出事件循环，
+   单次占用事件循环的时间与批次大小成正比（默认约 1 毫秒），与数据总量无关
+3. 不小于 offload_threshold 的大批次（列表、array、NumPy 数组）交给执行器归约，
+   返回可合并的部分状态；默认使用事件循环的线程池，也可以传入 ProcessPoolExecutor
+
+数据源中的元素可以是单个数字，也可以是一批数字；
+也可以直接传入列表等序列，相当于只有一个批次的数据源。
+
+示例:
+    async def handle(stream):
+        summary = await astats(stream)
+        p50, p99 = await aquantiles(other_stream, [0.5, 0.99], k=200)
+"""
+
+import asyncio
+from functools import partial
+from typing import Optional
+
+if __package__:
+    from .math_utils import (
+        RunningStats, RunningMinMax, StatsSummary, EMPTY_SUMMARY, KLLSketch,
+        quantiles, _quantile_ranks,
+    )
+else:  # 目录本身在 sys.path 上（直接运行脚本或测试）时按顶层模块导入
+    from math_utils import (
+        RunningStats, RunningMinMax, StatsSummary, EMPTY_SUMMARY, KLLSketch,
+        quantiles, _quantile_ranks,
+    )
+
+# 逐个到达的数字攒够这么多个再处理一次，处理完让出一次事件循环
+BATCH_SIZE = 4096
+
+# 单个批次达到这个规模时交给执行器处理
+OFFLOAD_THRESHOLD = 100_000
+
+# 直接按单个数字处理的类型；其他没有 __len__ 的对象（Decimal、NumPy 标量等）也视为数字
+_SCALARS = (int, float)
+
+
+def _reduce_stats(batch) -> tuple[RunningStats, RunningMinMax]:
+    """执行器中运行：把一批数据归约成可合并的部分状态"""
+    return RunningStats(batch), RunningMinMax(batch)
+
+
+def _reduce_sketch(batch, k: int) -> KLLSketch:
+    """执行器中运行：把一批数据压缩成草图"""
+    sketch = KLLSketch(k)
+    sketch.extend(batch)
+    return sketch
+
+
+async def _consume(source, absorb, reduce=None, merge=None, batch_size: int = BATCH_SIZE,
+                   offload_threshold: int = OFFLOAD_THRESHOLD, executor=None) -> None:
+    """
+    驱动数据源，把数据分批交给回调
+
+    参数:
+        source: 异步可迭代对象，或者一个数字序列
+        absorb: absorb(batch)，在事件循环线程中处理一小批数据
+        reduce: reduce(batch) -> 部分状态，在执行器中处理一大批数据；
+                使用进程池时必须是模块级函数。为 None 时大批次也直接交给 absorb
+        merge: merge(部分状态)，合并执行器返回的结果
+        batch_size: 攒批大小，也是两次让出事件循环之间处理的最大元素个数
+        offload_threshold: 交给执行器处理的最小批次大小
+        executor: concurrent.futures 执行器，None 表示事件循环的默认线程池
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size 必须是正整数，实际为 {batch_size!r}")
+    loop = asyncio.get_running_loop()
+
+    async def process(batch) -> None:
+        n = len(batch)
+        if reduce is None:
+            absorb(batch)
+            await asyncio.sleep(0)
+        elif n >= offload_threshold:
+            merge(await loop.run_in_executor(executor, reduce, batch))
+        else:
+            # 中等大小的批次按 batch_size 切片，每片之间让出事件循环
+            for start in range(0, n, batch_size):
+                absorb(batch[start:start + batch_size] if n > batch_size else batch)
+                await asyncio.sleep(0)
+
+    if not hasattr(source, '__aiter__'):
+        if source is not None:
+            await process(source if hasattr(source, '__len__') else list(source))
+        return
+
+    pending = []
+    async for item in source:
+        if type(item) in _SCALARS or not hasattr(item, '__len__'):
+            pending.append(item)
+            if len(pending) >= batch_size:
+                absorb(pending)
+                pending = []
+                await asyncio.sleep(0)
+        elif len(item):
+            if pending:
+                absorb(pending)
+                pending = []
+            await process(item)
+    if pending:
+        absorb(pending)
+
+
+async def astats(source, batch_size: int = BATCH_SIZE, offload_threshold: int = OFFLOAD_THRESHOLD,
+                 executor=None) -> StatsSummary:
+    """
+    异步版 describe()：个数、总和、均值、极值、方差、标准差
+
+    参数:
+        source: 异步可迭代对象（元素为数字或数字批次），或者一个数字序列
+        batch_size: 攒批大小，也是两次让出事件循环之间处理的最大元素个数
+        offload_threshold: 不小于这个大小的批次交给执行器归约
+        executor: 执行器，默认使用事件循环的线程池
+
+    返回:
+        StatsSummary，与对全部数据调用 describe() 一致；没有数据时所有字段为 0
+
+    示例:
+        >>> async def numbers():
+        ...     for x in [1, 2, 3, 4, 5]:
+        ...         yield x
+        >>> asyncio.run(astats(numbers())).variance
+        2.0
+    """
+    stats = RunningStats()
+    extremes = RunningMinMax()
+
+    def absorb(batch) -> None:
+        stats.extend(batch)
+        extremes.extend(batch)
+
+    def merge(partial_state) -> None:
+        stats.merge(partial_state[0])
+        extremes.merge(partial_state[1])
+
+    await _consume(source, absorb, _reduce_stats, merge, batch_size, offload_threshold, executor)
+    if stats.count == 0:
+        return EMPTY_SUMMARY
+    return StatsSummary(
+        count=stats.count,
+        total=stats.total,
+        mean=stats.mean,
+        minimum=extremes.minimum,
+        maximum=extremes.maximum,
+        variance=stats.variance,
+        sample_variance=stats.sample_variance,
+        stddev=stats.stddev,
+    )
+
+
+async def aaverage(source, **options) -> float:
+    """
+    异步版 average()
+
+    参数:
+        source: 异步可迭代对象或数字序列
+        **options: 传给 astats() 的 batch_size / offload_threshold / executor
+
+    返回:
+        平均值，没有数据时返回 0
+    """
+    return (await astats(source, **options)).mean
+
+
+async def avariance(source, **options) -> float:
+    """
+    异步版 variance()（总体方差）
+
+    参数:
+        source: 异步可迭代对象或数字序列
+        **options: 传给 astats() 的 batch_size / offload_threshold / executor
+
+    返回:
+        方差，没有数据或只有一个数据时返回 0
+    """
+    return (await astats(source, **options)).variance
+
+
+async def aquantiles(source, qs: list[float], k: Optional[int] = None,
+                     batch_size: int = BATCH_SIZE, offload_threshold: int = OFFLOAD_THRESHOLD,
+                     executor=None) -> list[float]:
+    """
+    异步版 quantiles()
+
+    k 为 None 时收集全部数据计算精确分位数（数据量大时在执行器中选择）；
+    指定 k 时用 KLLSketch 估计，内存与数据量无关，适合长时间运行的数据流。
+
+    参数:
+        source: 异步可迭代对象或数字序列
+        qs: 分位点列表，每个都在 0 到 1 之间
+        k: KLL 草图的精度参数，None 表示精确计算
+        batch_size: 攒批大小，也是两次让出事件循环之间处理的最大元素个数
+        offload_threshold: 达到这个规模的批次（或最终的选择）交给执行器处理
+        executor: 执行器，默认使用事件循环的线程池
+
+    返回:
+        与 qs 顺序对应的分位数列表，没有数据时返回空列表
+    """
+    for q in qs:
+        # 在消费数据之前检查参数
+        _quantile_ranks(1, q)
+
+    if k is not None:
+        sketch = KLLSketch(k)
+        await _consume(source, sketch.extend, partial(_reduce_sketch, k=k), sketch.merge,
+                       batch_size, offload_threshold, executor)
+        return sketch.quantiles(qs) if sketch.count else []
+
+    values = []
+    await _consume(source, values.extend, batch_size=batch_size, executor=executor)
+    if len(values) < offload_threshold:
+        return quantiles(values, qs, inplace=True)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(quantiles, values, qs, inplace=True))
+
+
+async def amedian(source, k: Optional[int] = None, **options) -> float:
+    """
+    异步版 median()
+
+    参数:
+        source: 异步可迭代对象或数字序列
+        k: KLL 草图的精度参数，None 表示精确计算
+        **options: 传给 aquantiles() 的 batch_size / offload_threshold / executor
+
+    返回:
+        中位数，没有数据时返回 0
+    """
+    result = await aquantiles(source, [0.5], k, **options)
+    return result[0] if result else 0
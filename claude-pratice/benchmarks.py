@@ -0,0 +1,1103 @@
+"""
+性能基准测试
+
+compare_statistics.py 关注"手动实现 vs 标准库"的正确性和原理对比，
+这个文件专门测量性能，分三部分:
+
+1. 基准测试套件：覆盖 math_utils / string_utils 的所有函数，
+   数据量从 10 到 1000 万，多种数据分布（有序、逆序、随机、大量重复、含 NaN），
+   报告耗时中位数 ± IQR 和内存峰值，可保存为 JSON 并与基线比较
+2. 专题对比：缓冲区快速通道、装饰器开销、并行交叉点、内存映射、流式文本、求和策略、增量统计、缺失值、分组统计、状态编码
+3. 导入耗时：用 -X importtime 检查包的惰性导入
+
+运行方式:
+    python benchmarks.py suite                              # 默认数据量 10 / 1000 / 10 万
+    python benchmarks.py suite --full --json baseline.json  # 10 到 1000 万，保存结果
+    python benchmarks.py suite --functions median,variance --baseline baseline.json
+    python benchmarks.py compare new.json baseline.json     # 比较两个结果文件，有回退时退出码为 1
+    python benchmarks.py showcase [size]                    # 专题对比，默认 1000 万个 float64
+    python benchmarks.py importtime [--budget-ms 5]         # 导入耗时，包的导入不再惰性时退出码为 1
+    python benchmarks.py [size]                             # 同 showcase
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import pickle
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from array import array
+from functools import wraps
+from typing import Callable, NamedTuple, Optional
+
+import math_utils
+from decorators import validate_non_empty
+from math_utils import sum_numbers, average, find_max, variance, median, describe
+from parallel import ParallelReducer
+from mmap_io import write_binary, open_binary, bounded_median
+from sorted_series import SortedSeries
+from grouping import group_stats
+from state_codec import encode_states, decode_states
+import string_utils
+
+
+def _time_call(func, data, repeat: int = 3) -> float:
+    """多次运行取最快的一次，返回秒数"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# ---------------------------------------------------------------------------
+# 基准测试套件
+#
+# 每个 (函数, 数据分布, 数据量) 组合:
+# 1. 先调用一次预热，并据此确定每个样本内重复调用的次数（让每个样本至少约 1ms）
+# 2. 用 perf_counter_ns 采集 repeat 个样本，报告每次调用耗时的中位数和四分位距（IQR）
+# 3. 另外在 tracemalloc 下运行一次，记录 Python 堆内存峰值（计时不受 tracemalloc 影响）
+# 结果可以保存成 JSON，并与之前保存的基线逐项比较，找出性能回退。
+# ---------------------------------------------------------------------------
+
+# 默认数据量（--full 时扩展到 1000 万）
+DEFAULT_SIZES = (10, 1_000, 100_000)
+FULL_SIZES = (10, 1_000, 100_000, 1_000_000, 10_000_000)
+
+# 每个样本的最短目标时长（纳秒）
+_MIN_SAMPLE_NS = 1_000_000
+
+
+def _numbers_sorted(size, rng):
+    return [float(i) for i in range(size)]
+
+
+def _numbers_reversed(size, rng):
+    return [float(i) for i in range(size, 0, -1)]
+
+
+def _numbers_random(size, rng):
+    return [rng.random() for _ in range(size)]
+
+
+def _numbers_duplicates(size, rng):
+    # 只有 10 个不同的值：考验三路分区和重复值处理
+    return [float(rng.randrange(10)) for _ in range(size)]
+
+
+def _numbers_nan(size, rng):
+    # 约 1% 的 NaN
+    return [math.nan if rng.random() < 0.01 else rng.random() for _ in range(size)]
+
+
+NUMBER_DISTRIBUTIONS = {
+    'sorted': _numbers_sorted,
+    'reversed': _numbers_reversed,
+    'random': _numbers_random,
+    'duplicates': _numbers_duplicates,
+    'nan': _numbers_nan,
+}
+
+_ASCII_WORDS = ["error", "warning", "request", "timeout", "user", "id", "ok", "retry"]
+_UNICODE_WORDS = ["日志", "服务", "café", "naïve", "Straße", "ǅemal", "🙂"]
+
+
+def _text_words(size, rng):
+    return ' '.join(rng.choice(_ASCII_WORDS) for _ in range(size))
+
+
+def _text_spaces(size, rng):
+    # 单词之间是长短不一的空白串
+    return ''.join(rng.choice(_ASCII_WORDS) + ' \t\n'[rng.randrange(3)] * rng.randint(1, 8)
+                   for _ in range(size))
+
+
+def _text_unicode(size, rng):
+    return ' '.join(rng.choice(_UNICODE_WORDS + _ASCII_WORDS) for _ in range(size))
+
+
+# 文本函数的"数据量"是单词数
+TEXT_DISTRIBUTIONS = {
+    'words': _text_words,
+    'spaces': _text_spaces,
+    'unicode': _text_unicode,
+}
+
+
+def _strings_names(size, rng):
+    # 两三个单词的短字符串，例如用户名、标题
+    return [' '.join(rng.choice(_ASCII_WORDS) for _ in range(rng.randint(2, 3))) for _ in range(size)]
+
+
+def _strings_messy(size, rng):
+    # 夹杂多余空白、Unicode 和 None 的短字符串
+    return [None if rng.random() < 0.01 else
+            ' '.join(rng.choice(_UNICODE_WORDS + _ASCII_WORDS) for _ in range(rng.randint(0, 4)))
+            + ' ' * rng.randint(0, 3)
+            for _ in range(size)]
+
+
+# 批量字符串函数的"数据量"是字符串个数
+STRING_LIST_DISTRIBUTIONS = {
+    'names': _strings_names,
+    'messy': _strings_messy,
+}
+
+
+class BenchmarkCase(NamedTuple):
+    """一个被测函数：name 用于报告，call(data) 执行一次，kind 决定使用哪类输入"""
+    name: str
+    call: Callable
+    kind: str = 'numbers'
+    max_size: int = FULL_SIZES[-1]
+
+
+def _drain(iterable) -> None:
+    for _ in iterable:
+        pass
+
+
+def _cases() -> list:
+    """所有被测函数；纯 Python 逐元素处理的函数限制最大数据量，避免单项跑上几分钟"""
+    cases = [
+        BenchmarkCase(func.__name__, func)
+        for func in (math_utils.sum_numbers, math_utils.average, math_utils.find_max,
+                     math_utils.find_min, math_utils.median, math_utils.variance,
+                     math_utils.standard_deviation, math_utils.describe)
+    ]
+    # nan_policy='omit'：与上面同名函数对比，干净数据上不应变慢
+    cases += [
+        BenchmarkCase(f'{func.__name__}_omit', lambda data, func=func: func(data, nan_policy='omit'))
+        for func in (math_utils.sum_numbers, math_utils.average, math_utils.find_max,
+                     math_utils.find_min, math_utils.median, math_utils.variance,
+                     math_utils.describe)
+    ]
+    cases += [
+        BenchmarkCase('quantile', lambda data: math_utils.quantile(data, 0.9)),
+        BenchmarkCase('quantiles', lambda data: math_utils.quantiles(data, [0.1, 0.5, 0.9, 0.99])),
+        BenchmarkCase('RunningStats', math_utils.RunningStats, max_size=1_000_000),
+        BenchmarkCase('RunningMinMax', math_utils.RunningMinMax, max_size=1_000_000),
+        BenchmarkCase('describe_many', lambda data: math_utils.describe_many(
+            [data[i:i + 100] for i in range(0, len(data), 100)]), max_size=1_000_000),
+        BenchmarkCase('histogram', lambda data: math_utils.histogram(data, 50)),
+        BenchmarkCase('histogram_quantile',
+                      lambda data: math_utils.histogram(data, 10, scale='quantile')),
+        BenchmarkCase('mode', math_utils.mode),
+        BenchmarkCase('frequency_table', math_utils.frequency_table),
+    ]
+    cases += [
+        BenchmarkCase(func.__name__, lambda data, func=func: _drain(func(data, 100)),
+                      max_size=1_000_000)
+        for func in (math_utils.rolling_mean, math_utils.rolling_std, math_utils.rolling_min,
+                     math_utils.rolling_max, math_utils.rolling_median)
+    ]
+    cases += [
+        BenchmarkCase(func.__name__, func, 'text')
+        for func in (string_utils.reverse_string, string_utils.capitalize_words,
+                     string_utils.count_words, string_utils.remove_extra_spaces,
+                     string_utils.count_words_stream)
+    ]
+    cases += [
+        BenchmarkCase(func.__name__, lambda text, func=func: _drain(func(text)), 'text')
+        for func in (string_utils.stream_words, string_utils.stream_remove_extra_spaces,
+                     string_utils.stream_capitalize_words)
+    ]
+    cases += [
+        BenchmarkCase('stream_reverse',
+                      lambda text: _drain(string_utils.stream_reverse(io.BytesIO(text.encode()))),
+                      'text'),
+        BenchmarkCase('word_frequencies',
+                      lambda text: string_utils.word_frequencies(text, top_k=10), 'text'),
+        BenchmarkCase('count_words_bytes',
+                      lambda text: string_utils.count_words_bytes(text.encode()), 'text'),
+        BenchmarkCase('remove_extra_spaces_bytes',
+                      lambda text: string_utils.remove_extra_spaces_bytes(text.encode()), 'text'),
+        BenchmarkCase('reverse_bytes',
+                      lambda text: string_utils.reverse_bytes(text.encode()), 'text'),
+    ]
+    # 批量字符串处理：逐个调用（*_loop）与批量版本对比
+    batch_pairs = (
+        (string_utils.capitalize_words, string_utils.capitalize_words_many),
+        (string_utils.remove_extra_spaces, string_utils.remove_extra_spaces_many),
+        (string_utils.reverse_string, string_utils.reverse_string_many),
+        (string_utils.count_words, string_utils.count_words_many),
+    )
+    cases += [
+        BenchmarkCase(f'{single.__name__}_loop',
+                      lambda texts, single=single: [single(text) for text in texts], 'strings')
+        for single, _ in batch_pairs
+    ]
+    cases += [BenchmarkCase(many.__name__, many, 'strings') for _, many in batch_pairs]
+    return cases
+
+
+def _percentile(ordered: list, q: float) -> float:
+    """已排序样本的线性插值分位数"""
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def measure(func, data, repeat: int = 7, memory: bool = True) -> dict:
+    """
+    测量 func(data) 的耗时和内存峰值
+
+    参数:
+        func: 被测函数
+        data: 输入数据
+        repeat: 样本数
+        memory: 是否额外用 tracemalloc 运行一次统计内存峰值
+
+    返回:
+        {median_ns, iqr_ns, min_ns, repeat, number, peak_bytes}，耗时都是每次调用的纳秒数
+    """
+    clock = time.perf_counter_ns
+    start = clock()
+    func(data)
+    elapsed = clock() - start
+    number = max(1, _MIN_SAMPLE_NS // max(elapsed, 1))
+
+    samples = []
+    for _ in range(repeat):
+        start = clock()
+        for _ in range(number):
+            func(data)
+        samples.append((clock() - start) / number)
+    samples.sort()
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func(data)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {
+        'median_ns': _percentile(samples, 0.5),
+        'iqr_ns': _percentile(samples, 0.75) - _percentile(samples, 0.25),
+        'min_ns': samples[0],
+        'repeat': repeat,
+        'number': number,
+        'peak_bytes': peak,
+    }
+
+
+def run_suite(sizes=DEFAULT_SIZES, distributions=None, functions=None,
+              repeat: int = 7, memory: bool = True, seed: int = 0, progress=None) -> dict:
+    """
+    运行基准测试套件
+
+    参数:
+        sizes: 数据量列表
+        distributions: 只运行这些分布（名字列表），默认全部
+        functions: 只运行这些函数（名字列表），默认全部
+        repeat: 每项的样本数
+        memory: 是否统计内存峰值
+        seed: 生成数据的随机种子
+        progress: 可选的回调，每完成一项调用一次 progress(结果)
+
+    返回:
+        {'meta': 运行环境信息, 'results': [每项结果的字典]}，可以直接 json.dump
+    """
+    cases = [case for case in _cases() if functions is None or case.name in functions]
+    generators = {'numbers': NUMBER_DISTRIBUTIONS, 'text': TEXT_DISTRIBUTIONS,
+                  'strings': STRING_LIST_DISTRIBUTIONS}
+    results = []
+    for kind, table in generators.items():
+        kind_cases = [case for case in cases if case.kind == kind]
+        if not kind_cases:
+            continue
+        for dist, generate in table.items():
+            if distributions is not None and dist not in distributions:
+                continue
+            for size in sizes:
+                data = generate(size, random.Random(seed))
+                for case in kind_cases:
+                    if size > case.max_size:
+                        continue
+                    row = {'function': case.name, 'distribution': dist, 'size': size}
+                    try:
+                        row.update(measure(case.call, data, repeat, memory))
+                    except Exception as exc:
+                        row['error'] = f'{type(exc).__name__}: {exc}'
+                    results.append(row)
+                    if progress is not None:
+                        progress(row)
+                del data
+    return {'meta': _environment(), 'results': results}
+
+
+def _environment() -> dict:
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': math_utils.np.__version__ if math_utils.np is not None else None,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = 0.10) -> list:
+    """
+    与基线逐项比较
+
+    一项被判为回退需要同时满足:
+    - 中位数耗时比基线慢 threshold 以上
+    - 变慢的绝对量超过两次运行中较大的 IQR（排除噪声）
+
+    参数:
+        current: run_suite() 的结果
+        baseline: 之前保存的 run_suite() 结果
+        threshold: 相对阈值，0.10 表示慢 10%
+
+    返回:
+        每个共同项一行: {function, distribution, size, baseline_ns, current_ns, ratio, status}，
+        status 为 'regression'、'improvement' 或 'ok'
+    """
+    def key(row):
+        return row['function'], row['distribution'], row['size']
+
+    previous = {key(row): row for row in baseline['results'] if 'median_ns' in row}
+    rows = []
+    for row in current['results']:
+        old = previous.get(key(row))
+        if old is None or 'median_ns' not in row:
+            continue
+        ratio = row['median_ns'] / old['median_ns']
+        noise = max(row['iqr_ns'], old['iqr_ns'])
+        delta = row['median_ns'] - old['median_ns']
+        if ratio > 1 + threshold and delta > noise:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold) and -delta > noise:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({
+            'function': row['function'], 'distribution': row['distribution'], 'size': row['size'],
+            'baseline_ns': old['median_ns'], 'current_ns': row['median_ns'],
+            'ratio': ratio, 'status': status,
+        })
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# 导入耗时
+#
+# 命令行工具每次启动都要导入这个包，导入耗时会乘以进程数。
+# 在子进程中用 python -X importtime 导入，解析它写到 stderr 的逐模块耗时：
+# - 只统计语句本身引入的模块（减去解释器启动时就会导入的模块）
+# - 包目录的名字带连字符，不能直接导入，临时挂到 IMPORT_PACKAGE_NAME 下
+# - 子进程允许写字节码缓存，第一次运行只用来预热，不计入结果
+# ---------------------------------------------------------------------------
+
+IMPORT_PACKAGE_NAME = 'py_utils'
+
+# 导入耗时场景：名字 → 在子进程中执行的语句
+IMPORT_SCENARIOS = {
+    'package': f'import {IMPORT_PACKAGE_NAME}',
+    'math': f'import {IMPORT_PACKAGE_NAME}; {IMPORT_PACKAGE_NAME}.median',
+    'string': f'import {IMPORT_PACKAGE_NAME}; {IMPORT_PACKAGE_NAME}.reverse_string',
+    'all': f'from {IMPORT_PACKAGE_NAME} import *',
+}
+
+# 只导入包本身（不访问任何函数）的耗时预算
+IMPORT_BUDGET_MS = 5.0
+
+# 只导入包本身时不允许出现的模块：子模块和可选的重量级依赖
+_EAGER_IMPORT_FORBIDDEN = ('numpy', 'multiprocessing', 'asyncio', 'concurrent.futures')
+
+
+def _package_root() -> str:
+    """创建一个临时目录，把包目录以 IMPORT_PACKAGE_NAME 的名字挂在下面"""
+    root = tempfile.mkdtemp(prefix='py_utils_import_')
+    target = os.path.join(root, IMPORT_PACKAGE_NAME)
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        os.symlink(package_dir, target, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        # 不支持符号链接时复制源文件
+        shutil.copytree(package_dir, target, ignore=shutil.ignore_patterns('__pycache__', '*.bin'))
+    return root
+
+
+def _import_times(statement: str, root: str) -> dict:
+    """
+    在子进程中执行语句，返回 {模块名: (自身微秒, 累计微秒, 嵌套深度)}
+
+    解析的行形如 "import time:       220 |        774 |   py_utils"，
+    模块名前的缩进表示它是被哪一层导入的。
+    """
+    env = dict(os.environ, PYTHONPATH=root)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            cwd=root, env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        times[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return times
+
+
+def measure_import_time(statement: str, repeat: int = 5) -> dict:
+    """
+    测量一条导入语句的耗时
+
+    参数:
+        statement: 在子进程中执行的语句，包名为 IMPORT_PACKAGE_NAME
+        repeat: 计时的次数（另外预热一次）
+
+    返回:
+        {'statement', 'median_us', 'min_us', 'modules', 'heaviest'}：
+        modules 是语句引入的全部模块名，heaviest 是自身耗时最多的 5 个 (模块, 微秒)
+    """
+    root = _package_root()
+    try:
+        startup = set(_import_times('pass', root))
+        _import_times(statement, root)
+        totals = []
+        for _ in range(repeat):
+            times = {name: value for name, value in _import_times(statement, root).items()
+                     if name not in startup}
+            # 最外层（深度为 0）模块的累计耗时之和就是语句的总导入耗时
+            totals.append(sum(cumulative for _, cumulative, depth in times.values() if depth == 0))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    totals.sort()
+    heaviest = sorted(((name, value[0]) for name, value in times.items()),
+                      key=lambda item: item[1], reverse=True)[:5]
+    return {
+        'statement': statement,
+        'median_us': _percentile(totals, 0.5),
+        'min_us': totals[0],
+        'modules': sorted(times),
+        'heaviest': heaviest,
+    }
+
+
+def check_lazy_import(result: dict) -> list:
+    """
+    检查只导入包本身时是否引入了子模块或重量级依赖
+
+    参数:
+        result: measure_import_time(IMPORT_SCENARIOS['package']) 的结果
+
+    返回:
+        不应出现的模块名列表，为空表示通过
+    """
+    prefix = IMPORT_PACKAGE_NAME + '.'
+    return [name for name in result['modules']
+            if name.startswith(prefix) or name.split('.')[0] in _EAGER_IMPORT_FORBIDDEN
+            or name in _EAGER_IMPORT_FORBIDDEN]
+
+
+def run_import_benchmark(repeat: int = 5, budget_ms: float = IMPORT_BUDGET_MS) -> int:
+    """
+    打印各导入场景的耗时，并检查包本身的导入是否仍然是惰性的
+
+    返回:
+        退出码：包的导入超出预算或引入了不该引入的模块时为 1
+    """
+    print(f"{'场景':<10}{'中位数':>10}{'最快':>10}{'模块数':>8}  自身耗时最多的模块")
+    failures = []
+    for name, statement in IMPORT_SCENARIOS.items():
+        result = measure_import_time(statement, repeat)
+        heaviest = ', '.join(f'{module} {us / 1000:.1f}ms' for module, us in result['heaviest'][:3])
+        print(f"{name:<10}{result['median_us'] / 1000:>8.2f}ms{result['min_us'] / 1000:>8.2f}ms"
+              f"{len(result['modules']):>8}  {heaviest}")
+        if name == 'package':
+            eager = check_lazy_import(result)
+            if eager:
+                failures.append(f"导入包时引入了: {', '.join(eager)}")
+            if result['median_us'] > budget_ms * 1000:
+                failures.append(f"导入包耗时 {result['median_us'] / 1000:.2f}ms，超出预算 {budget_ms}ms")
+    for failure in failures:
+        print(f"失败: {failure}")
+    return 1 if failures else 0
+
+
+def _format_ns(ns: float) -> str:
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('µs', 1e3)):
+        if ns >= scale:
+            return f'{ns / scale:.2f}{unit}'
+    return f'{ns:.0f}ns'
+
+
+def _format_bytes(size: int) -> str:
+    for unit, scale in (('MiB', 2 ** 20), ('KiB', 2 ** 10)):
+        if size >= scale:
+            return f'{size / scale:.1f}{unit}'
+    return f'{size}B'
+
+
+def _print_row(row: dict) -> None:
+    label = f"{row['function']:<26}{row['distribution']:<12}{row['size']:>11,}"
+    if 'error' in row:
+        print(f"{label}   出错: {row['error']}")
+        return
+    peak = '' if row['peak_bytes'] is None else f"{_format_bytes(row['peak_bytes']):>10}"
+    print(f"{label}{_format_ns(row['median_ns']):>12} ± {_format_ns(row['iqr_ns']):<10}{peak}")
+
+
+def _print_comparison(rows: list) -> None:
+    print(f"{'函数':<26}{'分布':<12}{'数据量':>11}{'基线':>12}{'当前':>12}{'比值':>8}  状态")
+    for row in rows:
+        print(f"{row['function']:<26}{row['distribution']:<12}{row['size']:>11,}"
+              f"{_format_ns(row['baseline_ns']):>12}{_format_ns(row['current_ns']):>12}"
+              f"{row['ratio']:>8.2f}  {row['status']}")
+    regressions = sum(row['status'] == 'regression' for row in rows)
+    print(f"\n共比较 {len(rows)} 项，回退 {regressions} 项")
+
+
+def _split(value: Optional[str]):
+    return None if value is None else [item for item in value.split(',') if item]
+
+
+def main(argv=None) -> int:
+    """
+    命令行入口
+
+    返回:
+        退出码：与基线比较发现回退时为 1，否则为 0
+    """
+    parser = argparse.ArgumentParser(description="py_utils 性能基准测试")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    suite = sub.add_parser('suite', help="运行基准测试套件")
+    suite.add_argument('--sizes', help="逗号分隔的数据量，默认 10,1000,100000")
+    suite.add_argument('--full', action='store_true', help="数据量扩展到 10 到 1000 万")
+    suite.add_argument('--distributions', help="逗号分隔的分布名")
+    suite.add_argument('--functions', help="逗号分隔的函数名")
+    suite.add_argument('--repeat', type=int, default=7, help="每项的样本数")
+    suite.add_argument('--no-memory', action='store_true', help="不统计内存峰值")
+    suite.add_argument('--json', help="把结果保存到这个 JSON 文件")
+    suite.add_argument('--baseline', help="与这个基线 JSON 文件比较")
+    suite.add_argument('--threshold', type=float, default=0.10, help="回退的相对阈值")
+
+    compare = sub.add_parser('compare', help="比较两个已保存的结果文件")
+    compare.add_argument('current')
+    compare.add_argument('baseline')
+    compare.add_argument('--threshold', type=float, default=0.10)
+
+    showcase = sub.add_parser('showcase', help="运行专题对比")
+    showcase.add_argument('size', nargs='?', type=int, default=10_000_000)
+
+    importtime = sub.add_parser('importtime', help="用 -X importtime 测量导入耗时")
+    importtime.add_argument('--repeat', type=int, default=5, help="每个场景的计时次数")
+    importtime.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS,
+                            help="只导入包本身的耗时预算（毫秒）")
+
+    args = parser.parse_args(argv)
+    if args.command == 'showcase':
+        run_showcase(args.size)
+        return 0
+    if args.command == 'importtime':
+        return run_import_benchmark(args.repeat, args.budget_ms)
+
+    if args.command == 'compare':
+        with open(args.current, encoding='utf-8') as f:
+            current = json.load(f)
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    else:
+        sizes = [int(s) for s in _split(args.sizes)] if args.sizes else (
+            FULL_SIZES if args.full else DEFAULT_SIZES)
+        print(f"{'函数':<26}{'分布':<12}{'数据量':>11}{'中位数':>12} ± IQR        内存峰值")
+        current = run_suite(sizes, _split(args.distributions), _split(args.functions),
+                            args.repeat, not args.no_memory, progress=_print_row)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(current, f, ensure_ascii=False, indent=1)
+        if not args.baseline:
+            return 0
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    rows = compare_results(current, baseline, args.threshold)
+    print()
+    _print_comparison(rows)
+    return 1 if any(row['status'] == 'regression' for row in rows) else 0
+
+
+# ---------------------------------------------------------------------------
+# 专题对比
+# ---------------------------------------------------------------------------
+
+def benchmark_buffer_fast_path(size: int = 10_000_000) -> None:
+    """
+    缓冲区快速通道：同样的 float64 数据，以 list 和 array('d') 两种形式传入
+
+    list 只能逐个元素在 Python 中处理；array('d') 支持缓冲区协议，
+    安装了 NumPy 时会零复制地交给向量化内核。
+    """
+    print("=" * 60)
+    print(f"缓冲区快速通道 ({size:,} 个 float64)")
+    print("=" * 60)
+
+    if math_utils.np is None:
+        print("未安装 NumPy：array('d') 也走纯 Python 实现，两列耗时应当接近")
+
+    rng = random.Random(0)
+    as_list = [rng.random() for _ in range(size)]
+    as_array = array('d', as_list)
+
+    print(f"{'函数':<20}{'list':>12}{'array(d)':>12}{'加速比':>10}")
+    for func in (sum_numbers, average, find_max, variance, median):
+        list_time = _time_call(func, as_list, repeat=1)
+        array_time = _time_call(func, as_array)
+        print(f"{func.__name__:<20}{list_time:>11.4f}s{array_time:>11.4f}s"
+              f"{list_time / array_time:>9.1f}x")
+
+
+def _legacy_validate_non_empty(return_value=0):
+    """重构前的 validate_non_empty，仅作为对照组保留在这里"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if args:
+                input_data = args[0]
+                if input_data is None or input_data == []:
+                    return return_value
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def benchmark_decorator_overhead(calls: int = 1_000_000) -> None:
+    """
+    验证装饰器的单次调用开销：原函数 vs 重构前的包装 vs 按签名生成的专用包装
+
+    用 max() 处理 3 个元素的小列表，这正是装饰器开销占比最大的场景。
+    之后再测 math_utils 的公开函数（装饰器 + 参数分派 + 计算）本身，
+    与直接用内置函数写出的最简实现对比，看整条调用路径的固定开销。
+    """
+    print("\n" + "=" * 60)
+    print(f"装饰器单次调用开销 ({calls:,} 次调用)")
+    print("=" * 60)
+
+    def bare(numbers):
+        return max(numbers)
+
+    candidates = [
+        ("原函数（验证关闭）", bare),
+        ("重构前 *args 包装", _legacy_validate_non_empty(0)(bare)),
+        ("按签名生成的包装", validate_non_empty(0)(bare)),
+    ]
+    data = [3, 1, 2]
+    baseline = None
+    for label, func in candidates:
+        timer = timeit.Timer('func(data)', globals={'func': func, 'data': data})
+        seconds = min(timer.repeat(number=calls, repeat=7))
+        per_call = seconds / calls * 1e9
+        if baseline is None:
+            baseline = per_call
+            print(f"{label:<20}{per_call:>8.1f} ns/次")
+        else:
+            print(f"{label:<20}{per_call:>8.1f} ns/次   额外开销 {per_call - baseline:>6.1f} ns")
+
+    def sorted_median(numbers):
+        ordered = sorted(numbers)
+        mid = len(ordered) // 2
+        return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+
+    public = [
+        (math_utils.sum_numbers, sum),
+        (math_utils.average, lambda numbers: sum(numbers) / len(numbers)),
+        (math_utils.find_max, max),
+        (math_utils.find_min, min),
+        (math_utils.median, sorted_median),
+        (math_utils.variance, lambda numbers: math_utils._two_pass_variance(numbers)),
+    ]
+    print(f"\n{'公开函数':<20}{'完整调用':>12}{'最简实现':>12}{'固定开销':>12}")
+    for func, minimal in public:
+        timings = []
+        for candidate in (func, minimal):
+            timer = timeit.Timer('func(data)', globals={'func': candidate, 'data': data})
+            timings.append(min(timer.repeat(number=calls, repeat=7)) / calls * 1e9)
+        print(f"{func.__name__:<20}{timings[0]:>9.1f} ns{timings[1]:>9.1f} ns"
+              f"{timings[0] - timings[1]:>9.1f} ns")
+
+
+def benchmark_parallel_crossover(sizes=(10_000, 100_000, 1_000_000, 10_000_000),
+                                 workers=None) -> None:
+    """
+    并行归约的交叉点：数据量多大时多进程 describe() 才比串行快
+
+    进程池提前创建并预热，测到的是每次调用的真实开销
+    （复制到共享内存 + 分发任务 + 合并部分状态）。
+    """
+    print("\n" + "=" * 60)
+    print("并行分块归约：串行 vs 多进程 describe()")
+    print("=" * 60)
+
+    rng = random.Random(0)
+    crossover = None
+    # 至少用两个进程，否则 ParallelReducer 会直接走串行路径
+    workers = workers or max(2, os.cpu_count() or 1)
+    with ParallelReducer(workers=workers, min_size=0) as reducer:
+        print(f"工作进程数: {reducer.workers}")
+        reducer.describe([1.0, 2.0])  # 预热：启动进程池
+        print(f"{'数据量':>12}{'串行':>12}{'并行':>12}{'加速比':>10}")
+        for size in sizes:
+            data = [rng.random() for _ in range(size)]
+            serial_time = _time_call(describe, data, repeat=1)
+            parallel_time = _time_call(reducer.describe, data, repeat=1)
+            speedup = serial_time / parallel_time
+            print(f"{size:>12,}{serial_time:>11.4f}s{parallel_time:>11.4f}s{speedup:>9.2f}x")
+            if crossover is None and speedup > 1:
+                crossover = size
+
+    if crossover is None:
+        print("在测试的数据量范围内并行没有更快（单核机器上这是预期结果）")
+    else:
+        print(f"交叉点约为 {crossover:,} 个元素，可据此设置 ParallelReducer(min_size=...)")
+
+
+def _measure(func):
+    """
+    运行 func，返回 (结果, 秒数, tracemalloc 记录的 Python 堆内存峰值字节数)
+
+    tracemalloc 会显著拖慢代码，所以计时和内存统计分两次运行。
+    """
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def benchmark_mmap_memory(size: int = 5_000_000) -> None:
+    """
+    内存映射输入：读进列表再计算 vs 直接在 mmap 视图上计算
+
+    内存峰值用 tracemalloc 统计 Python 分配的内存；mmap 的页面属于页缓存，不计入。
+    """
+    print("\n" + "=" * 60)
+    print(f"内存映射输入 ({size:,} 个 float64)")
+    print("=" * 60)
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'data.bin')
+        write_binary(path, array('d', (rng.random() for _ in range(size))))
+
+        def from_list():
+            with open_binary(path) as mapped:
+                data = mapped.values.tolist()
+            return average(data), median(data)
+
+        def from_mmap():
+            with open_binary(path) as mapped:
+                return average(mapped.values), bounded_median(mapped.values)
+
+        for label, func in (("读入列表", from_list), ("mmap 视图", from_mmap)):
+            result, elapsed, peak = _measure(func)
+            print(f"{label:<12}{elapsed:>9.3f}s   内存峰值 {peak / 2 ** 20:>8.1f} MiB   "
+                  f"平均值/中位数 {result[0]:.6f} / {result[1]:.6f}")
+
+
+def benchmark_text_streaming(size_mb: int = 50) -> None:
+    """
+    流式文本处理吞吐量（MB/s）：整串函数 vs 按块处理的生成器
+
+    整串函数需要先把全部文本读进内存；流式版本从 StringIO / BytesIO 按块读取。
+    """
+    print("\n" + "=" * 60)
+    print(f"流式文本处理吞吐量 ({size_mb} MB 文本)")
+    print("=" * 60)
+
+    rng = random.Random(0)
+    vocabulary = ["error", "warning", "request", "timeout", "user", "日志", "服务", "  ", "\n"]
+    pieces = []
+    length = 0
+    while length < size_mb * 2 ** 20:
+        word = rng.choice(vocabulary)
+        pieces.append(word)
+        pieces.append(" ")
+        length += len(word) + 1
+    text = "".join(pieces)
+    megabytes = len(text.encode('utf-8')) / 2 ** 20
+    encoded = text.encode('utf-8')
+
+    def drain(generator):
+        for _ in generator:
+            pass
+
+    cases = [
+        ("count_words", lambda: string_utils.count_words(text),
+         lambda: string_utils.count_words_stream(io.StringIO(text))),
+        ("remove_extra_spaces", lambda: string_utils.remove_extra_spaces(text),
+         lambda: drain(string_utils.stream_remove_extra_spaces(io.StringIO(text)))),
+        ("capitalize_words", lambda: string_utils.capitalize_words(text),
+         lambda: drain(string_utils.stream_capitalize_words(io.StringIO(text)))),
+        ("reverse_string", lambda: string_utils.reverse_string(text),
+         lambda: drain(string_utils.stream_reverse(io.BytesIO(encoded)))),
+    ]
+    print(f"{'函数':<22}{'整串 MB/s':>12}{'流式 MB/s':>12}")
+    for name, whole, streaming in cases:
+        whole_time = _time_call(lambda _: whole(), None)
+        stream_time = _time_call(lambda _: streaming(), None)
+        print(f"{name:<22}{megabytes / whole_time:>12.1f}{megabytes / stream_time:>12.1f}")
+
+
+def benchmark_summation(size: int = 1_000_000) -> None:
+    """
+    求和策略的速度/精度权衡
+
+    三组数据:
+    - random: [0, 1) 均匀分布，条件良好
+    - cancellation: 正负大数相互抵消、中间夹着小数，条件很差
+    - offset: 1e9 + [0, 1)，均值远大于离散程度，考验方差算法
+    总和的参考值是 math.fsum（正确舍入）；方差的参考值用 Fraction 精确计算。
+    """
+    from fractions import Fraction
+
+    print("\n" + "=" * 60)
+    print(f"求和策略：速度与精度 ({size:,} 个 float)")
+    print("=" * 60)
+
+    rng = random.Random(0)
+    datasets = {
+        'random': [rng.random() for _ in range(size)],
+        'cancellation': [rng.choice((-1, 1)) * 10.0 ** rng.randint(-8, 12) * rng.random()
+                         for _ in range(size)],
+        'offset': [1e9 + rng.random() for _ in range(size)],
+    }
+    modes = (None,) + math_utils.SUMMATION_MODES
+
+    def relative_error(value, exact):
+        return abs(value - exact) / abs(exact) if exact else abs(value)
+
+    for name, data in datasets.items():
+        exact_sum = math.fsum(data)
+        exact_mean = sum(map(Fraction, data)) / size
+        exact_var = float(sum((Fraction(x) - exact_mean) ** 2 for x in data) / size)
+        print(f"\n[{name}]")
+        print(f"{'策略':<12}{'sum 耗时':>12}{'sum 相对误差':>16}{'variance 耗时':>16}{'variance 相对误差':>20}")
+        for mode in modes:
+            sum_time = _time_call(lambda d: sum_numbers(d, summation=mode), data)
+            var_time = _time_call(lambda d: variance(d, summation=mode), data)
+            sum_error = relative_error(sum_numbers(data, summation=mode), exact_sum)
+            var_error = relative_error(variance(data, summation=mode), exact_var)
+            print(f"{mode or '默认':<12}{sum_time:>11.4f}s{sum_error:>16.2e}"
+                  f"{var_time:>15.4f}s{var_error:>20.2e}")
+
+
+def benchmark_incremental_stats(size: int = 1_000_000, updates: int = 1_000) -> None:
+    """
+    增量场景：每追加一个点就看一次中位数 / 极值 / 方差
+
+    列表每次都要对全部数据重新计算；SortedSeries 一直保持有序，
+    每次插入 O(log n + load)，查询 O(log n) 或 O(1)。
+    """
+    print("\n" + "=" * 60)
+    print(f"增量统计：{size:,} 个 float 上追加 {updates:,} 次，每次追加后查询")
+    print("=" * 60)
+
+    rng = random.Random(0)
+    data = [rng.random() for _ in range(size)]
+    points = [rng.random() for _ in range(updates)]
+    queries = {
+        'median': (median, SortedSeries.median),
+        'find_min/find_max': (lambda d: (min(d), find_max(d)),
+                              lambda s: (s.find_min(), s.find_max())),
+        'variance': (variance, SortedSeries.variance),
+    }
+
+    start = time.perf_counter()
+    series = SortedSeries(data)
+    print(f"构建 SortedSeries: {time.perf_counter() - start:.3f}s")
+    print(f"{'查询':<20}{'列表':>14}{'SortedSeries':>16}{'加速比':>10}")
+    # 列表逐次重算太慢，只测前 20 次再按比例推算
+    sampled = points[:20]
+    for name, (on_list, on_series) in queries.items():
+        values = list(data)
+        start = time.perf_counter()
+        for x in sampled:
+            values.append(x)
+            on_list(values)
+        list_time = (time.perf_counter() - start) * updates / len(sampled)
+
+        series = SortedSeries(data)
+        start = time.perf_counter()
+        for x in points:
+            series.add(x)
+            on_series(series)
+        series_time = time.perf_counter() - start
+        print(f"{name:<20}{list_time:>13.3f}s{series_time:>15.4f}s{list_time / series_time:>9.0f}x")
+
+
+def benchmark_nan_policy(size: int = 1_000_000) -> None:
+    """
+    缺失值处理的开销
+
+    - 干净数据：默认（不检查）与 nan_policy='omit' 对比，后者只多一趟 C 层的 sum() 扫描
+    - 含缺失值（约 1% None + 1% NaN）：先过滤出新列表再计算，与 nan_policy='omit' 边遍历边跳过对比，
+      同时记录 Python 堆内存峰值
+    """
+    print("\n" + "=" * 60)
+    print(f"缺失值处理 ({size:,} 个 float)")
+    print("=" * 60)
+
+    rng = random.Random(0)
+    clean = [rng.random() for _ in range(size)]
+    dirty = [None if r < 0.01 else math.nan if r < 0.02 else x
+             for x, r in zip(clean, (rng.random() for _ in range(size)))]
+    funcs = (math_utils.sum_numbers, math_utils.average, math_utils.find_max,
+             math_utils.median, math_utils.variance)
+
+    print(f"{'函数':<14}{'干净/默认':>12}{'干净/omit':>12}{'缺失/先过滤':>14}{'内存':>10}"
+          f"{'缺失/omit':>12}{'内存':>10}")
+    for func in funcs:
+        default_time = _time_call(func, clean)
+        omit_time = _time_call(lambda d: func(d, nan_policy='omit'), clean)
+        _, filter_time, filter_peak = _measure(
+            lambda: func([x for x in dirty if x is not None and x == x]))
+        _, skip_time, skip_peak = _measure(lambda: func(dirty, nan_policy='omit'))
+        print(f"{func.__name__:<14}{default_time:>11.4f}s{omit_time:>11.4f}s{filter_time:>13.4f}s"
+              f"{_format_bytes(filter_peak):>10}{skip_time:>11.4f}s{_format_bytes(skip_peak):>10}")
+
+
+def benchmark_group_stats(size: int = 1_000_000, groups: int = 100_000) -> None:
+    """
+    分组统计：先分桶成 {键: [数值...]} 再逐组调用 math_utils，与 group_stats() 对比
+
+    同时记录 Python 堆内存峰值：分桶的做法每个组一个列表，group_stats() 只有按列存放的状态。
+    """
+    print("\n" + "=" * 60)
+    print(f"分组统计 ({size:,} 行, {groups:,} 个组)")
+    print("=" * 60)
+
+    rng = random.Random(0)
+    keys = [rng.randrange(groups) for _ in range(size)]
+    values = [rng.random() for _ in range(size)]
+    weights = [rng.randint(1, 5) for _ in range(size)]
+
+    def bucketed(with_median):
+        buckets = {}
+        for key, x in zip(keys, values):
+            buckets.setdefault(key, []).append(x)
+        if with_median:
+            return {key: (average(b), variance(b), median(b)) for key, b in buckets.items()}
+        return {key: (average(b), variance(b)) for key, b in buckets.items()}
+
+    cases = (
+        ('mean/variance', lambda: bucketed(False),
+         lambda: group_stats(keys, values, aggs=['mean', 'variance'])),
+        ('+ median', lambda: bucketed(True),
+         lambda: group_stats(keys, values, aggs=['mean', 'variance', 'median'])),
+    )
+    print(f"{'聚合':<16}{'分桶':>10}{'内存':>10}{'group_stats':>14}{'内存':>10}")
+    for name, baseline, grouped in cases:
+        _, base_time, base_peak = _measure(baseline)
+        _, group_time, group_peak = _measure(grouped)
+        print(f"{name:<16}{base_time:>9.3f}s{_format_bytes(base_peak):>10}"
+              f"{group_time:>13.3f}s{_format_bytes(group_peak):>10}")
+    _, weighted_time, _ = _measure(
+        lambda: group_stats(keys, values, weights, aggs=['mean', 'variance', 'p50', 'p99']))
+    print(f"加权 mean/variance/p50/p99: {weighted_time:.3f}s")
+
+
+def benchmark_state_codec(size: int = 1_000_000, shards: int = 16) -> None:
+    """
+    跨进程传递部分统计：原始数据的 JSON 列表 vs pickle 状态对象 vs 二进制状态
+
+    每个分片在"工作进程"一侧产生一条消息，"汇总进程"一侧解码后得到
+    describe() 的各项和 p50 / p99（二进制和 pickle 的分位数来自合并后的 KLLSketch）。
+    这里在同一进程内顺序运行两侧，只比较计算、编码、解码的耗时和消息大小。
+    """
+    print("\n" + "=" * 60)
+    print(f"状态编码：{shards} 个分片共 {size:,} 个 float")
+    print("=" * 60)
+
+    rng = random.Random(0)
+    step = size // shards
+    chunks = [[rng.random() for _ in range(step)] for _ in range(shards)]
+
+    def states(chunk):
+        sketch = math_utils.KLLSketch(200, seed=0)
+        sketch.extend(chunk)
+        return [math_utils.RunningStats(chunk), math_utils.RunningMinMax(chunk), sketch]
+
+    def combine(decoded):
+        stats, extremes, sketch = (math_utils.RunningStats(), math_utils.RunningMinMax(),
+                                   math_utils.KLLSketch(200, seed=0))
+        for chunk_stats, chunk_extremes, chunk_sketch in decoded:
+            stats.merge(chunk_stats)
+            extremes.merge(chunk_extremes)
+            sketch.merge(chunk_sketch)
+        return stats.mean, stats.variance, extremes.maximum, sketch.quantiles([0.5, 0.99])
+
+    def recompute(lists):
+        data = [x for values in lists for x in values]
+        summary = describe(data)
+        return summary.mean, summary.variance, summary.maximum, math_utils.quantiles(data, [0.5, 0.99])
+
+    approaches = (
+        ('JSON 原始列表', lambda: [json.dumps(chunk) for chunk in chunks],
+         lambda messages: recompute([json.loads(message) for message in messages])),
+        ('pickle 状态对象', lambda: [pickle.dumps(states(chunk)) for chunk in chunks],
+         lambda messages: combine([pickle.loads(message) for message in messages])),
+        ('二进制状态', lambda: [encode_states(states(chunk)) for chunk in chunks],
+         lambda messages: combine([decode_states(message) for message in messages])),
+    )
+    print(f"{'方式':<16}{'消息总大小':>12}{'工作进程':>12}{'汇总进程':>12}  p50 / p99")
+    for name, produce, consume in approaches:
+        start = time.perf_counter()
+        messages = produce()
+        produce_time = time.perf_counter() - start
+        start = time.perf_counter()
+        result = consume(messages)
+        consume_time = time.perf_counter() - start
+        p50, p99 = result[3]
+        print(f"{name:<16}{_format_bytes(sum(map(len, messages))):>12}{produce_time:>11.3f}s"
+              f"{consume_time:>11.3f}s  {p50:.4f} / {p99:.4f}")
+
+    # 只看编解码本身：单个定长状态的往返耗时
+    stats = math_utils.RunningStats(chunks[0])
+    calls = 100_000
+    encode_time = timeit.timeit(stats.serialize, number=calls) / calls
+    blob = stats.serialize()
+    decode_time = timeit.timeit(lambda: math_utils.RunningStats.deserialize(blob), number=calls) / calls
+    print(f"RunningStats 单次编码 {encode_time * 1e6:.2f}µs，解码 {decode_time * 1e6:.2f}µs，"
+          f"{len(blob)} 字节（pickle {len(pickle.dumps(stats))} 字节）")
+
+
+def run_showcase(size: int = 10_000_000) -> None:
+    """依次运行所有专题对比"""
+    benchmark_buffer_fast_path(size)
+    benchmark_decorator_overhead()
+    benchmark_parallel_crossover()
+    benchmark_mmap_memory()
+    benchmark_text_streaming()
+    benchmark_summation()
+    benchmark_incremental_stats()
+    benchmark_nan_policy()
+    benchmark_group_stats()
+    benchmark_state_codec()
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    # 兼容旧的用法: python benchmarks.py [size]
+    if not arguments or arguments[0].isdigit():
+        arguments = ['showcase'] + arguments
+    sys.exit(main(arguments))
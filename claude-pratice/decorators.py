@@ -1,10 +1,140 @@
 """
 装饰器工具模块
 提供常用的函数装饰器
+
+验证装饰器会根据被装饰函数的签名"编译"出一个专用的包装函数：
+参数列表与原函数完全相同（不经过 *args/**kwargs 打包），
+空值检查只用 is None 和 len()，因此每次调用的额外开销很小。
+
+全局开关:
+    设置环境变量 PY_UTILS_VALIDATION=0，或在导入工具模块之前调用
+    set_validation_enabled(False)，装饰器会直接返回原函数（零开销），
+    此时由调用方自行保证输入不为空。
+    已经装饰好的函数始终可以通过 func.__wrapped__ 拿到原函数。
+
+结果缓存:
+    memoize() 是按需启用的 LRU/TTL 缓存装饰器，可以和验证装饰器叠加使用。
+
+调用统计:
+    instrument() 记录调用次数、输入规模和耗时直方图，包的 __init__ 给所有导出函数都加上了它。
+    默认关闭，用 PY_UTILS_INSTRUMENTATION=1 或 set_instrumentation_enabled(True) 打开。
+"""
+
+import inspect
+import math
+import os
+import sys
+import textwrap
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from functools import update_wrapper
+from typing import Callable, Any, NamedTuple, Optional
+
+
+# 验证开关：在函数被装饰（即模块被导入）时读取
+VALIDATION_ENABLED = os.environ.get('PY_UTILS_VALIDATION', '1') != '0'
+
+
+def set_validation_enabled(enabled: bool) -> None:
+    """
+    打开或关闭输入验证
+
+    只影响之后才被装饰的函数，所以需要在导入 math_utils / string_utils 之前调用。
+
+    参数:
+        enabled: False 表示之后装饰的函数直接使用原函数
+    """
+    global VALIDATION_ENABLED
+    VALIDATION_ENABLED = enabled
+
+
+# 集合类输入：None 或长度为 0 视为空。
+# 用 len() 而不是 == []：对 NumPy 数组做 == 比较会逐元素比较，结果含义不明确且代价很高；
+# 生成器等没有长度的输入直接放行（try 块在没有异常时几乎没有开销）
+_EMPTY_COLLECTION_CHECK = """\
+    if {arg} is None:
+        return _vd_return_value
+    try:
+        if len({arg}) == 0:
+            return _vd_return_value
+    except TypeError:
+        pass
+"""
+
+# 字符串输入：None 和 "" 的真值都为 False，一次判断即可
+_EMPTY_STRING_CHECK = """\
+    if not {arg}:
+        return _vd_return_value
 """
 
-from functools import wraps
-from typing import Callable, Any
+_SIMPLE_KINDS = (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+
+
+def _exact_signature(func: Callable, namespace: dict):
+    """
+    生成与 func 签名完全相同的参数列表源码
+
+    默认值放进 namespace（名为 _vd_default_<i>），生成的代码按名字引用它们。
+
+    返回:
+        (参数列表, 调用原函数时的实参列表, 第一个参数名)；
+        签名里有 *args / **kwargs / 仅限位置参数等复杂情况时返回 None
+    """
+    params = list(inspect.signature(func).parameters.values())
+    if not (params and params[0].kind is inspect.Parameter.POSITIONAL_OR_KEYWORD
+            and all(p.kind in _SIMPLE_KINDS for p in params)):
+        return None
+    signature = []
+    call = []
+    for i, p in enumerate(params):
+        if p.kind is inspect.Parameter.KEYWORD_ONLY and '*' not in signature:
+            signature.append('*')
+        if p.default is p.empty:
+            signature.append(p.name)
+        else:
+            namespace[f'_vd_default_{i}'] = p.default
+            signature.append(f'{p.name}=_vd_default_{i}')
+        call.append(p.name if p.kind is inspect.Parameter.POSITIONAL_OR_KEYWORD
+                    else f'{p.name}={p.name}')
+    return ', '.join(signature), ', '.join(call), params[0].name
+
+
+def _compile_wrapper(source: str, namespace: dict, func: Callable) -> Callable:
+    exec(source, namespace)
+    return update_wrapper(namespace['wrapper'], func)
+
+
+def _build_validator(func: Callable, return_value: Any, check_template: str) -> Callable:
+    """
+    根据 func 的签名生成带空值检查的专用包装函数
+
+    例如 median(numbers, inplace=False) 会生成:
+
+        def wrapper(numbers, inplace=_vd_default_1):
+            if numbers is None:
+                return _vd_return_value
+            ...
+            return _vd_func(numbers, inplace)
+
+    如果签名里有 *args / **kwargs / 仅限位置参数等复杂情况，
+    退回通用的 *args/**kwargs 包装函数。
+    """
+    namespace = {'_vd_func': func, '_vd_return_value': return_value}
+    exact = _exact_signature(func, namespace)
+    if exact is not None:
+        signature, call, first = exact
+        source = (f"def wrapper({signature}):\n"
+                  + check_template.format(arg=first)
+                  + f"    return _vd_func({call})\n")
+    else:
+        source = ("def wrapper(*args, **kwargs):\n"
+                  "    if args:\n"
+                  "        _vd_data = args[0]\n"
+                  + textwrap.indent(check_template.format(arg='_vd_data'), '    ')
+                  + "    return _vd_func(*args, **kwargs)\n")
+    return _compile_wrapper(source, namespace, func)
 
 
 def validate_non_empty(return_value: Any = 0):
@@ -23,17 +153,9 @@ def validate_non_empty(return_value: Any = 0):
             return sum(numbers)
     """
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # 获取第一个参数（通常是输入数据）
-            if args:
-                input_data = args[0]
-                # 检查是否为 None 或空
-                if input_data is None or input_data == []:
-                    return return_value
-            # 调用原函数
-            return func(*args, **kwargs)
-        return wrapper
+        if not VALIDATION_ENABLED:
+            return func
+        return _build_validator(func, return_value, _EMPTY_COLLECTION_CHECK)
     return decorator
 
 
@@ -48,12 +170,510 @@ def validate_string_not_empty(return_value: Any = ""):
         装饰器函数
     """
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def wrapper(text: str, *args, **kwargs):
-            # 检查是否为 None 或空字符串
-            if text is None or text == "":
-                return return_value
-            # 调用原函数
-            return func(text, *args, **kwargs)
-        return wrapper
+        if not VALIDATION_ENABLED:
+            return func
+        return _build_validator(func, return_value, _EMPTY_STRING_CHECK)
     return decorator
+
+
+# ---------------------------------------------------------------------------
+# 结果缓存（按需启用）
+#
+# math_utils / string_utils 里的函数都是纯函数：相同输入总是得到相同结果。
+# 报表里反复出现同一组数字、同一个模板字符串时，可以用 memoize() 把结果缓存起来。
+# 缓存键:
+# - 按值可哈希的参数（数字、字符串、bytes、元组……）连同类型一起作为键：
+#   1、1.0、True 彼此相等，结果的类型却可能不同；0.0 和 -0.0 也按符号分开。
+#   typed=False 时和 functools.lru_cache 的默认行为一样，直接用参数本身
+# - 列表、字典等不可哈希的参数用内容指纹（pickle 后取 128 位 BLAKE2b 摘要）
+# - array.array、NumPy 数组等缓冲区直接对原始字节取摘要，不复制
+# - 生成器、文件对象等内容会变化的参数无法判断是否相同，这次调用不走缓存
+# ---------------------------------------------------------------------------
+
+class CacheInfo(NamedTuple):
+    """缓存统计"""
+    hits: int
+    misses: int
+    evictions: int       # 因为条目数或字节数超限被淘汰的条目数
+    expirations: int     # 因为超过 ttl 被丢弃的条目数
+    currsize: int
+    nbytes: int
+    maxsize: Optional[int]
+    max_bytes: Optional[int]
+
+
+class _Uncacheable(Exception):
+    """参数无法生成可靠的缓存键"""
+
+
+# 内容指纹的标记，保证指纹不会和某个真实的元组参数相等
+_FINGERPRINT = object()
+
+
+def _typed_key(arg: Any):
+    """可哈希参数的带类型键，元组逐个元素处理"""
+    cls = type(arg)
+    if cls is float and arg == 0:
+        return (cls, arg, math.copysign(1.0, arg))
+    if cls is tuple:
+        return (cls, tuple(map(_typed_key, arg)))
+    return (cls, arg)
+
+
+def _fingerprint(arg: Any, typed: bool = True):
+    """为单个参数生成缓存键的一部分"""
+    if type(arg).__hash__ is object.__hash__:
+        # 按身份哈希：None、函数等可以直接作为键；
+        # 迭代器和文件对象的内容会变化，无法缓存
+        if hasattr(arg, '__next__') or hasattr(arg, 'read'):
+            raise _Uncacheable
+        return arg
+    if type(arg).__hash__ is not None:
+        try:
+            hash(arg)
+            return _typed_key(arg) if typed else arg
+        except TypeError:
+            # 例如包含列表的元组，继续尝试内容指纹
+            pass
+
+    # hashlib/pickle 只有内容指纹才用得到，推迟导入以减少包的导入时间
+    import hashlib
+    import pickle
+
+    digest = hashlib.blake2b(digest_size=16)
+    if not isinstance(arg, (list, dict, set)):
+        try:
+            view = memoryview(arg)
+        except TypeError:
+            view = None
+        if view is not None:
+            with view:
+                digest.update(f'{view.format}{view.shape}'.encode())
+                digest.update(view if view.c_contiguous else view.tobytes())
+            return (_FINGERPRINT, type(arg).__name__, digest.digest())
+    try:
+        digest.update(pickle.dumps(arg, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        raise _Uncacheable from None
+    return (_FINGERPRINT, type(arg).__name__, digest.digest())
+
+
+def _approx_size(value: Any) -> int:
+    """估计缓存一个结果占用的字节数（对象本身 + 容器里的直接元素）"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(sys.getsizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return size
+
+
+def memoize(maxsize: Optional[int] = 128, ttl: Optional[float] = None,
+            max_bytes: Optional[int] = None, typed: bool = True):
+    """
+    缓存函数结果的装饰器（LRU + TTL + 字节数上限）
+
+    只能用于纯函数：命中缓存时不会调用原函数，
+    例如 median(data, inplace=True) 对输入列表的重排就不会发生。
+    返回的可变结果（列表等）在多次调用之间是同一个对象，调用方不要修改它。
+
+    可以和验证装饰器任意叠加：写在验证装饰器外层时，空输入的默认返回值也会被缓存；
+    写在内层时，空输入直接由验证装饰器返回，不占用缓存。
+
+    参数:
+        maxsize: 最多缓存的条目数，None 表示不限制
+        ttl: 条目的有效期（秒），None 表示永不过期
+        max_bytes: 缓存结果的估计总字节数上限，None 表示不限制
+        typed: 为 True 时参数的类型也是键的一部分，f(1) 和 f(1.0)、f(0.0) 和 f(-0.0)
+               分别缓存；为 False 时相等的参数共用一个条目（同 functools.lru_cache）
+
+    返回:
+        装饰器函数。被装饰的函数带有 cache_info() 和 cache_clear() 方法
+
+    示例:
+        @memoize(maxsize=256, ttl=60)
+        @validate_non_empty(return_value=0)
+        def median(numbers):
+            ...
+    """
+    def decorator(func: Callable) -> Callable:
+        # 键 -> (结果, 过期时间, 估计字节数)，按最近使用顺序排列
+        entries = OrderedDict()
+        lock = threading.Lock()
+        stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'nbytes': 0}
+
+        def make_key(args, kwargs):
+            key = tuple(_fingerprint(arg, typed) for arg in args)
+            if kwargs:
+                key += (_FINGERPRINT,) + tuple(
+                    (name, _fingerprint(value, typed)) for name, value in sorted(kwargs.items()))
+            return key
+
+        def evict_oldest():
+            _, (_, _, size) = entries.popitem(last=False)
+            stats['nbytes'] -= size
+            stats['evictions'] += 1
+
+        def wrapper(*args, **kwargs):
+            try:
+                key = make_key(args, kwargs)
+            except _Uncacheable:
+                return func(*args, **kwargs)
+
+            with lock:
+                entry = entries.get(key)
+                if entry is not None:
+                    if entry[1] is None or entry[1] > time.monotonic():
+                        entries.move_to_end(key)
+                        stats['hits'] += 1
+                        return entry[0]
+                    del entries[key]
+                    stats['nbytes'] -= entry[2]
+                    stats['expirations'] += 1
+                stats['misses'] += 1
+
+            result = func(*args, **kwargs)
+            size = _approx_size(result) if max_bytes is not None else 0
+            if max_bytes is not None and size > max_bytes:
+                return result
+            expires = None if ttl is None else time.monotonic() + ttl
+
+            with lock:
+                old = entries.pop(key, None)
+                if old is not None:
+                    stats['nbytes'] -= old[2]
+                entries[key] = (result, expires, size)
+                stats['nbytes'] += size
+                while maxsize is not None and len(entries) > maxsize:
+                    evict_oldest()
+                while max_bytes is not None and stats['nbytes'] > max_bytes:
+                    evict_oldest()
+            return result
+
+        def cache_info() -> CacheInfo:
+            with lock:
+                return CacheInfo(stats['hits'], stats['misses'], stats['evictions'],
+                                 stats['expirations'], len(entries), stats['nbytes'],
+                                 maxsize, max_bytes)
+
+        def cache_clear() -> None:
+            with lock:
+                entries.clear()
+                for name in stats:
+                    stats[name] = 0
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return update_wrapper(wrapper, func)
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# 调用统计（性能剖析）
+#
+# instrument() 为函数记录调用次数、输入规模（第一个参数的 len()）和耗时直方图。
+# 包的 __init__ 会给所有导出的函数套上这个装饰器，默认关闭：
+# 关闭时包装函数只多做一次属性判断就直接调用原函数。
+# 用环境变量 PY_UTILS_INSTRUMENTATION=1 或 set_instrumentation_enabled(True) 打开，
+# 之后用 METRICS.snapshot() / METRICS.prometheus() 导出统计结果。
+# ---------------------------------------------------------------------------
+
+# 耗时直方图的分桶参数：每个 2 的幂区间等分成 2^_SUB_BITS 个子桶，
+# 指数上限 _MAX_EXPONENT 决定桶数（超过约 1.1e12 ns 即 18 分钟的值计入最后一个桶）
+_SUB_BITS = 3
+_SUB_BUCKETS = 1 << _SUB_BITS
+_MAX_EXPONENT = 40
+_HISTOGRAM_SIZE = _SUB_BUCKETS * (_MAX_EXPONENT + 2)
+
+
+def _bucket_index(value: int) -> int:
+    """值所在桶的下标：小于 2^(_SUB_BITS+1) 的值每个值一个桶，之后对数-线性分桶"""
+    if value < 2 * _SUB_BUCKETS:
+        return value if value > 0 else 0
+    shift = value.bit_length() - _SUB_BITS - 1
+    index = ((shift + 1) << _SUB_BITS) + (value >> shift) - _SUB_BUCKETS
+    return index if index < _HISTOGRAM_SIZE else _HISTOGRAM_SIZE - 1
+
+
+def _bucket_upper(index: int) -> int:
+    """桶的上界（不含）"""
+    if index < 2 * _SUB_BUCKETS:
+        return index + 1
+    shift = (index >> _SUB_BITS) - 1
+    return ((index & (_SUB_BUCKETS - 1)) + _SUB_BUCKETS + 1) << shift
+
+
+class LatencyHistogram:
+    """
+    固定内存的耗时直方图（HDR 风格的对数-线性分桶）
+
+    以纳秒为单位，相对误差不超过 1/2^_SUB_BITS（12.5%），
+    桶数固定为 _HISTOGRAM_SIZE，与记录次数无关。
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'maximum')
+
+    def __init__(self):
+        self.counts = array('Q', bytes(8 * _HISTOGRAM_SIZE))
+        self.count = 0
+        self.total = 0
+        self.maximum = 0
+
+    def record(self, value: int) -> None:
+        self.counts[_bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    def count_below(self, bound: int) -> int:
+        """严格小于 bound 的值的个数（bound 为 2 的幂时是精确的）"""
+        return sum(self.counts[:_bucket_index(bound)])
+
+    def quantile(self, q: float) -> int:
+        """估计 q 分位数：返回所在桶的上界（不超过记录到的最大值）"""
+        if self.count == 0:
+            return 0
+        target = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(_bucket_upper(index), self.maximum)
+        return self.maximum
+
+
+class FunctionMetrics:
+    """单个函数的调用统计"""
+
+    __slots__ = ('name', 'calls', 'errors', 'items_total', 'items_max', 'latency', '_lock')
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """清零统计（原地修改：instrument() 生成的包装函数一直持有这个对象）"""
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+            self.items_total = 0
+            self.items_max = 0
+            self.latency = LatencyHistogram()
+
+    def record(self, elapsed_ns: int, data: Any, failed: bool = False) -> None:
+        try:
+            items = len(data)
+        except TypeError:
+            items = 0
+        index = _bucket_index(elapsed_ns)
+        with self._lock:
+            self.calls += 1
+            if failed:
+                self.errors += 1
+            self.items_total += items
+            if items > self.items_max:
+                self.items_max = items
+            # 直接更新直方图而不调用 latency.record()，减少开启统计时的开销
+            latency = self.latency
+            latency.counts[index] += 1
+            latency.count += 1
+            latency.total += elapsed_ns
+            if elapsed_ns > latency.maximum:
+                latency.maximum = elapsed_ns
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latency = self.latency
+            return {
+                'calls': self.calls,
+                'errors': self.errors,
+                'input_items_total': self.items_total,
+                'input_items_max': self.items_max,
+                'latency_seconds_total': latency.total / 1e9,
+                'latency_seconds': {
+                    'p50': latency.quantile(0.5) / 1e9,
+                    'p90': latency.quantile(0.9) / 1e9,
+                    'p99': latency.quantile(0.99) / 1e9,
+                    'max': latency.maximum / 1e9,
+                },
+                'latency_buckets': {
+                    _bucket_upper(i): c for i, c in enumerate(latency.counts) if c
+                },
+            }
+
+
+# Prometheus 直方图导出的桶边界：1.024µs 到约 17s，每档 ×4。
+# 都是 2 的幂纳秒，与细粒度分桶的边界对齐，所以累计计数是精确的
+_PROMETHEUS_BOUNDS_NS = [1 << e for e in range(10, 36, 2)]
+
+
+class MetricsRegistry:
+    """
+    调用统计的注册表
+
+    属性:
+        enabled: 是否正在记录（可以在运行时随时切换）
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._functions = {}
+        self._lock = threading.Lock()
+
+    def metrics(self, name: str) -> FunctionMetrics:
+        """取得（必要时创建）某个函数的统计对象"""
+        with self._lock:
+            if name not in self._functions:
+                self._functions[name] = FunctionMetrics(name)
+            return self._functions[name]
+
+    def reset(self) -> None:
+        """清空所有统计（已注册的函数保留）"""
+        with self._lock:
+            for metrics in self._functions.values():
+                metrics.reset()
+
+    def snapshot(self, include_idle: bool = False) -> dict:
+        """
+        导出统计快照
+
+        参数:
+            include_idle: 是否包含从未被调用的函数
+
+        返回:
+            {函数名: {calls, errors, input_items_total, input_items_max,
+                      latency_seconds_total, latency_seconds, latency_buckets}}
+        """
+        with self._lock:
+            functions = list(self._functions.items())
+        return {name: metrics.snapshot() for name, metrics in functions
+                if include_idle or metrics.calls}
+
+    def prometheus(self, prefix: str = 'py_utils') -> str:
+        """
+        以 Prometheus 文本格式导出统计
+
+        返回:
+            可以直接作为 /metrics 响应体的字符串
+        """
+        with self._lock:
+            functions = [m for m in self._functions.values() if m.calls]
+        lines = [
+            f'# HELP {prefix}_calls_total Number of calls.',
+            f'# TYPE {prefix}_calls_total counter',
+        ]
+        lines += [f'{prefix}_calls_total{{function="{m.name}"}} {m.calls}' for m in functions]
+        lines += [
+            f'# HELP {prefix}_errors_total Number of calls that raised an exception.',
+            f'# TYPE {prefix}_errors_total counter',
+        ]
+        lines += [f'{prefix}_errors_total{{function="{m.name}"}} {m.errors}' for m in functions]
+        lines += [
+            f'# HELP {prefix}_input_items_total Sum of len() of the first argument.',
+            f'# TYPE {prefix}_input_items_total counter',
+        ]
+        lines += [f'{prefix}_input_items_total{{function="{m.name}"}} {m.items_total}'
+                  for m in functions]
+        lines += [
+            f'# HELP {prefix}_latency_seconds Call latency.',
+            f'# TYPE {prefix}_latency_seconds histogram',
+        ]
+        for m in functions:
+            with m._lock:
+                latency = m.latency
+                label = f'function="{m.name}"'
+                for bound in _PROMETHEUS_BOUNDS_NS:
+                    lines.append(f'{prefix}_latency_seconds_bucket{{{label},le="{bound / 1e9:.9g}"}} '
+                                 f'{latency.count_below(bound)}')
+                lines.append(f'{prefix}_latency_seconds_bucket{{{label},le="+Inf"}} {latency.count}')
+                lines.append(f'{prefix}_latency_seconds_sum{{{label}}} {latency.total / 1e9:.9g}')
+                lines.append(f'{prefix}_latency_seconds_count{{{label}}} {latency.count}')
+        return '\n'.join(lines) + '\n'
+
+
+# 全局注册表：在任何时候都可以切换开关
+METRICS = MetricsRegistry(os.environ.get('PY_UTILS_INSTRUMENTATION', '0') == '1')
+
+
+def set_instrumentation_enabled(enabled: bool) -> None:
+    """
+    打开或关闭调用统计（立即生效，对已经装饰好的函数同样有效）
+
+    参数:
+        enabled: True 开始记录，False 停止记录（已有的统计保留）
+    """
+    METRICS.enabled = enabled
+
+
+_INSTRUMENT_BODY = """\
+    if not _in_registry.enabled:
+        return _vd_func({call})
+    _in_start = _in_clock()
+    try:
+        _in_result = _vd_func({call})
+    except BaseException:
+        _in_metrics.record(_in_clock() - _in_start, {arg}, True)
+        raise
+    _in_metrics.record(_in_clock() - _in_start, {arg})
+    return _in_result
+"""
+
+
+def instrument(name: Optional[str] = None, registry: Optional[MetricsRegistry] = None):
+    """
+    记录调用统计的装饰器
+
+    与验证装饰器一样按原函数的签名生成包装函数；统计关闭时只多一次属性判断。
+    输入规模取第一个参数的 len()（没有长度时记为 0）。
+
+    参数:
+        name: 统计中使用的名字，默认为函数名
+        registry: 注册表，默认为全局的 METRICS
+
+    返回:
+        装饰器函数
+
+    示例:
+        @instrument()
+        def median(numbers):
+            ...
+    """
+    def decorator(func: Callable) -> Callable:
+        target = registry if registry is not None else METRICS
+        namespace = {
+            '_vd_func': func,
+            '_in_registry': target,
+            '_in_metrics': target.metrics(name or func.__name__),
+            '_in_clock': time.perf_counter_ns,
+        }
+        exact = _exact_signature(func, namespace)
+        if exact is not None:
+            signature, call, first = exact
+        else:
+            signature, call, first = '*args, **kwargs', '*args, **kwargs', 'args[0] if args else None'
+        source = f"def wrapper({signature}):\n" + _INSTRUMENT_BODY.format(call=call, arg=first)
+        return _compile_wrapper(source, namespace, func)
+    return decorator
+
+
+def instrument_exports(namespace: dict, names, registry: Optional[MetricsRegistry] = None) -> None:
+    """
+    给命名空间中的导出函数批量套上 instrument()
+
+    类、常量、生成器函数和协程函数（耗时只包括创建生成器/协程对象）
+    以及本模块中的装饰器会被跳过。
+
+    参数:
+        namespace: 模块的 globals()
+        names: 要处理的名字，通常是 __all__
+        registry: 注册表，默认为全局的 METRICS
+    """
+    for name in names:
+        obj = namespace.get(name)
+        if (not inspect.isfunction(obj) or obj.__module__ == __name__
+                or inspect.isgeneratorfunction(inspect.unwrap(obj))
+                or inspect.iscoroutinefunction(inspect.unwrap(obj))):
+            continue
+        namespace[name] = instrument(name, registry)(obj)
@@ -0,0 +1,598 @@
+"""
+分组 / 加权聚合
+按键（服务、地区……）分组计算 average / variance / median 等统计量，可以按样本数加权
+
+以前的做法是先分桶成 {键: [数值...]} 的字典，再对每个桶调用 math_utils 的函数：
+几十万个组就有几十万个列表，每个数字都变成列表里的一个 Python 对象。这里:
+1. 键到组号的映射是一个字典，新键按首次出现的顺序编号；
+   组号用 dict.fromkeys + map(字典.__getitem__, 键) 得到，逐行的循环都在 C 中完成
+2. 每个组的状态（行数、权重和、加权和、加权平均值、偏差平方和、最小值、最大值）
+   按列存放在 array 里，不为每个组创建对象；
+   安装了 NumPy 时每批数据用 bincount 一次算出所有组的部分状态再合并，否则用一个紧凑循环
+3. 累加器可以 merge()：各分片/各时间段分别累加，合并结果与一次处理全部数据相同
+   （方差用 Chan / West 的加权合并公式）
+4. 分位数是精确的：只在需要时按行保存（组号、数值、权重）三个 array，
+   最后按（组号, 数值）排序（NumPy 为一次 lexsort，纯 Python 为计数排序 + 逐组排序），
+   用累计权重二分查找每个组的分位点，不需要同时为每个组保留一个列表
+
+权重按"频数"理解：权重为 k 的一行相当于把这个数值重复 k 次，
+所以全部权重为 1 时结果与 average() / variance() / quantile() 完全一致。
+
+示例:
+    stats = group_stats(services, latencies, aggs=['count', 'mean', 'p50', 'p99'])
+    for service, p99 in zip(stats.keys, stats.columns['p99']):
+        ...
+"""
+
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, count, repeat
+from math import inf, sqrt
+from typing import NamedTuple
+
+if __package__:
+    from .math_utils import _numpy
+else:  # 目录本身在 sys.path 上（直接运行脚本或测试）时按顶层模块导入
+    from math_utils import _numpy
+
+# 支持的聚合；另外 'p<百分位>'（例如 'p90'、'p99.9'）表示加权分位数
+GROUP_AGGS = ('count', 'weight', 'sum', 'mean', 'variance', 'sample_variance', 'std',
+              'min', 'max', 'median')
+
+DEFAULT_GROUP_AGGS = ('count', 'mean', 'variance', 'min', 'max')
+
+# 一批数据达到这么多行才交给 NumPy（更小的批次 bincount 的固定开销不划算）
+_NUMPY_MIN_ROWS = 4096
+
+_GROUP_MAGIC = b'GRPA'
+_GROUP_VERSION = 1
+# 魔数、版本、键的类型、标志位、组数、行数、聚合名的字节数
+_GROUP_HEADER = struct.Struct('<4sBBBxIQI')
+_KEYS_STR = 1          # 键全部是 str：每个键的字符数（uint32 数组）+ 拼接后的 UTF-8
+_KEYS_INT = 2          # 键全部是 int64：int64 数组
+_GROUP_HAS_ROWS = 0x01  # 标志位：带有按行保存的数据（分位数聚合）
+
+
+class GroupStats(NamedTuple):
+    """
+    group_stats() / GroupAccumulator.result() 的列式结果
+
+    字段:
+        keys: 组的键，按首次出现的顺序
+        columns: 聚合名 → 列；第 i 个元素对应 keys[i]。
+                 纯 Python 路径为 array.array，NumPy 路径为 ndarray（与 describe_ragged() 相同）
+    """
+    keys: list
+    columns: dict
+
+    def to_dict(self) -> dict:
+        """转换成 {键: {聚合名: 值}}，方便按键查询"""
+        names = list(self.columns)
+        rows = zip(*(self.columns[name].tolist() for name in names))
+        return {key: dict(zip(names, row)) for key, row in zip(self.keys, rows)}
+
+
+def _parse_aggs(aggs) -> list:
+    """校验聚合列表，返回 [(聚合名, 分位点或 None)]"""
+    parsed = []
+    for name in aggs:
+        if name == 'median':
+            parsed.append((name, 0.5))
+        elif name in GROUP_AGGS:
+            parsed.append((name, None))
+        elif isinstance(name, str) and name.startswith('p'):
+            try:
+                q = float(name[1:]) / 100
+            except ValueError:
+                q = -1.0
+            if not 0 <= q <= 1:
+                raise ValueError(f"分位数聚合必须形如 'p50'、'p99.9'，实际为 {name!r}")
+            parsed.append((name, q))
+        else:
+            raise ValueError(f"不支持的聚合 {name!r}，可选 {GROUP_AGGS} 或 'p<百分位>'")
+    return parsed
+
+
+def _as_column(data):
+    """生成器等一次性可迭代对象先收集成列表"""
+    return data if hasattr(data, '__len__') else list(data)
+
+
+class GroupAccumulator:
+    """
+    可合并的分组统计累加器
+
+    参数:
+        aggs: 需要的聚合，见 GROUP_AGGS；'p<百分位>' 和 'median' 会让累加器按行保存数据
+
+    示例:
+        >>> acc = GroupAccumulator(['count', 'mean', 'median'])
+        >>> acc.update(['a', 'b', 'a'], [1, 10, 3]).update(['b'], [20])
+        >>> acc.result().to_dict()['b']
+        {'count': 2, 'mean': 15.0, 'median': 15.0}
+    """
+
+    __slots__ = ('aggs', '_parsed', '_index', '_keys', '_count', '_weight', '_total', '_mean',
+                 '_m2', '_min', '_max', '_row_group', '_row_value', '_row_weight')
+
+    def __init__(self, aggs=DEFAULT_GROUP_AGGS):
+        self._parsed = _parse_aggs(aggs)
+        self.aggs = [name for name, _ in self._parsed]
+        self._index = {}        # 键 → 组号
+        self._keys = []         # 组号 → 键
+        self._count = array('q')
+        self._weight = array('d')
+        self._total = array('d')
+        self._mean = array('d')
+        self._m2 = array('d')
+        self._min = array('d')
+        self._max = array('d')
+        if any(q is not None for _, q in self._parsed):
+            self._row_group = array('q')
+            self._row_value = array('d')
+            self._row_weight = array('d')
+        else:
+            self._row_group = self._row_value = self._row_weight = None
+
+    def __len__(self) -> int:
+        """组的个数"""
+        return len(self._keys)
+
+    def _register(self, keys) -> None:
+        """给新出现的键编号，并为新组追加初始状态"""
+        index = self._index
+        start = len(self._keys)
+        # dict.fromkeys 在 C 中去重并保留首次出现的顺序，Python 循环只经过不同的键
+        new_keys = [key for key in dict.fromkeys(keys) if key not in index]
+        if not new_keys:
+            return
+        index.update(zip(new_keys, count(start)))
+        self._keys.extend(new_keys)
+        grow = len(new_keys)
+        zeros = bytes(8 * grow)
+        for column in (self._count, self._weight, self._total, self._mean, self._m2):
+            column.frombytes(zeros)
+        self._min.extend(array('d', (inf,)) * grow)
+        self._max.extend(array('d', (-inf,)) * grow)
+
+    def update(self, keys, values, weights=None) -> 'GroupAccumulator':
+        """
+        加入一批数据
+
+        参数:
+            keys: 每行的键（任意可哈希对象）
+            values: 每行的数值
+            weights: 每行的权重（非负，例如样本数），None 表示全部为 1
+
+        返回:
+            self，方便链式调用
+        """
+        # ndarray / array.array 的键转成 Python 标量（np.int64 等不能序列化，哈希也更慢）
+        keys = keys.tolist() if hasattr(keys, 'tolist') else _as_column(keys)
+        values = _as_column(values)
+        if weights is not None:
+            weights = _as_column(weights)
+        if len(values) != len(keys) or (weights is not None and len(weights) != len(keys)):
+            raise ValueError("keys、values、weights 的长度必须相同")
+        if len(keys) == 0:
+            return self
+        self._register(keys)
+        groups = array('q', map(self._index.__getitem__, keys))
+
+        np = _numpy() if len(keys) >= _NUMPY_MIN_ROWS else None
+        if np is not None:
+            x = np.asarray(values, dtype=np.float64)
+            w = None if weights is None else np.asarray(weights, dtype=np.float64)
+            if w is not None and (w < 0).any():
+                raise ValueError("权重不能为负数")
+            self._update_numpy(np, groups, x, w)
+            if self._row_group is not None:
+                self._row_group.extend(groups)
+                self._row_value.frombytes(x.tobytes())
+                self._row_weight.frombytes(np.ones(x.size).tobytes() if w is None else w.tobytes())
+            return self
+
+        if weights is not None and min(weights) < 0:
+            raise ValueError("权重不能为负数")
+        self._update_python(groups, values, weights)
+        if self._row_group is not None:
+            self._row_group.extend(groups)
+            self._row_value.extend(values)
+            if weights is None:
+                self._row_weight.extend(array('d', (1.0,)) * len(values))
+            else:
+                self._row_weight.extend(weights)
+        return self
+
+    def _update_python(self, groups, values, weights) -> None:
+        """紧凑循环：加权 Welford（West 1979）逐行更新所在组的状态"""
+        counts, weight_sums, totals = self._count, self._weight, self._total
+        means, m2s, mins, maxs = self._mean, self._m2, self._min, self._max
+        for g, x, w in zip(groups, values, repeat(1.0) if weights is None else weights):
+            counts[g] += 1
+            if not w:
+                continue
+            total_weight = weight_sums[g] + w
+            weight_sums[g] = total_weight
+            totals[g] += w * x
+            delta = x - means[g]
+            mean = means[g] + delta * w / total_weight
+            means[g] = mean
+            m2s[g] += w * delta * (x - mean)
+            if x < mins[g]:
+                mins[g] = x
+            if x > maxs[g]:
+                maxs[g] = x
+
+    def _update_numpy(self, np, groups, x, w) -> None:
+        """bincount 一次算出这批数据中所有组的部分状态，再合并进累加器"""
+        g = np.frombuffer(groups, dtype=np.int64)
+        k = len(self._keys)
+        batch_count = np.bincount(g, minlength=k)
+        if w is None:
+            batch_weight = batch_count.astype(np.float64)
+            batch_total = np.bincount(g, weights=x, minlength=k)
+        else:
+            batch_weight = np.bincount(g, weights=w, minlength=k)
+            batch_total = np.bincount(g, weights=w * x, minlength=k)
+        batch_mean = np.divide(batch_total, batch_weight, out=np.zeros(k), where=batch_weight > 0)
+        # 两遍：先求组内平均值，再累加偏差平方，比一遍的 Σx² 公式稳定
+        deviation = batch_mean[g]
+        np.subtract(x, deviation, out=deviation)
+        deviation *= deviation
+        if w is not None:
+            deviation *= w
+        batch_m2 = np.bincount(g, weights=deviation, minlength=k)
+        del deviation
+        batch_min = np.full(k, inf)
+        batch_max = np.full(k, -inf)
+        # 权重为 0 的行不影响极值
+        np.minimum.at(batch_min, g, x if w is None else np.where(w > 0, x, inf))
+        np.maximum.at(batch_max, g, x if w is None else np.where(w > 0, x, -inf))
+
+        present = np.flatnonzero(batch_count)
+        self._absorb(np, present, batch_count[present], batch_weight[present], batch_total[present],
+                     batch_mean[present], batch_m2[present], batch_min[present], batch_max[present])
+
+    def _absorb(self, np, ids, counts, weights, totals, means, m2s, mins, maxs) -> None:
+        """把若干组（ids 互不相同）的部分状态合并进累加器（Chan 等人的加权合并公式）"""
+        state_count = np.frombuffer(self._count, dtype=np.int64)
+        state_weight = np.frombuffer(self._weight)
+        state_mean = np.frombuffer(self._mean)
+        state_m2 = np.frombuffer(self._m2)
+        old_weight = state_weight[ids]
+        new_weight = old_weight + weights
+        ratio = np.divide(weights, new_weight, out=np.zeros(ids.size), where=new_weight > 0)
+        delta = means - state_mean[ids]
+        state_mean[ids] += delta * ratio
+        state_m2[ids] += m2s + delta * delta * old_weight * ratio
+        state_weight[ids] = new_weight
+        state_count[ids] += counts
+        np.frombuffer(self._total)[ids] += totals
+        state_min = np.frombuffer(self._min)
+        state_max = np.frombuffer(self._max)
+        state_min[ids] = np.minimum(state_min[ids], mins)
+        state_max[ids] = np.maximum(state_max[ids], maxs)
+
+    def merge(self, other: 'GroupAccumulator') -> 'GroupAccumulator':
+        """
+        合并另一个累加器的结果（原地修改并返回 self）
+
+        参数:
+            other: 另一个 GroupAccumulator，例如另一个分片的部分结果；
+                   self 需要分位数时 other 也必须按行保存了数据
+
+        返回:
+            self，方便链式调用
+        """
+        if self._row_group is not None and other._row_group is None:
+            raise ValueError("需要分位数的累加器只能合并同样按行保存数据的累加器")
+        if not other._keys:
+            return self
+        self._register(other._keys)
+        remap = array('q', map(self._index.__getitem__, other._keys))
+
+        np = _numpy() if len(remap) >= _NUMPY_MIN_ROWS else None
+        if np is not None:
+            self._absorb(np, np.frombuffer(remap, dtype=np.int64),
+                         np.frombuffer(other._count, dtype=np.int64), np.frombuffer(other._weight),
+                         np.frombuffer(other._total), np.frombuffer(other._mean),
+                         np.frombuffer(other._m2), np.frombuffer(other._min), np.frombuffer(other._max))
+        else:
+            counts, weight_sums, totals = self._count, self._weight, self._total
+            means, m2s, mins, maxs = self._mean, self._m2, self._min, self._max
+            for j, g in enumerate(remap):
+                counts[g] += other._count[j]
+                totals[g] += other._total[j]
+                weight = other._weight[j]
+                old_weight = weight_sums[g]
+                new_weight = old_weight + weight
+                if weight:
+                    delta = other._mean[j] - means[g]
+                    means[g] += delta * weight / new_weight
+                    m2s[g] += other._m2[j] + delta * delta * old_weight * weight / new_weight
+                    weight_sums[g] = new_weight
+                if other._min[j] < mins[g]:
+                    mins[g] = other._min[j]
+                if other._max[j] > maxs[g]:
+                    maxs[g] = other._max[j]
+
+        if self._row_group is not None:
+            self._row_group.extend(array('q', map(remap.__getitem__, other._row_group)))
+            self._row_value.extend(other._row_value)
+            self._row_weight.extend(other._row_weight)
+        return self
+
+    def result(self) -> GroupStats:
+        """
+        计算各组的聚合结果
+
+        权重和为 0 的组（只有权重为 0 的行）除 count 外都是 0，与空输入的约定一致。
+
+        返回:
+            GroupStats，列的顺序与 aggs 相同
+        """
+        np = _numpy()
+        if np is not None:
+            columns = self._columns_numpy(np)
+        else:
+            columns = self._columns_python()
+        return GroupStats(list(self._keys), {name: columns[name] for name, _ in self._parsed})
+
+    def _columns_numpy(self, np) -> dict:
+        weight = np.array(self._weight)
+        has_weight = weight > 0
+        # 单行组的偏差平方和可能因为舍入略小于 0
+        m2 = np.maximum(self._m2, 0.0)
+        variance = np.divide(m2, weight, out=np.zeros(weight.size), where=has_weight)
+        columns = {
+            'count': np.array(self._count, dtype=np.int64),
+            'weight': weight,
+            'sum': np.array(self._total),
+            'mean': np.array(self._mean),
+            'variance': variance,
+            'sample_variance': np.divide(m2, weight - 1, out=np.zeros(weight.size),
+                                         where=weight > 1),
+            'std': np.sqrt(variance),
+            'min': np.where(has_weight, self._min, 0.0),
+            'max': np.where(has_weight, self._max, 0.0),
+        }
+        qs = [q for _, q in self._parsed if q is not None]
+        if qs:
+            values = self._quantiles_numpy(np, qs)
+            for name, q in self._parsed:
+                if q is not None:
+                    columns[name] = values[q]
+        return columns
+
+    def _quantiles_numpy(self, np, qs) -> dict:
+        """所有行按（组号, 数值）排序一次，在全局累计权重上二分查找每个组的分位点"""
+        k = len(self._keys)
+        groups = np.frombuffer(self._row_group, dtype=np.int64)
+        values = np.frombuffer(self._row_value)
+        order = np.lexsort((values, groups))
+        ordered = values[order]
+        cumulative = np.concatenate(([0.0], np.cumsum(np.frombuffer(self._row_weight)[order])))
+        bounds = np.zeros(k + 1, dtype=np.int64)
+        np.cumsum(self._count, out=bounds[1:])
+        base = cumulative[bounds[:-1]]
+        group_weight = cumulative[bounds[1:]] - base
+        last = np.maximum(bounds[1:] - 1, 0)
+        empty = group_weight <= 0
+        result = {}
+        for q in qs:
+            position = np.maximum(group_weight - 1, 0) * q
+            lo = np.floor(position)
+            frac = position - lo
+            # cumulative[i + 1] 是排序后前 i+1 行的权重和；第一个超过 base + lo 的就是所求的行
+            low = np.minimum(np.searchsorted(cumulative, base + lo, side='right') - 1, last)
+            high = np.minimum(np.searchsorted(cumulative, base + lo + 1, side='right') - 1, last)
+            low_value = ordered[np.where(empty, 0, low)] if ordered.size else np.zeros(k)
+            high_value = ordered[np.where(empty, 0, high)] if ordered.size else np.zeros(k)
+            column = low_value + (high_value - low_value) * frac
+            column[empty] = 0.0
+            result[q] = column
+        return result
+
+    def _columns_python(self) -> dict:
+        k = len(self._keys)
+        weight = array('d', self._weight)
+        variance = array('d', bytes(8 * k))
+        sample_variance = array('d', bytes(8 * k))
+        minimum = array('d', bytes(8 * k))
+        maximum = array('d', bytes(8 * k))
+        for g in range(k):
+            w = weight[g]
+            # 单行组的偏差平方和可能因为舍入略小于 0
+            m2 = max(self._m2[g], 0.0)
+            if w > 0:
+                variance[g] = m2 / w
+                minimum[g] = self._min[g]
+                maximum[g] = self._max[g]
+            if w > 1:
+                sample_variance[g] = m2 / (w - 1)
+        columns = {
+            'count': array('q', self._count),
+            'weight': weight,
+            'sum': array('d', self._total),
+            'mean': array('d', self._mean),
+            'variance': variance,
+            'sample_variance': sample_variance,
+            'std': array('d', map(sqrt, variance)),
+            'min': minimum,
+            'max': maximum,
+        }
+        qs = [q for _, q in self._parsed if q is not None]
+        if qs:
+            values = self._quantiles_python(qs)
+            for name, q in self._parsed:
+                if q is not None:
+                    columns[name] = values[q]
+        return columns
+
+    def _quantiles_python(self, qs) -> dict:
+        """
+        计数排序把各行按组号归位（一个 array('q')，不创建整数对象的列表），
+        再逐组排序、累计权重、二分查找；同一时刻只有一个组的临时列表
+        """
+        k = len(self._keys)
+        groups, values, weights = self._row_group, self._row_value, self._row_weight
+        bounds = array('q', accumulate(self._count, initial=0))
+        cursor = bounds[:-1]
+        order = array('q', bytes(8 * len(groups)))
+        for row, g in enumerate(groups):
+            order[cursor[g]] = row
+            cursor[g] += 1
+        result = {q: array('d', bytes(8 * k)) for q in qs}
+        for g in range(k):
+            rows = sorted(order[bounds[g]:bounds[g + 1]], key=values.__getitem__)
+            cumulative = list(accumulate(map(weights.__getitem__, rows), initial=0.0))
+            group_weight = cumulative[-1]
+            if group_weight <= 0:
+                continue
+            last = len(rows) - 1
+            for q in qs:
+                position = max(group_weight - 1, 0) * q
+                lo = int(position)
+                frac = position - lo
+                # cumulative[i + 1] 是前 i+1 行的权重和；第一个超过 lo 的就是所求的行
+                value = values[rows[min(bisect_right(cumulative, lo) - 1, last)]]
+                if frac:
+                    high = values[rows[min(bisect_right(cumulative, lo + 1) - 1, last)]]
+                    value += (high - value) * frac
+                result[q][g] = value
+        return result
+
+    def _state_columns(self) -> list:
+        columns = [self._count, self._weight, self._total, self._mean, self._m2, self._min, self._max]
+        if self._row_group is not None:
+            columns += [self._row_group, self._row_value, self._row_weight]
+        return columns
+
+    def serialize(self) -> bytes:
+        """
+        序列化成紧凑的 bytes，用于在进程之间传递部分结果
+
+        格式（小端）：24 字节头 + 聚合名（UTF-8）+ 键 + 每组 7 列状态（int64 / float64 数组），
+        有分位数聚合时再加上按行保存的三列。大小是 O(组数)，有分位数聚合时是 O(行数)；
+        只需要有界大小的分位数时，每组改用 KLLSketch。
+
+        异常:
+            TypeError: 键不全是 str，也不全是 int64 范围内的 int
+        """
+        keys = self._keys
+        if all(type(key) is str for key in keys):
+            kind = _KEYS_STR
+            encoded = list(map(str.encode, keys))
+            key_parts = [array('I', map(len, encoded)), b''.join(encoded)]
+        elif all(type(key) is int and -(1 << 63) <= key < (1 << 63) for key in keys):
+            kind = _KEYS_INT
+            key_parts = [array('q', keys)]
+        else:
+            raise TypeError("只能序列化全部为 str 或全部为 int（int64 范围内）的键")
+        aggs = '\n'.join(self.aggs).encode('utf-8')
+        rows = 0 if self._row_group is None else len(self._row_group)
+        header = _GROUP_HEADER.pack(_GROUP_MAGIC, _GROUP_VERSION, kind,
+                                    0 if self._row_group is None else _GROUP_HAS_ROWS,
+                                    len(keys), rows, len(aggs))
+        parts = key_parts + self._state_columns()
+        if sys.byteorder == 'big':
+            parts = [part if isinstance(part, bytes) else array(part.typecode, part) for part in parts]
+            for part in parts:
+                if isinstance(part, array):
+                    part.byteswap()
+        # bytes.join 直接读取各个 array 的缓冲区，只复制一次
+        return b''.join([header, aggs] + parts)
+
+    @classmethod
+    def deserialize(cls, data) -> 'GroupAccumulator':
+        """
+        从 serialize() 的结果恢复累加器
+
+        参数:
+            data: bytes、bytearray 或 memoryview；在 memoryview 上按偏移量解析，
+                  每列只复制一次到累加器自己的 array 中（之后还要继续 update()/merge()）
+
+        返回:
+            GroupAccumulator
+        """
+        view = memoryview(data).cast('B')
+        if len(view) < _GROUP_HEADER.size:
+            raise ValueError("数据太短，不是分组累加器")
+        magic, version, kind, flags, k, rows, aggs_size = _GROUP_HEADER.unpack_from(view)
+        if magic != _GROUP_MAGIC:
+            raise ValueError("魔数不匹配，不是分组累加器")
+        if version != _GROUP_VERSION:
+            raise ValueError(f"不支持的版本 {version}")
+        offset = _GROUP_HEADER.size
+
+        def take(typecode: str, n: int) -> array:
+            nonlocal offset
+            column = array(typecode)
+            end = offset + column.itemsize * n
+            if end > len(view):
+                raise ValueError("数据长度与头部不一致")
+            column.frombytes(view[offset:end])
+            if sys.byteorder == 'big':
+                column.byteswap()
+            offset = end
+            return column
+
+        aggs = str(view[offset:offset + aggs_size], 'utf-8')
+        offset += aggs_size
+        acc = cls(aggs.split('\n') if aggs else [])
+        if (acc._row_group is not None) != bool(flags & _GROUP_HAS_ROWS):
+            raise ValueError("标志位与聚合不一致")
+        if kind == _KEYS_STR:
+            lengths = take('I', k)
+            size = sum(lengths)
+            if offset + size > len(view):
+                raise ValueError("数据长度与头部不一致")
+            blob = view[offset:offset + size].tobytes()
+            offset += size
+            bounds = list(accumulate(lengths, initial=0))
+            keys = list(map(bytes.decode, map(blob.__getitem__, map(slice, bounds, bounds[1:]))))
+        elif kind == _KEYS_INT:
+            keys = take('q', k).tolist()
+        else:
+            raise ValueError(f"未知的键类型 {kind}")
+        acc._keys = keys
+        acc._index = dict(zip(keys, count()))
+        acc._count = take('q', k)
+        acc._weight, acc._total, acc._mean, acc._m2, acc._min, acc._max = (
+            take('d', k) for _ in range(6))
+        if flags & _GROUP_HAS_ROWS:
+            acc._row_group = take('q', rows)
+            acc._row_value = take('d', rows)
+            acc._row_weight = take('d', rows)
+        if offset != len(view):
+            raise ValueError("数据长度与头部不一致")
+        return acc
+
+    def __repr__(self) -> str:
+        return f"GroupAccumulator(groups={len(self._keys)}, aggs={self.aggs})"
+
+
+def group_stats(keys, values, weights=None, aggs=DEFAULT_GROUP_AGGS) -> GroupStats:
+    """
+    按键分组计算统计量（可以加权），结果按列返回
+
+    参数:
+        keys: 每行的键（任意可哈希对象），例如服务名、(地区, 服务) 元组
+        values: 每行的数值
+        weights: 每行的权重（非负，例如每行代表的样本数），None 表示全部为 1
+        aggs: 聚合列表，可选 GROUP_AGGS 中的名字和 'p<百分位>'（例如 'p90'、'p99.9'）
+
+    返回:
+        GroupStats：keys 按首次出现的顺序，columns 为 聚合名 → 列
+
+    示例:
+        >>> stats = group_stats(['a', 'b', 'a', 'b'], [1, 10, 3, 20], aggs=['mean', 'max'])
+        >>> stats.keys, list(stats.columns['mean'])
+        (['a', 'b'], [2.0, 15.0])
+        >>> group_stats(['x', 'x'], [1.0, 3.0], weights=[3, 1], aggs=['mean']).columns['mean'][0]
+        1.5
+    """
+    return GroupAccumulator(aggs).update(keys, values, weights).result()
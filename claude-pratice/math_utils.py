@@ -3,68 +3,761 @@
 提供常用的数学计算功能
 """
 
-from typing import Optional
-from decorators import validate_non_empty
+import heapq
+import math
+import random
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from collections import Counter, deque
+from functools import partial
+from itertools import accumulate, chain, count, islice, repeat
+from operator import itemgetter, sub
+from typing import NamedTuple, Optional
+
+if __package__:
+    from .decorators import validate_non_empty
+else:  # 目录本身在 sys.path 上（直接运行脚本或测试）时按顶层模块导入
+    from decorators import validate_non_empty
+
+# NumPy 是可选依赖，没有安装时全部走纯 Python 实现。
+# 导入一次 NumPy 要上百毫秒，所以推迟到第一次真正需要向量化内核时再导入。
+_NOT_LOADED = object()
+_numpy_module = _NOT_LOADED
+
+
+def _numpy():
+    """返回 numpy 模块（第一次调用时才导入），没有安装时返回 None"""
+    global _numpy_module
+    if _numpy_module is _NOT_LOADED:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_module = numpy
+    return _numpy_module
+
+
+def __getattr__(name: str):
+    # 兼容 math_utils.np 的写法：访问时才导入 NumPy
+    if name == 'np':
+        return _numpy()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _as_ndarray(numbers):
+    """
+    缓冲区协议快速通道：把 array.array / memoryview / ndarray 零复制地转成 ndarray
+
+    这些输入在内存中本来就是连续的原始数字，逐个转成 Python 对象再循环
+    非常浪费；交给 NumPy 的向量化内核可以快一到两个数量级。
+
+    参数:
+        numbers: 任意输入
+
+    返回:
+        一维 ndarray（与输入共享内存）；如果没有安装 NumPy、
+        或者输入不支持缓冲区协议（例如普通列表），返回 None
+    """
+    if isinstance(numbers, list):
+        return None
+    # 输入是 ndarray 说明 NumPy 已经导入过了；其他输入不值得为此导入 NumPy
+    loaded = sys.modules.get('numpy')
+    if loaded is not None and isinstance(numbers, loaded.ndarray):
+        return numbers.reshape(-1)
+    try:
+        view = memoryview(numbers)
+    except TypeError:
+        return None
+    np = _numpy()
+    if np is None:
+        view.release()
+        return None
+    return np.asarray(view).reshape(-1)
+
+
+def _array_sum(arr):
+    """
+    ndarray 的总和
+
+    NumPy 的整数求和在 int64/uint64 中进行，溢出时会静默回绕；
+    整数数组的总和可能超出范围时，改用 Python 整数精确求和（与列表输入结果相同）。
+    """
+    if arr.dtype.kind in 'iu' and arr.size:
+        bound = max(abs(int(arr.min())), abs(int(arr.max())))
+        if bound * arr.size >= 1 << 63:
+            return sum(_array_values(arr))
+    return arr.sum().item()
+
+
+class StatsSummary(NamedTuple):
+    """
+    describe() 的结果对象：一次遍历得到的全部基础统计量
+
+    字段:
+        count: 数据个数
+        total: 总和（补偿求和，整数输入保持精确）
+        mean: 平均值
+        minimum: 最小值
+        maximum: 最大值
+        variance: 总体方差（除以 n）
+        sample_variance: 样本方差（除以 n-1）
+        stddev: 总体标准差
+    """
+    count: int
+    total: float
+    mean: float
+    minimum: float
+    maximum: float
+    variance: float
+    sample_variance: float
+    stddev: float
+
+    @property
+    def sample_stddev(self) -> float:
+        """样本标准差（样本方差的平方根）"""
+        return self.sample_variance ** 0.5
+
+
+# 空输入时 describe() 返回的结果，与其他函数"空则返回 0"的约定一致
+EMPTY_SUMMARY = StatsSummary(0, 0, 0, 0, 0, 0, 0, 0)
+
+
+@validate_non_empty(return_value=EMPTY_SUMMARY)
+def describe(numbers: Optional[list[float]], nan_policy: Optional[str] = None) -> StatsSummary:
+    """
+    一次遍历计算全部基础统计量
+
+    以前要分别调用 sum_numbers、average、find_max、find_min、variance、
+    standard_deviation，数据会被遍历约八次（variance 内部还会调用 average）。
+    describe() 在一个循环里同时完成：
+    - Neumaier（改进的 Kahan）补偿求和：总和与平均值
+    - Welford 在线算法：方差（数值稳定，不需要先算平均值）
+    - 顺带比较得到最小值和最大值
+
+    参数:
+        numbers: 数字列表（任意可迭代对象均可）
+        nan_policy: 缺失值的处理方式，见 sum_numbers()；'propagate' 时除 count 外的字段都是 NaN
+
+    返回:
+        StatsSummary 结果对象，如果输入为空或 None（或者全部缺失）则所有字段为 0
+
+    示例:
+        >>> s = describe([1, 2, 3, 4, 5])
+        >>> s.total, s.mean, s.variance
+        (15, 3.0, 2.0)
+    """
+    if nan_policy is not None:
+        numbers, propagate = _handle_missing(numbers, nan_policy)
+        if propagate:
+            return StatsSummary(len(numbers), *[math.nan] * 7)
+
+    arr = _as_ndarray(numbers)
+    if arr is not None:
+        return _describe_array(arr)
+
+    count = 0
+    total = 0          # 补偿求和的主累加值
+    compensation = 0   # 补偿项：记录每次相加丢失的低位
+    mean = 0.0         # Welford 滚动平均值
+    m2 = 0.0           # Welford 偏差平方和
+    minimum = maximum = None
+
+    for x in numbers:
+        count += 1
+
+        # Neumaier 补偿求和
+        t = total + x
+        if abs(total) >= abs(x):
+            compensation += (total - t) + x
+        else:
+            compensation += (x - t) + total
+        total = t
+
+        # Welford 更新
+        delta = x - mean
+        mean += delta / count
+        m2 += delta * (x - mean)
+
+        # 最小值/最大值
+        if minimum is None:
+            minimum = maximum = x
+        elif x < minimum:
+            minimum = x
+        elif x > maximum:
+            maximum = x
+
+    if count == 0:
+        # 空的迭代器（例如已耗尽的生成器）
+        return EMPTY_SUMMARY
+
+    total += compensation
+    pop_var = m2 / count if count >= 2 else 0
+    sample_var = m2 / (count - 1) if count >= 2 else 0
+    return StatsSummary(
+        count=count,
+        total=total,
+        mean=total / count,
+        minimum=minimum,
+        maximum=maximum,
+        variance=pop_var,
+        sample_variance=sample_var,
+        stddev=pop_var ** 0.5,
+    )
+
+
+def _describe_array(arr) -> StatsSummary:
+    """describe() 的 NumPy 向量化版本"""
+    count = arr.size
+    pop_var = arr.var().item() if count >= 2 else 0
+    return StatsSummary(
+        count=count,
+        total=_array_sum(arr),
+        mean=arr.mean().item(),
+        minimum=arr.min().item(),
+        maximum=arr.max().item(),
+        variance=pop_var,
+        sample_variance=pop_var * count / (count - 1) if count >= 2 else 0,
+        stddev=pop_var ** 0.5,
+    )
+
+
+# ---------------------------------------------------------------------------
+# 求和策略
+#
+# 内置 sum() 逐个相加（Python 3.12 起对浮点数改用了补偿求和），
+# 十亿级的浮点流上舍入误差会累积。sum_numbers / average / variance / standard_deviation
+# 都可以用 summation 参数选择累加方式:
+# - None：默认行为（sum()；方差用两遍算法：sum() 求平均值，再 sum(map(...)) 累加偏差平方）
+# - 'pairwise'：分块两两求和，误差随 log(n) 增长（NumPy 的 sum 也是这样做的）
+# - 'neumaier'：Kahan-Babuska/Neumaier 补偿求和，误差基本与 n 无关
+# - 'fsum'：math.fsum，结果是精确和正确舍入后的值（总返回 float）
+#
+# 速度/精度对比见 benchmarks.benchmark_summation()。在 CPython 3.11 上:
+# fsum 是 C 实现，只比 sum() 慢几倍且结果精确，通常是首选；pairwise 速度相近；
+# neumaier 在 3.12 以下是纯 Python 循环，反而最慢（3.12 起直接用内置 sum()）。
+# 均值远大于离散程度的数据（例如 1e9 + 噪声）上，默认的两遍方差有约 1e-9 的相对误差，
+# 任何一种策略的两遍算法都能把误差降到 1e-16 左右。
+# ---------------------------------------------------------------------------
+
+SUMMATION_MODES = ('pairwise', 'neumaier', 'fsum')
+
+# pairwise 模式下先直接相加的块大小
+_PAIRWISE_BLOCK = 128
+
+# NumPy 数组逐块转换成 Python 数字时的块大小，限制临时内存
+_ARRAY_BLOCK = 1 << 16
+
+
+def _check_summation(summation: Optional[str]) -> None:
+    if summation is not None and summation not in SUMMATION_MODES:
+        raise ValueError(f"summation 必须是 None 或 {SUMMATION_MODES} 之一，而不是 {summation!r}")
+
+
+if sys.version_info >= (3, 12):
+    # 3.12 起内置 sum() 对浮点数就是 Neumaier 补偿求和，直接用 C 实现
+    _neumaier_sum = sum
+else:
+    def _neumaier_sum(values):
+        """Neumaier 补偿求和（整数输入保持精确）"""
+        total = 0
+        compensation = 0
+        for x in values:
+            t = total + x
+            if abs(total) >= abs(x):
+                compensation += (total - t) + x
+            else:
+                compensation += (x - t) + total
+            total = t
+        return total + compensation
+
+
+def _pairwise_sum(values):
+    """
+    分块两两求和
+
+    每 _PAIRWISE_BLOCK 个元素用 sum() 加成一个部分和，
+    部分和再像二叉树一样两两相加（用栈实现，只需要 O(log n) 额外内存）。
+    """
+    iterator = iter(values)
+    stack = []  # [(层数, 部分和)]，层数从栈底到栈顶递减
+    while True:
+        block = list(islice(iterator, _PAIRWISE_BLOCK))
+        if not block:
+            break
+        partial = sum(block)
+        level = 0
+        while stack and stack[-1][0] == level:
+            partial = stack.pop()[1] + partial
+            level += 1
+        stack.append((level, partial))
+    total = 0
+    # 从较小的部分和开始往上加
+    for _, partial in reversed(stack):
+        total = partial + total
+    return total
+
+
+def _accumulate(values, summation: str):
+    """按指定策略求和（values 是任意可迭代对象）"""
+    if summation == 'fsum':
+        return math.fsum(values)
+    if summation == 'neumaier':
+        return _neumaier_sum(values)
+    return _pairwise_sum(values)
+
+
+def _array_values(arr):
+    """逐块把 ndarray 转成 Python 数字的迭代器（补偿/精确求和需要逐个处理）"""
+    return chain.from_iterable(arr[i:i + _ARRAY_BLOCK].tolist()
+                               for i in range(0, arr.size, _ARRAY_BLOCK))
+
+
+def _strategy_sum(numbers, summation: str):
+    """sum_numbers() 的非默认求和策略"""
+    arr = _as_ndarray(numbers)
+    if arr is not None:
+        if summation == 'pairwise':
+            return _array_sum(arr)
+        return _accumulate(_array_values(arr), summation)
+    return _accumulate(numbers, summation)
+
+
+def _strategy_variance(numbers, summation: str) -> float:
+    """
+    variance() 的非默认求和策略：修正的两遍算法
+
+    第一遍求平均值；第二遍同时累加偏差平方和 Σ(x-m)² 与偏差和 Σ(x-m)，
+    用后者修正平均值本身的舍入误差：方差 = (Σ(x-m)² - (Σ(x-m))²/n) / n。
+    两个和都用同一种策略累加。
+    """
+    n = len(numbers)
+    mean = _strategy_sum(numbers, summation) / n
+    arr = _as_ndarray(numbers)
+    if arr is not None:
+        deviations = arr - mean
+        if summation == 'pairwise':
+            return ((deviations * deviations).sum().item() - deviations.sum().item() ** 2 / n) / n
+        squares = _accumulate(_array_values(deviations * deviations), summation)
+        linear = _accumulate(_array_values(deviations), summation)
+    else:
+        # map 在 C 中完成逐元素运算，只有累加按所选策略进行
+        squares = _accumulate(map(pow, map(sub, numbers, repeat(mean)), repeat(2)), summation)
+        linear = _accumulate(map(sub, numbers, repeat(mean)), summation)
+    return max((squares - linear * linear / n) / n, 0.0)
+
+
+# ---------------------------------------------------------------------------
+# 缺失值处理（nan_policy）
+#
+# 真实数据里常有缺失值：None 或 NaN。默认（nan_policy=None）不做任何检查，速度与以前完全相同，
+# 但 None 会让函数抛出 TypeError，NaN 会让 median / find_max 的结果取决于它出现的位置。
+# 指定 nan_policy 后:
+# - 'omit': 跳过缺失值，只用其余数据计算（全部缺失时按空输入处理）
+# - 'propagate': 有缺失值时结果为 NaN
+# - 'raise': 有缺失值时抛出 ValueError
+#
+# 不会先过滤出一份新列表再计算：序列先交给 C 实现的 sum() 扫一遍
+# （None 让它抛出 TypeError，NaN 让总和变成 NaN），没有缺失值就原样交给原来的实现；
+# 只有真的有缺失值时，才在同一趟归约中边遍历边跳过（生成器表达式，比先过滤出列表还快）。
+# NumPy 数组用 isnan 检查；一次性可迭代对象和流式累加器边遍历边处理。
+# ---------------------------------------------------------------------------
+
+NAN_POLICIES = ('propagate', 'omit', 'raise')
+
+
+def _check_nan_policy(nan_policy: Optional[str]) -> None:
+    if nan_policy is not None and nan_policy not in NAN_POLICIES:
+        raise ValueError(f"nan_policy 必须是 None 或 {NAN_POLICIES} 之一，而不是 {nan_policy!r}")
+
+
+def _present(numbers):
+    """跳过缺失值（None 或 NaN，NaN 是唯一不等于自身的值）的迭代器"""
+    return (x for x in numbers if x is not None and x == x)
+
+
+def _require_present(x):
+    if x is None or x != x:
+        raise ValueError(f"输入中有缺失值: {x!r}")
+    return x
+
+
+def _none_to_nan(x):
+    return math.nan if x is None else x
+
+
+def _skip_missing(nan_policy: str) -> bool:
+    """累加器遇到缺失值：'omit' 返回 True（跳过），'raise' 抛出异常，'propagate' 返回 False（按 NaN 累加）"""
+    if nan_policy == 'omit':
+        return True
+    if nan_policy == 'raise':
+        raise ValueError("输入中有缺失值（None 或 NaN）")
+    return False
+
+
+def _scan_total(numbers):
+    """
+    用 C 实现的 sum() 扫一遍序列，有 None（或其他不能相加的元素）时返回 NaN
+
+    结果不是 NaN 说明一定没有缺失值；是 NaN 时也可能只是 inf - inf，需要再精确检查。
+    """
+    try:
+        return sum(numbers)
+    except TypeError:
+        return math.nan
+
+
+def _handle_missing(numbers, nan_policy: str):
+    """
+    按 nan_policy 处理输入中的缺失值
+
+    参数:
+        numbers: 任意输入（列表、缓冲区、ndarray、一次性可迭代对象）
+        nan_policy: NAN_POLICIES 之一
+
+    返回:
+        (data, propagate)。没有缺失值时 data 就是输入本身（不复制）；
+        'omit' 时 data 是跳过缺失值的迭代器（ndarray 输入则是过滤后的数组），
+        全部缺失时是空迭代器；propagate 为 True 表示应当直接返回 NaN
+    """
+    _check_nan_policy(nan_policy)
+    arr = _as_ndarray(numbers)
+    if arr is not None:
+        if arr.dtype.kind != 'f':
+            # 整数数组不可能有 NaN
+            return arr, False
+        missing = _numpy().isnan(arr)
+        if not missing.any():
+            return arr, False
+        if nan_policy == 'omit':
+            kept = arr[~missing]
+            return (kept if kept.size else iter(())), False
+    elif hasattr(numbers, '__len__'):
+        total = _scan_total(numbers)
+        if total == total or not any(x is None or x != x for x in numbers):
+            return numbers, False
+        if nan_policy == 'omit':
+            return _present(numbers), False
+    elif nan_policy == 'omit':
+        return _present(numbers), False
+    elif nan_policy == 'raise':
+        return map(_require_present, numbers), False
+    else:
+        # 'propagate' 要先知道有没有缺失值，一次性可迭代对象只能先收集起来
+        collected = list(numbers)
+        return _handle_missing(collected, nan_policy) if collected else (iter(()), False)
+    if nan_policy == 'raise':
+        raise ValueError("输入中有缺失值（None 或 NaN）")
+    return numbers, True
+
+
+def _missing_stream(numbers, nan_policy: str):
+    """流式累加器的 extend() 用：返回处理过缺失值的输入，'propagate' 时 None 换成 NaN 继续累加"""
+    if not hasattr(numbers, '__len__'):
+        if nan_policy == 'omit':
+            return _present(numbers)
+        if nan_policy == 'raise':
+            return map(_require_present, numbers)
+        return map(_none_to_nan, numbers)
+    data, propagate = _handle_missing(numbers, nan_policy)
+    if propagate and _as_ndarray(data) is None:
+        return map(_none_to_nan, data)
+    return data
+
+
+def _sum_and_count(values, summation: Optional[str]):
+    """一趟遍历同时得到总和与个数（values 是迭代器时用）"""
+    counter = count()
+    counted = map(itemgetter(0), zip(values, counter))
+    total = sum(counted) if summation is None else _accumulate(counted, summation)
+    return total, next(counter)
 
 
 @validate_non_empty(return_value=0)
-def sum_numbers(numbers: Optional[list[float]]) -> float:
+def sum_numbers(numbers: Optional[list[float]], summation: Optional[str] = None,
+                nan_policy: Optional[str] = None) -> float:
     """
     计算列表中所有数字的总和
 
     参数:
         numbers: 数字列表
+        summation: 求和策略，None（默认 sum()）、'pairwise'、'neumaier' 或 'fsum'
+        nan_policy: 缺失值（None / NaN）的处理方式，None（不检查）、'omit'、'propagate' 或 'raise'
 
     返回:
         总和，如果列表为空或 None 则返回 0
+
+    示例:
+        >>> sum_numbers([0.1] * 10)
+        0.9999999999999999
+        >>> sum_numbers([0.1] * 10, summation='fsum')
+        1.0
+        >>> sum_numbers([1, None, 2, float('nan')], nan_policy='omit')
+        3
     """
+    if type(numbers) is list and summation is None and nan_policy is None:
+        # 最常见的调用（默认参数的普通列表）跳过所有分派
+        return sum(numbers)
+    if nan_policy is not None:
+        _check_nan_policy(nan_policy)
+        if summation is None and isinstance(numbers, list):
+            # 干净的列表：检查缺失值的这一趟 sum() 就是结果
+            total = _scan_total(numbers)
+            if total == total:
+                return total
+        numbers, propagate = _handle_missing(numbers, nan_policy)
+        if propagate:
+            return math.nan
+    if summation is not None:
+        _check_summation(summation)
+        return _strategy_sum(numbers, summation)
+    arr = _as_ndarray(numbers)
+    if arr is not None:
+        return _array_sum(arr)
     return sum(numbers)
 
 
 @validate_non_empty(return_value=0)
-def average(numbers: Optional[list[float]]) -> float:
+def average(numbers: Optional[list[float]], summation: Optional[str] = None,
+            nan_policy: Optional[str] = None) -> float:
     """
     计算列表中数字的平均值
 
     参数:
         numbers: 数字列表
+        summation: 求和策略，见 sum_numbers()
+        nan_policy: 缺失值的处理方式，见 sum_numbers()；'omit' 时只按剩下的数据个数平均
 
     返回:
-        平均值，如果列表为空或 None 则返回 0
+        平均值，如果列表为空或 None（或者全部缺失）则返回 0
     """
+    if type(numbers) is list and summation is None and nan_policy is None:
+        return sum(numbers) / len(numbers)
+    if nan_policy is not None:
+        _check_nan_policy(nan_policy)
+        if summation is None and isinstance(numbers, list):
+            total = _scan_total(numbers)
+            if total == total:
+                return total / len(numbers)
+        numbers, propagate = _handle_missing(numbers, nan_policy)
+        if propagate:
+            return math.nan
+        if not hasattr(numbers, '__len__'):
+            _check_summation(summation)
+            total, n = _sum_and_count(numbers, summation)
+            return total / n if n else 0
+    if summation is not None:
+        _check_summation(summation)
+        return _strategy_sum(numbers, summation) / len(numbers)
+    arr = _as_ndarray(numbers)
+    if arr is not None:
+        return arr.mean().item()
     return sum(numbers) / len(numbers)
 
 
 @validate_non_empty(return_value=0)
-def find_max(numbers: Optional[list[float]]) -> float:
+def find_max(numbers: Optional[list[float]], nan_policy: Optional[str] = None) -> float:
     """
     找出列表中的最大值
 
     参数:
         numbers: 数字列表
+        nan_policy: 缺失值的处理方式，见 sum_numbers()（不指定时 NaN 会让结果取决于它的位置）
 
     返回:
-        最大值，如果列表为空或 None 则返回 0
+        最大值，如果列表为空或 None（或者全部缺失）则返回 0
     """
+    if type(numbers) is list and nan_policy is None:
+        return max(numbers)
+    if nan_policy is not None:
+        numbers, propagate = _handle_missing(numbers, nan_policy)
+        if propagate:
+            return math.nan
+        if not hasattr(numbers, '__len__'):
+            return max(numbers, default=0)
+    arr = _as_ndarray(numbers)
+    if arr is not None:
+        return arr.max().item()
     return max(numbers)
 
 
 @validate_non_empty(return_value=0)
-def find_min(numbers: Optional[list[float]]) -> float:
+def find_min(numbers: Optional[list[float]], nan_policy: Optional[str] = None) -> float:
     """
     找出列表中的最小值
 
     参数:
         numbers: 数字列表
+        nan_policy: 缺失值的处理方式，见 sum_numbers()（不指定时 NaN 会让结果取决于它的位置）
 
     返回:
-        最小值，如果列表为空或 None 则返回 0
+        最小值，如果列表为空或 None（或者全部缺失）则返回 0
     """
+    if type(numbers) is list and nan_policy is None:
+        return min(numbers)
+    if nan_policy is not None:
+        numbers, propagate = _handle_missing(numbers, nan_policy)
+        if propagate:
+            return math.nan
+        if not hasattr(numbers, '__len__'):
+            return min(numbers, default=0)
+    arr = _as_ndarray(numbers)
+    if arr is not None:
+        return arr.min().item()
     return min(numbers)
 
 
+# ---------------------------------------------------------------------------
+# 选择算法引擎（introselect）
+#
+# 求第 k 小的元素不需要把整个列表排好序，只需要"快速选择"：
+# 每次按枢轴把数据分成 小于 / 等于 / 大于 三段，
+# 只继续处理包含目标名次的那一段，期望 O(n)。
+# 为了避免坏枢轴导致退化到 O(n²)，分区连续失衡时改用
+# 中位数的中位数（median-of-medians）选枢轴，保证最坏情况也是线性的。
+#
+# 注意：CPython 中 sorted() 是 C 实现（而且对已排序数据是 O(n) 的），
+# 纯 Python 的选择算法只有在数据量很大时才更快，
+# 所以小数据仍然走排序，只有超过 _SELECT_MIN_SIZE 才启用选择引擎。
+# ---------------------------------------------------------------------------
+
+# 启用选择引擎的最小数据量（实测 10 万个随机数时两者持平，100 万时选择快约 1.7 倍）
+_SELECT_MIN_SIZE = 100_000
+
+# 分区后的子列表不超过这个值时直接排序
+_SELECT_SORT_CUTOFF = 64
+
+
+def _median_of_medians(data: list) -> float:
+    """
+    用"中位数的中位数"选出一个枢轴
+
+    每 5 个元素一组取组内中位数，再对这些中位数重复同样的过程。
+    得到的枢轴两侧都至少有约 30% 的元素，从而保证线性时间。
+    """
+    while len(data) > 5:
+        data = [sorted(data[i:i + 5])[min(2, (len(data) - i - 1) // 2)]
+                for i in range(0, len(data), 5)]
+    return sorted(data)[len(data) // 2]
+
+
+def _choose_pivot(data: list, use_mom: bool) -> float:
+    """选择枢轴：平时用三数取中，分区连续失衡后改用 median-of-medians"""
+    if use_mom:
+        return _median_of_medians(data)
+    a, b, c = data[0], data[len(data) // 2], data[-1]
+    if a < b:
+        if b < c:
+            return b
+        return c if a < c else a
+    if a < c:
+        return a
+    return c if b < c else b
+
+
+def _multiselect(data: list, ranks: list[int]) -> dict[int, float]:
+    """
+    一次分区过程同时求出多个名次（从 0 开始）的值
+
+    每一轮分区后，把目标名次分配到"小于"或"大于"那一段继续处理，
+    落在"等于"段的名次直接得到答案。多个分位数（p50/p90/p99）
+    共享上层的分区工作，不需要各自从头选择。
+
+    参数:
+        data: 数据列表（不会被修改，分区时生成规模逐级缩小的子列表）
+        ranks: 需要的名次列表
+
+    返回:
+        名次到值的字典
+    """
+    result = {}
+    depth_limit = 2 * len(data).bit_length()
+    # 栈中每一项: (子列表, 子列表内的目标名次, 子列表在整体中的起始名次, 失衡轮数)
+    stack = [(data, sorted(set(ranks)), 0, 0)]
+    while stack:
+        part, wanted, base, bad_rounds = stack.pop()
+        n = len(part)
+        if n <= _SELECT_SORT_CUTOFF:
+            ordered = sorted(part)
+            for k in wanted:
+                result[base + k] = ordered[k]
+            continue
+
+        pivot = _choose_pivot(part, bad_rounds > depth_limit)
+        lows = [x for x in part if x < pivot]
+        highs = [x for x in part if x > pivot]
+        n_low = len(lows)
+        n_high_start = n - len(highs)
+        # 较大的一段超过 3/4 视为一次失衡
+        if max(n_low, len(highs)) > 3 * n // 4:
+            bad_rounds += 1
+
+        low_wanted = []
+        high_wanted = []
+        for k in wanted:
+            if k < n_low:
+                low_wanted.append(k)
+            elif k < n_high_start:
+                result[base + k] = pivot
+            else:
+                high_wanted.append(k - n_high_start)
+        if low_wanted:
+            stack.append((lows, low_wanted, base, bad_rounds))
+        if high_wanted:
+            stack.append((highs, high_wanted, base + n_high_start, bad_rounds))
+    return result
+
+
+def _order_statistics(numbers, ranks: list[int], inplace: bool = False) -> dict[int, float]:
+    """
+    求若干名次上的值（排序后第 k 个元素），自动选择最快的方式
+
+    参数:
+        numbers: 数字序列
+        ranks: 需要的名次列表（从 0 开始）
+        inplace: 为 True 且输入是列表时，直接原地排序调用方的列表，不复制
+
+    返回:
+        名次到值的字典
+    """
+    if inplace and isinstance(numbers, list):
+        numbers.sort()
+        return {k: numbers[k] for k in ranks}
+    if len(numbers) < _SELECT_MIN_SIZE:
+        ordered = sorted(numbers)
+        return {k: ordered[k] for k in ranks}
+    return _multiselect(numbers if isinstance(numbers, list) else list(numbers), ranks)
+
+
+def _quantile_ranks(n: int, q: float) -> tuple[int, float]:
+    """
+    计算分位数 q 对应的名次和插值比例
+
+    使用线性插值定义（与 numpy 默认、statistics 的 inclusive 方法一致）：
+    位置 h = (n - 1) * q，结果 = x[⌊h⌋] + (h - ⌊h⌋) * (x[⌊h⌋ + 1] - x[⌊h⌋])
+    """
+    _check_quantiles((q,))
+    h = (n - 1) * q
+    lo = int(h)
+    return lo, h - lo
+
+
+def _check_quantiles(qs) -> None:
+    """校验分位点；在空输入提前返回之前调用，非法的 q 不论数据是否为空都报错"""
+    for q in qs:
+        if not 0 <= q <= 1:
+            raise ValueError(f"分位数必须在 0 到 1 之间，实际为 {q}")
+
+
+def _as_sequence(numbers):
+    """生成器等一次性可迭代对象先转成列表，序列直接返回"""
+    return numbers if hasattr(numbers, '__len__') else list(numbers)
+
+
 @validate_non_empty(return_value=0)
-def median(numbers: Optional[list[float]]) -> float:
+def median(numbers: Optional[list[float]], inplace: bool = False,
+           nan_policy: Optional[str] = None) -> float:
     """
     计算列表的中位数
 
@@ -72,11 +765,15 @@ def median(numbers: Optional[list[float]]) -> float:
     - 如果数据个数是奇数：中位数就是中间的那个值
     - 如果数据个数是偶数：中位数是中间两个值的平均值
 
+    大数据量时由选择算法引擎求出中间名次的值，不再完整排序。
+
     参数:
         numbers: 数字列表
+        inplace: 为 True 时允许打乱调用方列表的顺序，以省去一次复制
+        nan_policy: 缺失值的处理方式，见 sum_numbers()（不指定时 NaN 会让结果取决于它的位置）
 
     返回:
-        中位数，如果列表为空或 None 则返回 0
+        中位数，如果列表为空或 None（或者全部缺失）则返回 0
 
     示例:
         >>> median([1, 3, 5])
@@ -84,56 +781,505 @@ def median(numbers: Optional[list[float]]) -> float:
         >>> median([1, 3, 5, 7])
         4.0
     """
-    # 步骤1: 对列表进行排序（创建副本，不修改原列表）
-    sorted_numbers = sorted(numbers)
-    n = len(sorted_numbers)
+    if nan_policy is not None:
+        data, propagate = _handle_missing(numbers, nan_policy)
+        if propagate:
+            return math.nan
+        numbers = data
 
-    # 步骤2: 找到中间位置
+    if type(numbers) is list:
+        n = len(numbers)
+        if 0 < n < _SELECT_MIN_SIZE and not inplace:
+            # 小列表的快速通道：直接排序，不经过缓冲区探测和选择引擎的分派
+            ordered = sorted(numbers)
+            mid = n // 2
+            return ordered[mid] if n % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+    else:
+        arr = _as_ndarray(numbers)
+        if arr is not None:
+            if arr.dtype.kind in 'biu' and arr.size:
+                return _integer_array_median(arr, inplace)
+            return _numpy().median(arr, overwrite_input=inplace).item()
+        numbers = _as_sequence(numbers)
+        n = len(numbers)
+    if n == 0:
+        # 已经耗尽的迭代器，或者全部缺失
+        return 0
     mid = n // 2
 
-    # 步骤3: 根据数据个数判断如何计算中位数
     if n % 2 == 1:
         # 奇数个数据：直接返回中间值
-        # 例如: [1, 2, 3] → mid=1 → 返回 sorted_numbers[1] = 2
-        return sorted_numbers[mid]
+        # 例如: [1, 2, 3] → mid=1 → 返回排序后的第 1 个元素 = 2
+        return _order_statistics(numbers, [mid], inplace)[mid]
+
+    # 偶数个数据：返回中间两个值的平均值
+    # 例如: [1, 2, 3, 4] → mid=2 → 返回 (第 1 个 + 第 2 个) / 2
+    values = _order_statistics(numbers, [mid - 1, mid], inplace)
+    return (values[mid - 1] + values[mid]) / 2
+
+
+def _integer_array_median(arr, inplace: bool):
+    """
+    整数 ndarray 的中位数，与列表输入的结果一致
+
+    np.median() 总是返回 float；列表在奇数个时返回中间元素本身，
+    偶数个时是两个 Python 整数相加后再除（不经过 float64，大整数也不丢精度）。
+    """
+    n = arr.size
+    mid = n // 2
+    kth = [mid] if n % 2 else [mid - 1, mid]
+    if inplace:
+        arr.partition(kth)
     else:
-        # 偶数个数据：返回中间两个值的平均值
-        # 例如: [1, 2, 3, 4] → mid=2 → 返回 (sorted_numbers[1] + sorted_numbers[2]) / 2
-        return (sorted_numbers[mid - 1] + sorted_numbers[mid]) / 2
+        arr = _numpy().partition(arr, kth)
+    if n % 2:
+        return arr[mid].item()
+    return (arr[mid - 1].item() + arr[mid].item()) / 2
+
+
+def quantile(numbers: Optional[list[float]], q: float, inplace: bool = False,
+             nan_policy: Optional[str] = None) -> float:
+    """
+    计算分位数
+
+    参数:
+        numbers: 数字列表
+        q: 分位点，0 到 1 之间（0.5 即中位数，0.99 即 p99）
+        inplace: 为 True 时允许打乱调用方列表的顺序，以省去一次复制
+        nan_policy: 缺失值的处理方式，见 sum_numbers()
+
+    返回:
+        分位数（线性插值），如果列表为空或 None 则返回 0
+
+    示例:
+        >>> quantile([1, 2, 3, 4, 5], 0.25)
+        2.0
+    """
+    result = quantiles(numbers, [q], inplace, nan_policy)
+    return result[0] if result else 0
 
 
-def variance(numbers: Optional[list[float]]) -> float:
+def quantiles(numbers: Optional[list[float]], qs: list[float], inplace: bool = False,
+              nan_policy: Optional[str] = None) -> list[float]:
+    """
+    一次计算多个分位数
+
+    所有分位点需要的名次交给选择引擎一次求出，
+    p50/p90/p99 共享同一趟分区工作。
+
+    参数:
+        numbers: 数字列表
+        qs: 分位点列表，每个都在 0 到 1 之间
+        inplace: 为 True 时允许打乱调用方列表的顺序，以省去一次复制
+        nan_policy: 缺失值的处理方式，见 sum_numbers()
+
+    返回:
+        与 qs 顺序对应的分位数列表，如果列表为空或 None（或者全部缺失）则返回空列表
+
+    示例:
+        >>> quantiles(list(range(101)), [0.5, 0.9, 0.99])
+        [50.0, 90.0, 99.0]
+    """
+    # 不用 validate_non_empty：分位点要在空输入提前返回之前校验
+    _check_quantiles(qs)
+    if numbers is None:
+        return []
+    if nan_policy is not None:
+        data, propagate = _handle_missing(numbers, nan_policy)
+        if propagate:
+            return [math.nan] * len(qs)
+        numbers = data
+
+    # 普通列表跳过缓冲区探测
+    if type(numbers) is not list:
+        arr = _as_ndarray(numbers)
+        if arr is not None:
+            if arr.size == 0:
+                return []
+            return _numpy().quantile(arr, qs, overwrite_input=inplace).tolist()
+        numbers = _as_sequence(numbers)
+    n = len(numbers)
+    if n == 0:
+        return []
+
+    positions = [_quantile_ranks(n, q) for q in qs]
+    ranks = []
+    for lo, frac in positions:
+        ranks.append(lo)
+        if frac:
+            ranks.append(lo + 1)
+    values = _order_statistics(numbers, ranks, inplace)
+
+    result = []
+    for lo, frac in positions:
+        low_value = values[lo]
+        if frac:
+            result.append(low_value + (values[lo + 1] - low_value) * frac)
+        else:
+            result.append(float(low_value))
+    return result
+
+
+# ---------------------------------------------------------------------------
+# 近似分位数草图（KLL sketch）
+#
+# median() / quantiles() 需要把全部数据放进内存。每分钟几百万个延迟样本的场景下，
+# KLLSketch 只保留固定数量的样本（与数据量几乎无关）就能回答任意分位数，
+# 各分片/各时间窗口的草图可以合并，并且可以序列化成紧凑的 bytes 保存或传输。
+#
+# 原理（Karnin, Lang, Liberty 2016）：草图由若干层"压缩器"组成，第 h 层的每个样本代表 2^h 个原始数据。
+# 某层满了就排序，随机保留奇数位或偶数位的一半样本提升到上一层，总权重保持不变。
+# 越低的层容量越小（按 2/3 的比例递减），总共只保留约 3k 个样本。
+# 数据量少于 k 时不会发生压缩，结果与 quantile() 完全相同。
+# ---------------------------------------------------------------------------
+
+_KLL_MAGIC = b'KLLS'
+_KLL_VERSION = 1
+# 魔数、版本、层数、k、数据个数、最小值、最大值
+_KLL_HEADER = struct.Struct('<4sBBHQdd')
+
+
+class KLLSketch:
+    """
+    可合并的 KLL 近似分位数草图
+
+    参数:
+        k: 精度参数，越大越准、占用越多。归一化名次误差约为 2.3 / k^0.97
+           （k=200 时约 1.3%，即估计的 p50 实际落在 p48.7 ~ p51.3 之间）
+        seed: 压缩时随机选择的种子，指定后结果可复现
+
+    示例:
+        >>> sketch = KLLSketch(k=200)
+        >>> sketch.extend(range(101))   # 少于 k 个数据时结果是精确的
+        >>> sketch.quantile(0.5)
+        50.0
+    """
+
+    # 每层容量按这个比例逐层递减
+    _CAPACITY_RATIO = 2 / 3
+
+    __slots__ = ('k', 'count', 'minimum', 'maximum', '_levels', '_size', '_max_size',
+                 '_rng', '_cache')
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        if not 8 <= k <= 65535:
+            raise ValueError(f"k 必须在 8 到 65535 之间，实际为 {k}")
+        self.k = k
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self._levels = [[]]
+        self._size = 0
+        self._rng = random.Random(seed)
+        self._cache = None
+        self._update_max_size()
+
+    @classmethod
+    def for_error(cls, epsilon: float, seed: Optional[int] = None) -> 'KLLSketch':
+        """
+        按目标误差创建草图
+
+        参数:
+            epsilon: 归一化名次误差，例如 0.01 表示 1%
+
+        返回:
+            能达到该误差的最小 k 对应的草图
+        """
+        if not 0 < epsilon < 1:
+            raise ValueError(f"epsilon 必须在 0 到 1 之间，实际为 {epsilon}")
+        k = math.ceil((2.296 / epsilon) ** (1 / 0.9723))
+        return cls(max(8, min(k, 65535)), seed)
+
+    @property
+    def epsilon(self) -> float:
+        """归一化名次误差的估计值（约 99% 的把握）"""
+        return 2.296 / self.k ** 0.9723
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(2, math.ceil(self.k * self._CAPACITY_RATIO ** depth))
+
+    def _update_max_size(self) -> None:
+        self._max_size = sum(self._capacity(h) for h in range(len(self._levels)))
+
+    def add(self, x: float) -> None:
+        """加入一个数字"""
+        self._levels[0].append(x)
+        self._size += 1
+        self.count += 1
+        if self.minimum is None or x < self.minimum:
+            self.minimum = x
+        if self.maximum is None or x > self.maximum:
+            self.maximum = x
+        self._cache = None
+        if self._size >= self._max_size:
+            self._compress()
+
+    def extend(self, numbers) -> None:
+        """加入一批数字（任意可迭代对象；NumPy 数组逐块转换）"""
+        arr = _as_ndarray(numbers)
+        iterator = iter(_array_values(arr) if arr is not None else numbers)
+        while True:
+            # 每次只取到第 0 层填满为止，随后压缩
+            block = list(islice(iterator, max(1, self._max_size - self._size)))
+            if not block:
+                break
+            low, high = min(block), max(block)
+            if self.minimum is None or low < self.minimum:
+                self.minimum = low
+            if self.maximum is None or high > self.maximum:
+                self.maximum = high
+            self._levels[0].extend(block)
+            self._size += len(block)
+            self.count += len(block)
+            self._cache = None
+            if self._size >= self._max_size:
+                self._compress()
+
+    def _compact(self, level: int) -> None:
+        """把第 level 层排序后的一半样本提升到上一层"""
+        items = self._levels[level]
+        items.sort()
+        if len(items) % 2:
+            # 奇数个时最小的一个留在本层
+            keep, items = items[:1], items[1:]
+        else:
+            keep = []
+        if level + 1 == len(self._levels):
+            self._levels.append([])
+            self._update_max_size()
+        self._levels[level + 1].extend(items[self._rng.getrandbits(1)::2])
+        self._levels[level] = keep
+        self._size -= len(items) // 2
+
+    def _compress(self) -> None:
+        while self._size >= self._max_size:
+            for level in range(len(self._levels)):
+                if len(self._levels[level]) >= self._capacity(level):
+                    self._compact(level)
+                    break
+            else:
+                break
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """
+        合并另一个草图（原地修改并返回 self）
+
+        参数:
+            other: k 相同的另一个草图
+
+        返回:
+            self，方便链式调用
+        """
+        if other.k != self.k:
+            raise ValueError(f"只能合并 k 相同的草图（{self.k} != {other.k}）")
+        if other.count == 0:
+            return self
+        while len(self._levels) < len(other._levels):
+            self._levels.append([])
+        self._update_max_size()
+        for level, items in enumerate(other._levels):
+            self._levels[level].extend(items)
+        self._size += other._size
+        self.count += other.count
+        if self.minimum is None or other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if self.maximum is None or other.maximum > self.maximum:
+            self.maximum = other.maximum
+        self._cache = None
+        self._compress()
+        return self
+
+    def _sorted_items(self) -> tuple[list, list]:
+        """所有样本按值排序，以及对应的累计权重（结果缓存到下一次修改）"""
+        if self._cache is None:
+            pairs = sorted((x, 1 << level) for level, items in enumerate(self._levels) for x in items)
+            values = [x for x, _ in pairs]
+            cumulative = []
+            total = 0
+            for _, weight in pairs:
+                total += weight
+                cumulative.append(total)
+            self._cache = (values, cumulative)
+        return self._cache
+
+    def _value_at_rank(self, rank: int) -> float:
+        values, cumulative = self._sorted_items()
+        # 第 i 个样本覆盖名次 [cumulative[i-1], cumulative[i])
+        return values[min(bisect_right(cumulative, rank), len(values) - 1)]
+
+    def quantile(self, q: float) -> float:
+        """
+        估计分位数（与 quantile() 一样使用线性插值）
+
+        参数:
+            q: 分位点，0 到 1 之间；0 和 1 分别返回精确的最小值和最大值
+
+        返回:
+            分位数估计值，没有数据时返回 0
+        """
+        lo, frac = _quantile_ranks(self.count, q)
+        if self.count == 0:
+            return 0
+        if q == 0:
+            return float(self.minimum)
+        if q == 1:
+            return float(self.maximum)
+        low = self._value_at_rank(lo)
+        if frac:
+            return low + (self._value_at_rank(lo + 1) - low) * frac
+        return float(low)
+
+    def quantiles(self, qs: list[float]) -> list[float]:
+        """一次估计多个分位数"""
+        return [self.quantile(q) for q in qs]
+
+    def median(self) -> float:
+        """估计中位数"""
+        return self.quantile(0.5)
+
+    def rank(self, x: float) -> float:
+        """估计小于等于 x 的数据所占的比例"""
+        if self.count == 0:
+            return 0.0
+        values, cumulative = self._sorted_items()
+        index = bisect_right(values, x)
+        return (cumulative[index - 1] if index else 0) / self.count
+
+    @property
+    def retained(self) -> int:
+        """当前保留的样本个数（决定内存占用和序列化大小）"""
+        return self._size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def serialize(self) -> bytes:
+        """
+        序列化成紧凑的 bytes
+
+        格式（小端）：32 字节头 + 每层样本数（uint32 数组）+ 全部样本（float64 数组）。
+        样本统一保存为 float64。
+        """
+        sizes = array('I', [len(items) for items in self._levels])
+        values = array('d', chain.from_iterable(self._levels))
+        if sys.byteorder == 'big':
+            sizes.byteswap()
+            values.byteswap()
+        header = _KLL_HEADER.pack(
+            _KLL_MAGIC, _KLL_VERSION, len(self._levels), self.k, self.count,
+            math.nan if self.minimum is None else self.minimum,
+            math.nan if self.maximum is None else self.maximum,
+        )
+        return header + sizes.tobytes() + values.tobytes()
+
+    @classmethod
+    def deserialize(cls, data, seed: Optional[int] = None) -> 'KLLSketch':
+        """
+        从 serialize() 的结果恢复草图
+
+        参数:
+            data: bytes、bytearray 或 memoryview
+            seed: 之后压缩使用的随机种子
+
+        返回:
+            KLLSketch
+        """
+        view = memoryview(data).cast('B')
+        if len(view) < _KLL_HEADER.size:
+            raise ValueError("数据太短，不是 KLL 草图")
+        magic, version, depth, k, count, minimum, maximum = _KLL_HEADER.unpack_from(view)
+        if magic != _KLL_MAGIC:
+            raise ValueError("魔数不匹配，不是 KLL 草图")
+        if version != _KLL_VERSION:
+            raise ValueError(f"不支持的版本 {version}")
+        offset = _KLL_HEADER.size
+        sizes = array('I')
+        sizes.frombytes(view[offset:offset + 4 * depth])
+        offset += 4 * depth
+        if sys.byteorder == 'big':
+            sizes.byteswap()
+        if len(view) != offset + 8 * sum(sizes):
+            raise ValueError("数据长度与头部不一致")
+        values = array('d')
+        values.frombytes(view[offset:])
+        if sys.byteorder == 'big':
+            values.byteswap()
+
+        sketch = cls(k, seed)
+        sketch._levels = []
+        start = 0
+        for size in sizes:
+            sketch._levels.append(values[start:start + size].tolist())
+            start += size
+        sketch._size = len(values)
+        sketch.count = count
+        if count:
+            sketch.minimum, sketch.maximum = minimum, maximum
+        sketch._update_max_size()
+        return sketch
+
+    def __repr__(self) -> str:
+        return f"KLLSketch(k={self.k}, count={self.count}, retained={self._size})"
+
+
+def variance(numbers: Optional[list[float]], summation: Optional[str] = None,
+             nan_policy: Optional[str] = None) -> float:
     """
     计算列表的方差
 
     方差衡量数据与其平均值的偏差程度。
     计算公式：方差 = Σ(xi - 平均值)² / n
 
+    默认对序列做两遍 C 层归约：sum() 求平均值，再用 sum(map(...)) 累加偏差平方，
+    不创建中间列表，也不经过 Python 层的循环（Welford 单次遍历只用于流式累加和合并）。
+    指定 summation 时改用修正的两遍算法，两个和都按所选策略累加。
+
     参数:
         numbers: 数字列表
+        summation: 求和策略，None（两遍 C 层归约）、'pairwise'、'neumaier' 或 'fsum'
+        nan_policy: 缺失值的处理方式，见 sum_numbers()
 
     返回:
-        方差，如果列表为空、None 或只有一个元素则返回 0
+        方差，如果列表为空、None 或只有一个元素（缺失值不计）则返回 0
 
     示例:
         >>> variance([1, 2, 3, 4, 5])
         2.0
     """
-    if not numbers or len(numbers) < 2:
+    if type(numbers) is list and summation is None and nan_policy is None:
+        return _two_pass_variance(numbers) if len(numbers) >= 2 else 0
+    _check_summation(summation)
+    if nan_policy is not None and numbers is not None:
+        numbers, propagate = _handle_missing(numbers, nan_policy)
+        if propagate:
+            return math.nan
+        if not hasattr(numbers, '__len__'):
+            if summation is None:
+                # 跳过缺失值的迭代器直接交给 Welford 单次遍历
+                return describe(numbers).variance
+            # 两遍算法需要序列
+            numbers = list(numbers)
+    if numbers is None or len(numbers) < 2:
         return 0
+    if summation is not None:
+        return _strategy_variance(numbers, summation)
 
-    # 步骤1: 计算平均值
-    avg = average(numbers)
+    arr = _as_ndarray(numbers)
+    if arr is not None:
+        return arr.var().item()
+    return _two_pass_variance(numbers)
 
-    # 步骤2: 计算每个数据与平均值的偏差平方
-    # 偏差平方 = (每个值 - 平均值)²
-    squared_deviations = [(x - avg) ** 2 for x in numbers]
 
-    # 步骤3: 计算偏差平方的平均值（即方差）
-    return sum(squared_deviations) / len(numbers)
+def _two_pass_variance(numbers) -> float:
+    """序列的总体方差：两趟都是 C 实现的 sum() + map()，比 Python 层的 Welford 循环快两倍以上"""
+    n = len(numbers)
+    mean = sum(numbers) / n
+    return sum(map(pow, map(sub, numbers, repeat(mean)), repeat(2))) / n
 
 
-def standard_deviation(numbers: Optional[list[float]]) -> float:
+def standard_deviation(numbers: Optional[list[float]], summation: Optional[str] = None,
+                       nan_policy: Optional[str] = None) -> float:
     """
     计算列表的标准差
 
@@ -142,20 +1288,1081 @@ def standard_deviation(numbers: Optional[list[float]]) -> float:
 
     参数:
         numbers: 数字列表
+        summation: 求和策略，见 variance()
+        nan_policy: 缺失值的处理方式，见 sum_numbers()
 
     返回:
-        标准差，如果列表为空、None 或只有一个元素则返回 0
+        标准差，如果列表为空、None 或只有一个元素（缺失值不计）则返回 0
 
     示例:
         >>> standard_deviation([1, 2, 3, 4, 5])
         约 1.414
     """
-    if not numbers or len(numbers) < 2:
+    if type(numbers) is list and summation is None and nan_policy is None:
+        return _two_pass_variance(numbers) ** 0.5 if len(numbers) >= 2 else 0
+    if nan_policy is not None:
+        return variance(numbers, summation, nan_policy) ** 0.5
+    _check_summation(summation)
+    if numbers is None or len(numbers) < 2:
         return 0
+    if summation is not None:
+        return _strategy_variance(numbers, summation) ** 0.5
 
+    arr = _as_ndarray(numbers)
+    if arr is not None:
+        return arr.std().item()
     # 标准差 = 方差的平方根
-    var = variance(numbers)
-    return var ** 0.5  # 或者使用: var ** 0.5 或 math.sqrt(var)
+    return _two_pass_variance(numbers) ** 0.5
+
+
+# ---------------------------------------------------------------------------
+# 流式累加器
+#
+# 上面的函数都需要一个完整的列表。对于生成器、网络流这类无界数据，
+# 下面的累加器每次只接收一个（或一批）数字，内存占用是 O(1)，
+# 并且可以 merge()：多个分片/线程各自累加，最后合并得到同样的结果。
+#
+# 累加器可以 serialize() 成定长的 bytes（与数据量无关），在进程/机器之间传递部分状态，
+# 不必传递原始数据再集中重算。格式与 KLLSketch 相同：小端、4 字节魔数 + 版本号开头，
+# deserialize() 直接在 memoryview 上解析，不复制输入。
+# ---------------------------------------------------------------------------
+
+_STATE_VERSION = 1
+_STATS_MAGIC = b'RSTA'
+_MINMAX_MAGIC = b'RMMX'
+# 魔数、版本、标志位、个数、总和、补偿项、平均值、偏差平方和；
+# 总和与补偿项是整数（整数数据）时按 int64 保存，保证反序列化后仍是精确的 int
+_STATS_FLOAT = struct.Struct('<4sBBxxQdddd')
+_STATS_INT = struct.Struct('<4sBBxxQqqdd')
+# 魔数、版本、标志位、个数、最小值、最大值
+_MINMAX_FLOAT = struct.Struct('<4sBBxxQdd')
+_MINMAX_INT = struct.Struct('<4sBBxxQqq')
+# 标志位：最低位表示数值按 int64 保存，高 4 位是 nan_policy 在 _STATE_POLICIES 中的下标
+_STATE_INT = 0x01
+_STATE_POLICIES = (None,) + NAN_POLICIES
+
+
+def _fits_int64(*values) -> bool:
+    return all(type(v) is int and -(1 << 63) <= v < (1 << 63) for v in values)
+
+
+def _state_flags(nan_policy: Optional[str], as_int: bool) -> int:
+    return _STATE_POLICIES.index(nan_policy) << 4 | (_STATE_INT if as_int else 0)
+
+
+def _unpack_state(data, magic: bytes, float_format: struct.Struct,
+                  int_format: struct.Struct) -> tuple[int, tuple]:
+    """校验魔数、版本和长度，返回 (标志位, 其余字段)"""
+    view = memoryview(data).cast('B')
+    if len(view) != float_format.size:
+        raise ValueError(f"数据长度应为 {float_format.size} 字节，实际为 {len(view)}")
+    fields = float_format.unpack_from(view)
+    if fields[0] != magic:
+        raise ValueError(f"魔数不匹配，不是 {magic.decode()} 状态")
+    if fields[1] != _STATE_VERSION:
+        raise ValueError(f"不支持的版本 {fields[1]}")
+    flags = fields[2]
+    if flags >> 4 >= len(_STATE_POLICIES):
+        raise ValueError(f"无效的标志位 {flags:#x}")
+    if flags & _STATE_INT:
+        fields = int_format.unpack_from(view)
+    return flags, fields[3:]
+
+
+class RunningStats:
+    """
+    可合并的流式统计累加器：个数、总和、平均值、方差、标准差
+
+    内部使用 Neumaier 补偿求和与 Welford 在线算法（与 describe() 相同），
+    合并时使用 Chan 等人的并行方差公式。
+
+    参数:
+        numbers: 初始数据，可选
+        nan_policy: 缺失值（None / NaN）的处理方式，见 sum_numbers()；
+                    'propagate' 时缺失值按 NaN 累加，结果随之变成 NaN
+
+    示例:
+        >>> stats = RunningStats()
+        >>> stats.extend([1, 2, 3])
+        >>> stats.push(4)
+        >>> stats.mean, stats.variance
+        (2.5, 1.25)
+    """
+
+    __slots__ = ('count', '_total', '_compensation', '_mean', '_m2', 'nan_policy')
+
+    def __init__(self, numbers=None, nan_policy: Optional[str] = None):
+        _check_nan_policy(nan_policy)
+        self.nan_policy = nan_policy
+        self.count = 0
+        self._total = 0
+        self._compensation = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        if numbers is not None:
+            self.extend(numbers)
+
+    def push(self, x: float) -> None:
+        """加入一个数字"""
+        if self.nan_policy is not None and (x is None or x != x):
+            if _skip_missing(self.nan_policy):
+                return
+            x = math.nan
+        self.count += 1
+        total = self._total
+        t = total + x
+        if abs(total) >= abs(x):
+            self._compensation += (total - t) + x
+        else:
+            self._compensation += (x - t) + total
+        self._total = t
+
+        delta = x - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (x - self._mean)
+
+    def extend(self, numbers) -> None:
+        """加入一批数字（任意可迭代对象，只遍历一次）"""
+        if self.nan_policy is not None:
+            numbers = _missing_stream(numbers, self.nan_policy)
+        arr = _as_ndarray(numbers)
+        if arr is not None:
+            if arr.size:
+                self.merge(RunningStats._from_array(arr))
+            return
+
+        # 把属性读到局部变量里循环，比逐个调用 push() 快得多
+        count = self.count
+        total = self._total
+        compensation = self._compensation
+        mean = self._mean
+        m2 = self._m2
+        for x in numbers:
+            count += 1
+            t = total + x
+            if abs(total) >= abs(x):
+                compensation += (total - t) + x
+            else:
+                compensation += (x - t) + total
+            total = t
+            delta = x - mean
+            mean += delta / count
+            m2 += delta * (x - mean)
+        self.count = count
+        self._total = total
+        self._compensation = compensation
+        self._mean = mean
+        self._m2 = m2
+
+    def remove(self, x: float) -> None:
+        """
+        撤销一次 push(x)：从累加器中去掉一个之前加入过的数字
+
+        用于元素会被删除的容器（例如 SortedSeries）。补偿求和按 -x 累加，
+        方差用 Welford 公式的逆运算；删空时所有状态精确归零。
+
+        参数:
+            x: 之前加入过的数字
+        """
+        if self.count <= 1:
+            if self.count == 0:
+                raise ValueError("RunningStats 中没有数据可以删除")
+            self.count = 0
+            self._total = self._compensation = 0
+            self._mean = self._m2 = 0.0
+            return
+        self.count -= 1
+        total = self._total
+        t = total - x
+        if abs(total) >= abs(x):
+            self._compensation += (total - t) - x
+        else:
+            self._compensation += (-x - t) + total
+        self._total = t
+
+        mean = self._mean
+        self._mean = mean - (x - mean) / self.count
+        # 舍入误差可能让偏差平方和略小于 0
+        self._m2 = max(self._m2 - (x - mean) * (x - self._mean), 0.0)
+
+    @classmethod
+    def _from_array(cls, arr) -> 'RunningStats':
+        """用 NumPy 向量化计算一批数据的累加器状态"""
+        stats = cls()
+        stats.count = arr.size
+        stats._total = _array_sum(arr)
+        stats._mean = arr.mean().item()
+        stats._m2 = arr.var().item() * arr.size
+        return stats
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        """
+        合并另一个累加器的结果（原地修改并返回 self）
+
+        参数:
+            other: 另一个 RunningStats，例如另一个分片的部分结果
+
+        返回:
+            self，方便链式调用
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count = other.count
+            self._total = other._total
+            self._compensation = other._compensation
+            self._mean = other._mean
+            self._m2 = other._m2
+            return self
+
+        n = self.count + other.count
+        delta = other._mean - self._mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / n
+        self._mean += delta * other.count / n
+        self.count = n
+
+        total = self._total
+        t = total + other._total
+        if abs(total) >= abs(other._total):
+            self._compensation += (total - t) + other._total
+        else:
+            self._compensation += (other._total - t) + total
+        self._total = t
+        self._compensation += other._compensation
+        return self
+
+    @property
+    def total(self) -> float:
+        """总和，与 sum_numbers() 一致"""
+        return self._total + self._compensation
+
+    @property
+    def mean(self) -> float:
+        """平均值，与 average() 一致，没有数据时返回 0"""
+        return self.total / self.count if self.count else 0
+
+    @property
+    def variance(self) -> float:
+        """总体方差，与 variance() 一致，少于两个数据时返回 0"""
+        return self._m2 / self.count if self.count >= 2 else 0
+
+    @property
+    def sample_variance(self) -> float:
+        """样本方差（除以 n-1），少于两个数据时返回 0"""
+        return self._m2 / (self.count - 1) if self.count >= 2 else 0
+
+    @property
+    def stddev(self) -> float:
+        """总体标准差，与 standard_deviation() 一致"""
+        return self.variance ** 0.5
+
+    def serialize(self) -> bytes:
+        """
+        序列化成定长的 48 字节，与累加过多少数据无关
+
+        格式（小端）：魔数 'RSTA'、版本、标志位、个数、总和、补偿项、平均值、偏差平方和。
+        整数数据的总和在 int64 范围内时按整数保存（恢复后仍是精确的 int），超出时按 float64 保存。
+        """
+        as_int = _fits_int64(self._total, self._compensation)
+        layout = _STATS_INT if as_int else _STATS_FLOAT
+        return layout.pack(_STATS_MAGIC, _STATE_VERSION, _state_flags(self.nan_policy, as_int),
+                           self.count, self._total, self._compensation, self._mean, self._m2)
+
+    @classmethod
+    def deserialize(cls, data) -> 'RunningStats':
+        """
+        从 serialize() 的结果恢复累加器
+
+        参数:
+            data: bytes、bytearray 或 memoryview（例如一段更大缓冲区的切片，不会被复制）
+
+        返回:
+            RunningStats，可以继续 push() / merge()
+        """
+        flags, fields = _unpack_state(data, _STATS_MAGIC, _STATS_FLOAT, _STATS_INT)
+        stats = cls(nan_policy=_STATE_POLICIES[flags >> 4])
+        stats.count, stats._total, stats._compensation, stats._mean, stats._m2 = fields
+        return stats
+
+    def __repr__(self) -> str:
+        return (f"RunningStats(count={self.count}, mean={self.mean}, "
+                f"variance={self.variance})")
+
+
+class RunningMinMax:
+    """
+    可合并的流式最小值/最大值累加器
+
+    参数:
+        numbers: 初始数据，可选
+        nan_policy: 缺失值的处理方式，见 sum_numbers()；'propagate' 时遇到缺失值后极值都是 NaN
+
+    示例:
+        >>> mm = RunningMinMax([3, 1, 4])
+        >>> mm.push(9)
+        >>> mm.minimum, mm.maximum
+        (1, 9)
+    """
+
+    __slots__ = ('count', '_min', '_max', 'nan_policy')
+
+    def __init__(self, numbers=None, nan_policy: Optional[str] = None):
+        _check_nan_policy(nan_policy)
+        self.nan_policy = nan_policy
+        self.count = 0
+        self._min = None
+        self._max = None
+        if numbers is not None:
+            self.extend(numbers)
+
+    def push(self, x: float) -> None:
+        """加入一个数字"""
+        if self.nan_policy is not None and (x is None or x != x):
+            if not _skip_missing(self.nan_policy):
+                self._min = self._max = math.nan
+                self.count += 1
+            return
+        if self.count == 0:
+            self._min = self._max = x
+        elif x < self._min:
+            self._min = x
+        elif x > self._max:
+            self._max = x
+        self.count += 1
+
+    def extend(self, numbers) -> None:
+        """加入一批数字（任意可迭代对象，只遍历一次）"""
+        if self.nan_policy is not None:
+            numbers = _missing_stream(numbers, self.nan_policy)
+        arr = _as_ndarray(numbers)
+        if arr is not None:
+            if arr.size:
+                self._update(arr.min().item(), arr.max().item(), arr.size)
+            return
+        if hasattr(numbers, '__len__'):
+            # 序列可以直接交给 C 实现的 min()/max()
+            if len(numbers):
+                self._update(min(numbers), max(numbers), len(numbers))
+            return
+        for x in numbers:
+            self.push(x)
+
+    def merge(self, other: 'RunningMinMax') -> 'RunningMinMax':
+        """合并另一个累加器的结果（原地修改并返回 self）"""
+        if other.count:
+            self._update(other._min, other._max, other.count)
+        return self
+
+    def _update(self, low: float, high: float, count: int) -> None:
+        if low != low or high != high:
+            # NaN（来自 'propagate'）与任何数比较都是 False，必须显式保留
+            self._min = self._max = math.nan
+        elif self.count == 0:
+            self._min, self._max = low, high
+        else:
+            if low < self._min:
+                self._min = low
+            if high > self._max:
+                self._max = high
+        self.count += count
+
+    @property
+    def minimum(self) -> float:
+        """最小值，与 find_min() 一致，没有数据时返回 0"""
+        return self._min if self.count else 0
+
+    @property
+    def maximum(self) -> float:
+        """最大值，与 find_max() 一致，没有数据时返回 0"""
+        return self._max if self.count else 0
+
+    def serialize(self) -> bytes:
+        """
+        序列化成定长的 32 字节
+
+        格式（小端）：魔数 'RMMX'、版本、标志位、个数、最小值、最大值。
+        极值都是 int64 范围内的整数时按整数保存，否则按 float64 保存。
+        """
+        as_int = self.count > 0 and _fits_int64(self._min, self._max)
+        layout = _MINMAX_INT if as_int else _MINMAX_FLOAT
+        low, high = (self._min, self._max) if self.count else (math.nan, math.nan)
+        return layout.pack(_MINMAX_MAGIC, _STATE_VERSION, _state_flags(self.nan_policy, as_int),
+                           self.count, low, high)
+
+    @classmethod
+    def deserialize(cls, data) -> 'RunningMinMax':
+        """从 serialize() 的结果恢复累加器（data 可以是 memoryview，不会被复制）"""
+        flags, (count, low, high) = _unpack_state(data, _MINMAX_MAGIC, _MINMAX_FLOAT, _MINMAX_INT)
+        extremes = cls(nan_policy=_STATE_POLICIES[flags >> 4])
+        if count:
+            extremes.count, extremes._min, extremes._max = count, low, high
+        return extremes
+
+    def __repr__(self) -> str:
+        return f"RunningMinMax(count={self.count}, minimum={self.minimum}, maximum={self.maximum})"
+
+
+# ---------------------------------------------------------------------------
+# 滑动窗口统计
+#
+# 对每个窗口切片分别调用 average()/median() 是 O(n·w) 的，还要为每个窗口复制一次列表。
+# 下面的生成器在窗口滑动时只做增量更新：
+# - 均值/标准差：窗口内 Welford 状态的"替换"更新，O(1)
+# - 最小值/最大值：单调双端队列，均摊 O(1)
+# - 中位数：双堆 + 延迟删除，O(log w)
+# 输入可以是任意可迭代对象（包括无界生成器），每凑满一个窗口产出一个结果。
+# ---------------------------------------------------------------------------
+
+def _check_window(window: int) -> None:
+    if not isinstance(window, int) or window < 1:
+        raise ValueError(f"窗口大小必须是正整数，实际为 {window!r}")
+
+
+def _rolling_moments(numbers, window: int):
+    """逐窗口产出 (平均值, 总体方差)，供 rolling_mean / rolling_std 共用"""
+    _check_window(window)
+    if numbers is None:
+        return
+    buffer = deque()
+    mean = 0.0
+    m2 = 0.0
+    for x in numbers:
+        if len(buffer) < window:
+            # 窗口未满：普通的 Welford 增加
+            buffer.append(x)
+            delta = x - mean
+            mean += delta / len(buffer)
+            m2 += delta * (x - mean)
+        else:
+            # 窗口已满：用新值替换最旧的值
+            old = buffer.popleft()
+            buffer.append(x)
+            new_mean = mean + (x - old) / window
+            m2 += (x - old) * (x - new_mean + old - mean)
+            mean = new_mean
+        if len(buffer) == window:
+            # 舍入误差可能让 m2 略小于 0
+            yield mean, max(m2, 0.0) / window
+
+
+def rolling_mean(numbers, window: int):
+    """
+    滑动窗口平均值（生成器）
+
+    参数:
+        numbers: 数字的可迭代对象（列表、生成器等）
+        window: 窗口大小
+
+    返回:
+        依次产出每个完整窗口的平均值，共 n - window + 1 个
+
+    示例:
+        >>> list(rolling_mean([1, 2, 3, 4, 5], 3))
+        [2.0, 3.0, 4.0]
+    """
+    for mean, _ in _rolling_moments(numbers, window):
+        yield mean
+
+
+def rolling_std(numbers, window: int):
+    """
+    滑动窗口总体标准差（生成器），与对每个窗口调用 standard_deviation() 一致
+
+    参数:
+        numbers: 数字的可迭代对象
+        window: 窗口大小
+
+    返回:
+        依次产出每个完整窗口的标准差
+
+    示例:
+        >>> list(rolling_std([1, 1, 3, 3], 2))
+        [0.0, 1.0, 0.0]
+    """
+    for _, var in _rolling_moments(numbers, window):
+        yield var ** 0.5
+
+
+def _rolling_extreme(numbers, window: int, better):
+    """
+    单调双端队列求滑动窗口极值
+
+    队列中保存 (下标, 值)，值按"better"关系单调排列，
+    队首永远是当前窗口的极值；新值进来时把队尾不如它的值全部弹出。
+    """
+    _check_window(window)
+    if numbers is None:
+        return
+    candidates = deque()
+    for i, x in enumerate(numbers):
+        while candidates and not better(candidates[-1][1], x):
+            candidates.pop()
+        candidates.append((i, x))
+        if candidates[0][0] <= i - window:
+            candidates.popleft()
+        if i >= window - 1:
+            yield candidates[0][1]
+
+
+def rolling_min(numbers, window: int):
+    """
+    滑动窗口最小值（生成器），每个元素均摊 O(1)
+
+    示例:
+        >>> list(rolling_min([4, 2, 5, 1, 3], 2))
+        [2, 2, 1, 1]
+    """
+    return _rolling_extreme(numbers, window, lambda kept, new: kept < new)
+
+
+def rolling_max(numbers, window: int):
+    """
+    滑动窗口最大值（生成器），每个元素均摊 O(1)
+
+    示例:
+        >>> list(rolling_max([4, 2, 5, 1, 3], 2))
+        [4, 5, 5, 3]
+    """
+    return _rolling_extreme(numbers, window, lambda kept, new: kept > new)
+
+
+class _SlidingMedian:
+    """
+    双堆滑动中位数
+
+    low 是存放较小一半的最大堆（存负值），high 是存放较大一半的最小堆。
+    移出窗口的值不立即从堆里删除，而是记在 pending 里，
+    等它浮到堆顶时再弹出（延迟删除），这样每次更新都是 O(log w)。
+    """
+
+    __slots__ = ('low', 'high', 'pending', 'low_size', 'high_size')
+
+    def __init__(self):
+        self.low = []
+        self.high = []
+        self.pending = {}
+        self.low_size = 0   # low 中有效元素个数（不含待删除的）
+        self.high_size = 0
+
+    def _prune(self, heap, sign):
+        # 弹出堆顶所有已被标记删除的值
+        while heap:
+            value = sign * heap[0]
+            if self.pending.get(value):
+                self.pending[value] -= 1
+                heapq.heappop(heap)
+            else:
+                break
+
+    def _rebalance(self):
+        # 保持 low_size == high_size 或 low_size == high_size + 1
+        if self.low_size > self.high_size + 1:
+            heapq.heappush(self.high, -heapq.heappop(self.low))
+            self.low_size -= 1
+            self.high_size += 1
+            self._prune(self.low, -1)
+        elif self.low_size < self.high_size:
+            heapq.heappush(self.low, -heapq.heappop(self.high))
+            self.high_size -= 1
+            self.low_size += 1
+            self._prune(self.high, 1)
+
+    def add(self, x):
+        if not self.low or x <= -self.low[0]:
+            heapq.heappush(self.low, -x)
+            self.low_size += 1
+        else:
+            heapq.heappush(self.high, x)
+            self.high_size += 1
+        self._rebalance()
+
+    def remove(self, x):
+        self.pending[x] = self.pending.get(x, 0) + 1
+        if x <= -self.low[0]:
+            self.low_size -= 1
+            if x == -self.low[0]:
+                self._prune(self.low, -1)
+        else:
+            self.high_size -= 1
+            if self.high and x == self.high[0]:
+                self._prune(self.high, 1)
+        self._rebalance()
+
+    def median(self):
+        if self.low_size > self.high_size:
+            return -self.low[0]
+        return (-self.low[0] + self.high[0]) / 2
+
+
+def rolling_median(numbers, window: int):
+    """
+    滑动窗口中位数（生成器），与对每个窗口调用 median() 一致
+
+    参数:
+        numbers: 数字的可迭代对象
+        window: 窗口大小
+
+    返回:
+        依次产出每个完整窗口的中位数
+
+    示例:
+        >>> list(rolling_median([5, 1, 4, 2, 3], 3))
+        [4, 2, 3]
+    """
+    _check_window(window)
+    if numbers is None:
+        return
+    buffer = deque()
+    tracker = _SlidingMedian()
+    for x in numbers:
+        buffer.append(x)
+        tracker.add(x)
+        if len(buffer) > window:
+            tracker.remove(buffer.popleft())
+        if len(buffer) == window:
+            yield tracker.median()
+
+
+# ---------------------------------------------------------------------------
+# 批量 / 列式统计
+#
+# 成千上万条短序列（每台主机、每个指标一条）逐条调用 median()/variance()
+# 时，函数调用和装饰器的固定开销会超过计算本身。
+# 下面的函数一次处理全部序列，结果按列返回（每个统计量一个数组），
+# 而不是每条序列一个字典。
+#
+# 数据可以是"序列的列表"，也可以是紧凑的 ragged 布局：
+#   values  = 所有序列首尾相接的一维数组
+#   offsets = 长度为 k+1 的下标数组，第 i 条序列是 values[offsets[i]:offsets[i+1]]
+# ---------------------------------------------------------------------------
+
+class StatsColumns(NamedTuple):
+    """
+    describe_many() / describe_ragged() 的列式结果
+
+    每个字段都是长度为序列条数的数组（纯 Python 路径为 array.array，
+    NumPy 路径为 ndarray），第 i 个元素对应第 i 条序列。
+    空序列的所有统计量为 0，与 describe() 的约定一致。
+    """
+    count: array
+    total: array
+    mean: array
+    minimum: array
+    maximum: array
+    variance: array
+    sample_variance: array
+    stddev: array
+    median: array
+
+
+def _describe_columns_python(series_iter, k: int, with_median: bool) -> StatsColumns:
+    """纯 Python 紧凑循环：逐条序列计算，但不经过任何装饰器和函数分派"""
+    count = array('q', bytes(8 * k))
+    columns = [array('d', bytes(8 * k)) for _ in range(8)]
+    total_col, mean_col, min_col, max_col, var_col, svar_col, std_col, median_col = columns
+
+    for i, s in enumerate(series_iter):
+        n = len(s) if s is not None else 0
+        if n == 0:
+            continue
+        total = sum(s)
+        mean = total / n
+        count[i] = n
+        total_col[i] = total
+        mean_col[i] = mean
+        min_col[i] = min(s)
+        max_col[i] = max(s)
+        if n >= 2:
+            m2 = sum([(x - mean) * (x - mean) for x in s])
+            var_col[i] = m2 / n
+            svar_col[i] = m2 / (n - 1)
+            std_col[i] = (m2 / n) ** 0.5
+        if with_median:
+            ordered = sorted(s)
+            mid = n // 2
+            median_col[i] = ordered[mid] if n % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+    return StatsColumns(count, *columns)
+
+
+def _describe_columns_numpy(values, offsets, with_median: bool) -> StatsColumns:
+    """NumPy 向量化内核：所有序列的每个统计量各用一次向量运算得到"""
+    np = _numpy()
+    offsets = np.asarray(offsets, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)[offsets[0]:offsets[-1]]
+    starts = offsets[:-1] - offsets[0]
+    counts = np.diff(offsets)
+    k = counts.size
+    nonempty = counts > 0
+    # 每个元素属于第几条序列
+    segment = np.repeat(np.arange(k), counts)
+
+    total = np.bincount(segment, weights=values, minlength=k)
+    mean = np.divide(total, counts, out=np.zeros(k), where=nonempty)
+    deviation = values - mean[segment]
+    m2 = np.bincount(segment, weights=deviation * deviation, minlength=k)
+    multi = counts >= 2
+    var = np.divide(m2, counts, out=np.zeros(k), where=multi)
+    svar = np.divide(m2, counts - 1, out=np.zeros(k), where=multi)
+
+    minimum = np.zeros(k)
+    maximum = np.zeros(k)
+    if nonempty.any():
+        # 去掉空序列后，相邻起点之间正好是一条非空序列
+        minimum[nonempty] = np.minimum.reduceat(values, starts[nonempty])
+        maximum[nonempty] = np.maximum.reduceat(values, starts[nonempty])
+
+    median = np.zeros(k)
+    if with_median and nonempty.any():
+        # 先按序列号、再按值排序，每条序列在自己的区间内有序
+        ordered = values[np.lexsort((values, segment))]
+        lo = (starts + (counts - 1) // 2)[nonempty]
+        hi = (starts + counts // 2)[nonempty]
+        median[nonempty] = (ordered[lo] + ordered[hi]) / 2
+
+    return StatsColumns(counts, total, mean, minimum, maximum, var, svar, np.sqrt(var), median)
+
+
+def describe_ragged(values, offsets, with_median: bool = True) -> StatsColumns:
+    """
+    对 ragged 布局（values + offsets）中的每条序列计算统计量
+
+    参数:
+        values: 所有序列首尾相接的一维数字序列
+        offsets: 长度为 k+1 的非递减下标序列，第 i 条序列是 values[offsets[i]:offsets[i+1]]
+        with_median: 是否计算中位数列（需要排序，不需要时关掉更快）
+
+    返回:
+        StatsColumns，每个字段长度为 k
+
+    示例:
+        >>> cols = describe_ragged([1, 2, 3, 10, 20], [0, 3, 5])
+        >>> list(cols.mean), list(cols.median)
+        ([2.0, 15.0], [2.0, 15.0])
+    """
+    if _numpy() is not None:
+        return _describe_columns_numpy(values, offsets, with_median)
+    if not isinstance(values, (list, memoryview)):
+        # 转成 memoryview 后切片不复制；不支持缓冲区协议的输入按原样切片
+        try:
+            values = memoryview(values)
+        except TypeError:
+            pass
+    k = len(offsets) - 1
+    series_iter = (values[offsets[i]:offsets[i + 1]] for i in range(k))
+    return _describe_columns_python(series_iter, k, with_median)
+
+
+def describe_many(series_list, with_median: bool = True) -> StatsColumns:
+    """
+    一次计算多条序列的统计量，结果按列返回
+
+    参数:
+        series_list: 序列的列表，例如 [[1, 2, 3], [10, 20], []]
+        with_median: 是否计算中位数列
+
+    返回:
+        StatsColumns，第 i 个元素对应第 i 条序列
+
+    示例:
+        >>> cols = describe_many([[1, 2, 3], [10, 20]])
+        >>> list(cols.count), list(cols.variance)
+        ([3, 2], [0.6666666666666666, 25.0])
+    """
+    if series_list is None:
+        series_list = []
+    np = _numpy()
+    if np is not None:
+        lengths = [len(s) if s is not None else 0 for s in series_list]
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        values = np.fromiter(chain.from_iterable(s for s in series_list if s is not None),
+                             dtype=np.float64, count=int(offsets[-1]))
+        return _describe_columns_numpy(values, offsets, with_median)
+    return _describe_columns_python(series_list, len(series_list), with_median)
+
+
+# ---------------------------------------------------------------------------
+# 直方图与频数分布
+#
+# histogram() 先确定桶边界，再用一趟遍历给每个数据找桶：
+# bisect_right 和 Counter 都是 C 实现，map(partial(bisect_right, 边界), 数据) 整个循环
+# 不经过 Python 字节码，也不需要排序；桶号直接由边界列表比较得出，
+# 不会因为 (x - lo) / width 的舍入误差把恰好落在边界上的值分错桶。
+# 缓冲区输入在安装了 NumPy 时改用 searchsorted + bincount，语义相同。
+# ---------------------------------------------------------------------------
+
+HISTOGRAM_SCALES = ('linear', 'log', 'quantile')
+
+
+class Histogram(NamedTuple):
+    """
+    histogram() 的结果
+
+    字段:
+        counts: 每个桶的数据个数，array('Q')
+        edges: 桶边界，长度为桶数 + 1。第 i 个桶是 [edges[i], edges[i+1])，
+               最后一个桶包含右端点
+    """
+    counts: array
+    edges: list
+
+    @property
+    def total(self) -> int:
+        """落在各个桶里的数据总数（不含范围之外的数据）"""
+        return sum(self.counts)
+
+
+class FrequencyTable(NamedTuple):
+    """
+    frequency_table() 的结果，按列保存
+
+    字段:
+        values: 不同的取值
+        counts: 对应的出现次数，array('Q')
+    """
+    values: list
+    counts: array
+
+    @property
+    def total(self) -> int:
+        """数据总数"""
+        return sum(self.counts)
+
+    @property
+    def relative(self) -> list[float]:
+        """相对频率（出现次数 / 总数）"""
+        total = self.total
+        return [freq / total for freq in self.counts]
+
+    @property
+    def cumulative(self) -> array:
+        """按当前顺序的累计次数"""
+        return array('Q', accumulate(self.counts))
+
+
+def _linear_edges(lo: float, hi: float, bins: int) -> list[float]:
+    """[lo, hi] 上的等宽边界，两端精确等于 lo 和 hi"""
+    width = (hi - lo) / bins
+    edges = [float(lo) + width * i for i in range(bins)]
+    edges.append(float(hi))
+    return edges
+
+
+def _log_edges(lo: float, hi: float, bins: int) -> list[float]:
+    """[lo, hi] 上的等比边界"""
+    if lo <= 0:
+        raise ValueError(f"对数刻度要求数据范围为正数，实际下界为 {lo}")
+    ratio = (hi / lo) ** (1 / bins)
+    edges = [float(lo) * ratio ** i for i in range(bins)]
+    edges.append(float(hi))
+    return edges
+
+
+def _quantile_edges(data, bins: int) -> list[float]:
+    """按分位数划分的边界：每个桶的数据个数大致相同，数据为空时返回空列表"""
+    return quantiles(data, [i / bins for i in range(bins + 1)])
+
+
+def _without_nan(numbers, value_range=None):
+    """去掉 NaN；给出 value_range 时同时去掉范围之外的值"""
+    arr = _as_ndarray(numbers)
+    if value_range is None:
+        if arr is not None:
+            return arr[arr == arr]
+        return [x for x in numbers if x == x]
+    lo, hi = value_range
+    if arr is not None:
+        return arr[(arr >= lo) & (arr <= hi)]
+    return [x for x in numbers if lo <= x <= hi]
+
+
+def _data_range(numbers) -> tuple[float, float]:
+    """
+    数据的 (最小值, 最大值)，忽略 NaN
+
+    空数据为 (0, 1)，所有值相等时向两侧各扩展 0.5（与 numpy.histogram 一致）。
+    """
+    arr = _as_ndarray(numbers)
+    if arr is not None:
+        lo, hi = (arr.min().item(), arr.max().item()) if arr.size else (0.0, 1.0)
+    else:
+        lo, hi = (min(numbers), max(numbers)) if len(numbers) else (0.0, 1.0)
+    if lo != lo or hi != hi:
+        # 含 NaN：NumPy 的 min/max 返回 NaN，min()/max() 的结果与 NaN 的位置有关
+        return _data_range(_without_nan(numbers))
+    if not (math.isfinite(lo) and math.isfinite(hi)):
+        raise ValueError(f"数据范围 [{lo}, {hi}] 不是有限值，请指定 range")
+    if lo == hi:
+        return lo - 0.5, hi + 0.5
+    return lo, hi
+
+
+def _bin_counts(numbers, edges: list) -> array:
+    """一趟遍历统计每个桶的数据个数，范围之外的数据和 NaN 不计入"""
+    bins = len(edges) - 1
+    # 把最后一条边界往上挪一个 ulp，让等于右端点的值落进最后一个桶
+    search = edges[:-1] + [math.nextafter(edges[-1], math.inf)]
+    arr = _as_ndarray(numbers)
+    if arr is not None:
+        np = _numpy()
+        index = np.searchsorted(np.asarray(search, dtype=np.float64), arr, side='right')
+        tally = np.bincount(index, minlength=bins + 2)[1:bins + 1]
+        counts = array('Q')
+        counts.frombytes(tally.astype(np.uint64).tobytes())
+        return counts
+
+    counts = array('Q', bytes(8 * bins))
+    # 桶号 0 表示小于下界，bins + 1 表示大于上界（NaN 与任何值比较都为假，也落在这里）
+    for index, freq in Counter(map(partial(bisect_right, search), numbers)).items():
+        if 0 < index <= bins:
+            counts[index - 1] = freq
+    return counts
+
+
+def histogram(numbers, bins=10, range: Optional[tuple[float, float]] = None,
+              scale: str = 'linear') -> Histogram:
+    """
+    计算直方图
+
+    参数:
+        numbers: 数字列表、缓冲区（array.array、memoryview、NumPy 数组）或任意可迭代对象
+        bins: 桶数；也可以直接给出递增的边界序列（此时忽略 range 和 scale）
+        range: (下界, 上界)，范围之外的数据不计入；默认取数据的最小值和最大值
+        scale: 'linear' 等宽桶，'log' 等比桶（范围必须为正），
+               'quantile' 按分位数划分（每个桶的数据个数大致相同）
+
+    返回:
+        Histogram(counts, edges)，counts 是 array('Q')；NaN 不计入任何桶
+
+    示例:
+        >>> h = histogram([1, 2, 2, 3, 3, 3, 4], bins=3)
+        >>> list(h.counts), h.edges
+        ([1, 2, 4], [1.0, 2.0, 3.0, 4.0])
+
+    说明:
+        指定了 range 的等宽/等比直方图只遍历一次数据，生成器等流式输入也不会被收集；
+        否则需要先求出范围或分位数，一次性的可迭代对象会先转成列表。
+    """
+    if scale not in HISTOGRAM_SCALES:
+        raise ValueError(f"scale 必须是 {HISTOGRAM_SCALES} 之一，而不是 {scale!r}")
+    if numbers is None:
+        numbers = []
+
+    if not isinstance(bins, int):
+        edges = list(bins)
+        if len(edges) < 2 or any(a > b for a, b in zip(edges, edges[1:])):
+            raise ValueError("边界序列至少要有两个元素，并且单调不减")
+        return Histogram(_bin_counts(numbers, edges), edges)
+
+    if bins < 1:
+        raise ValueError(f"桶数必须是正整数，实际为 {bins!r}")
+    if range is not None:
+        lo, hi = range
+        if not lo < hi:
+            raise ValueError(f"range 的下界必须小于上界，实际为 {range!r}")
+
+    if scale == 'quantile':
+        data = _without_nan(numbers, range)
+        edges = _quantile_edges(data, bins)
+        if not edges:
+            edges = _linear_edges(*(range or (0.0, 1.0)), bins)
+        elif range is not None:
+            edges[0], edges[-1] = lo, hi
+        return Histogram(_bin_counts(data, edges), edges)
+
+    if range is None:
+        numbers = _as_sequence(numbers)
+        lo, hi = _data_range(numbers)
+    edges = _log_edges(lo, hi, bins) if scale == 'log' else _linear_edges(lo, hi, bins)
+    return Histogram(_bin_counts(numbers, edges), edges)
+
+
+def _tally(numbers) -> tuple[list, list]:
+    """统计每个不同取值的出现次数，按第一次出现的顺序返回 (取值列表, 次数列表)"""
+    arr = _as_ndarray(numbers)
+    if arr is not None:
+        np = _numpy()
+        values, first, counts = np.unique(arr, return_index=True, return_counts=True)
+        order = np.argsort(first, kind='stable')
+        return values[order].tolist(), counts[order].tolist()
+    tally = Counter(numbers)
+    return list(tally), list(tally.values())
+
+
+@validate_non_empty(return_value=0)
+def mode(numbers: Optional[list[float]]) -> float:
+    """
+    众数：出现次数最多的值
+
+    参数:
+        numbers: 数字列表、缓冲区或任意可迭代对象
+
+    返回:
+        众数；有多个时返回最先出现的一个（与 statistics.mode 一致），数据为空时返回 0
+
+    示例:
+        >>> mode([1, 2, 2, 3, 3])
+        2
+    """
+    values, counts = _tally(numbers)
+    if not values:
+        return 0
+    return values[counts.index(max(counts))]
+
+
+@validate_non_empty(return_value=[])
+def multimode(numbers: Optional[list[float]]) -> list:
+    """
+    所有众数
+
+    参数:
+        numbers: 数字列表、缓冲区或任意可迭代对象
+
+    返回:
+        出现次数并列最多的所有值，按第一次出现的顺序；数据为空时返回空列表
+
+    示例:
+        >>> multimode([1, 2, 2, 3, 3])
+        [2, 3]
+    """
+    values, counts = _tally(numbers)
+    if not values:
+        return []
+    best = max(counts)
+    return [value for value, freq in zip(values, counts) if freq == best]
+
+
+FREQUENCY_ORDERS = ('value', 'count', 'first')
+
+
+def frequency_table(numbers, order: str = 'value') -> FrequencyTable:
+    """
+    频数分布表
+
+    参数:
+        numbers: 数字列表、缓冲区或任意可迭代对象（只遍历一次）
+        order: 'value' 按取值升序，'count' 按次数降序（次数相同时按第一次出现的顺序），
+               'first' 按第一次出现的顺序
+
+    返回:
+        FrequencyTable(values, counts)，另有 total / relative / cumulative 属性
+
+    示例:
+        >>> table = frequency_table([3, 1, 3, 2, 3])
+        >>> table.values, list(table.counts), list(table.cumulative)
+        ([1, 2, 3], [1, 1, 3], [1, 2, 5])
+    """
+    if order not in FREQUENCY_ORDERS:
+        raise ValueError(f"order 必须是 {FREQUENCY_ORDERS} 之一，而不是 {order!r}")
+    if numbers is None:
+        return FrequencyTable([], array('Q'))
+    values, counts = _tally(numbers)
+    if order != 'first':
+        key = itemgetter(0) if order == 'value' else itemgetter(1)
+        pairs = sorted(zip(values, counts), key=key, reverse=order == 'count')
+        values = [value for value, _ in pairs]
+        counts = [freq for _, freq in pairs]
+    return FrequencyTable(values, array('Q', counts))
 
 
 # 这个代码块让我们可以测试这些函数
@@ -174,7 +2381,26 @@ if __name__ == "__main__":
     print(f"方差: {variance(test_data)}")
     print(f"标准差: {standard_deviation(test_data)}")
 
+    # 流式累加器：分两片累加再合并
+    left, right = RunningStats(test_data[:2]), RunningStats(test_data[2:])
+    print(f"\n合并后的流式结果: {left.merge(right)}")
+
+    # 滑动窗口
+    print(f"窗口为 3 的滑动平均: {list(rolling_mean(test_data, 3))}")
+
+    # 批量统计：结果按列返回
+    columns = describe_many([test_data, [1, 2], []])
+    print(f"批量中位数列: {list(columns.median)}")
+
+    # 直方图与众数
+    print(f"直方图: {list(histogram(test_data, bins=2).counts)}")
+    print(f"众数: {mode([1, 2, 2, 3])}")
+
+    # 一次遍历得到全部统计量
+    print(f"\n一次遍历汇总: {describe(test_data)}")
+
     # 测试偶数个数据的中位数
     test_data_even = [10, 20, 30, 40]
     print(f"\n测试数据（偶数个）: {test_data_even}")
     print(f"中位数: {median(test_data_even)}")
+    print(f"p25/p50/p90: {quantiles(test_data_even, [0.25, 0.5, 0.9])}")
@@ -0,0 +1,348 @@
+"""
+内存映射的二进制数据输入
+让 math_utils 的函数直接处理磁盘上几 GB 的原始 float64/int64 文件
+
+把这样的文件读进 Python 列表，每个 float 要占约 32 字节（对象 + 指针）。
+这里用 mmap 把文件映射进内存，再用 memoryview.cast() 得到一维数字视图：
+- 不复制数据，页面由操作系统按需读入、可随时回收，
+  进程的常驻内存基本就是页缓存本身
+- math_utils 的归约函数（sum_numbers / average / variance / describe ...）
+  可以直接接收这个视图；安装了 NumPy 时还会零复制地走向量化内核
+- 分位数用 bounded_quantiles() 计算：多趟扫描逐步缩小取值区间，
+  额外内存只和 max_candidates 有关，与元素个数无关
+
+文件格式（二选一）:
+1. 自描述格式：24 字节文件头 + 原始数据
+   文件头 = 魔数 b'PYUTNUM1' + 类型码（1 字节）+ 7 字节填充 + 元素个数（uint64，小端）
+2. 原始数据 + 同名 .meta.json 附属文件：{"dtype": "float64", "count": 1000}
+   也可以不写附属文件，打开时直接指定 dtype，元素个数由文件大小推算
+
+示例:
+    write_binary('latency.bin', data)
+    with open_binary('latency.bin') as mapped:
+        print(average(mapped.values))
+        print(bounded_quantiles(mapped.values, [0.5, 0.99]))
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_right
+from typing import Optional
+
+if __package__:
+    from .math_utils import RunningMinMax, _quantile_ranks, _as_ndarray, _numpy
+else:  # 目录本身在 sys.path 上（直接运行脚本或测试）时按顶层模块导入
+    from math_utils import RunningMinMax, _quantile_ranks, _as_ndarray, _numpy
+
+_MAGIC = b'PYUTNUM1'
+_HEADER = struct.Struct('<8sc7xQ')
+
+# dtype 名称与 array/memoryview 类型码的对应关系
+DTYPES = {'float64': 'd', 'int64': 'q', 'float32': 'f', 'int32': 'i'}
+
+# 每趟扫描时一次处理的元素个数
+_SCAN_BLOCK = 1 << 20
+
+
+def _typecode(dtype: str) -> str:
+    if dtype in DTYPES:
+        return DTYPES[dtype]
+    if dtype in DTYPES.values():
+        return dtype
+    raise ValueError(f"不支持的 dtype: {dtype!r}，可选 {sorted(DTYPES)}")
+
+
+def _meta_path(path: str) -> str:
+    return path + '.meta.json'
+
+
+def write_binary(path: str, numbers, dtype: str = 'float64', header: bool = True) -> int:
+    """
+    把数字写成二进制文件
+
+    参数:
+        path: 输出文件路径
+        numbers: 数字序列（列表、array、缓冲区均可）
+        dtype: 'float64'、'int64'、'float32' 或 'int32'
+        header: True 写自描述文件头；False 写原始数据 + .meta.json 附属文件
+
+    返回:
+        写入的元素个数
+    """
+    typecode = _typecode(dtype)
+    data = numbers if isinstance(numbers, array) and numbers.typecode == typecode \
+        else array(typecode, numbers)
+    with open(path, 'wb') as f:
+        if header:
+            f.write(_HEADER.pack(_MAGIC, typecode.encode(), len(data)))
+        data.tofile(f)
+    if not header:
+        name = next(k for k, v in DTYPES.items() if v == typecode)
+        with open(_meta_path(path), 'w', encoding='utf-8') as f:
+            json.dump({'dtype': name, 'count': len(data)}, f)
+    return len(data)
+
+
+class MappedArray:
+    """
+    只读内存映射的一维数字数组（上下文管理器）
+
+    属性:
+        values: 一维 memoryview，可以直接传给 math_utils 的函数
+        typecode: 元素类型码
+    """
+
+    def __init__(self, path: str, dtype: Optional[str] = None):
+        offset, typecode, count = self._layout(path, dtype)
+        itemsize = array(typecode).itemsize
+        self.typecode = typecode
+        self._file = open(path, 'rb')
+        self._mmap = None
+        if count == 0:
+            self.values = memoryview(b'').cast(typecode)
+            return
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self._mmap, 'madvise'):
+            # 我们总是顺序扫描：提示内核预读并尽早回收读过的页
+            self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+        raw = memoryview(self._mmap)
+        self.values = raw[offset:offset + count * itemsize].cast(typecode)
+        raw.release()
+
+    @staticmethod
+    def _layout(path: str, dtype: Optional[str]) -> tuple[int, str, int]:
+        """确定数据起始偏移、类型码和元素个数"""
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            head = f.read(_HEADER.size)
+        if len(head) == _HEADER.size and head[:8] == _MAGIC:
+            _, code, count = _HEADER.unpack(head)
+            return _HEADER.size, code.decode(), count
+
+        if dtype is None and os.path.exists(_meta_path(path)):
+            with open(_meta_path(path), encoding='utf-8') as f:
+                meta = json.load(f)
+            return 0, _typecode(meta['dtype']), meta['count']
+        if dtype is None:
+            raise ValueError(f"{path} 没有文件头也没有 .meta.json，请指定 dtype")
+        typecode = _typecode(dtype)
+        return 0, typecode, size // array(typecode).itemsize
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __enter__(self) -> 'MappedArray':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        释放映射
+
+        如果外部还持有由 values 派生的视图（例如 NumPy 数组），
+        mmap 无法关闭，会抛出 BufferError。
+        """
+        self.values.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+
+def open_binary(path: str, dtype: Optional[str] = None) -> MappedArray:
+    """
+    以内存映射方式打开二进制数字文件
+
+    参数:
+        path: 文件路径
+        dtype: 没有文件头和 .meta.json 时必须指定
+
+    返回:
+        MappedArray，建议配合 with 语句使用
+    """
+    return MappedArray(path, dtype)
+
+
+# 有界内存分位数的默认参数
+MAX_CANDIDATES = 1 << 18
+BUCKETS = 1024
+
+
+def _blocks(values):
+    """按块产出数据；有 NumPy 时每块是零复制的 ndarray"""
+    arr = _as_ndarray(values)
+    source = arr if arr is not None else values
+    for start in range(0, len(source), _SCAN_BLOCK):
+        yield source[start:start + _SCAN_BLOCK]
+
+
+def _scan(values, lo, hi, cuts: list):
+    """
+    扫描一趟，只看闭区间 [lo, hi] 内的元素
+
+    桶由 cuts 划分：第 b 个桶是 cuts[b-1] <= x < cuts[b]（两端延伸到区间端点）。
+
+    返回:
+        (小于 lo 的元素个数, 各桶元素个数, 各桶实际最小值, 各桶实际最大值)
+    """
+    np = _numpy()
+    buckets = len(cuts) + 1
+    counts = [0] * buckets
+    mins = [None] * buckets
+    maxs = [None] * buckets
+    below = 0
+    for block in _blocks(values):
+        if np is not None and isinstance(block, np.ndarray):
+            below += int(np.count_nonzero(block < lo))
+            inside = block[(block >= lo) & (block <= hi)]
+            if inside.size == 0:
+                continue
+            index = np.searchsorted(np.asarray(cuts, dtype=inside.dtype), inside, side='right')
+            block_counts = np.bincount(index, minlength=buckets)
+            info = np.finfo if inside.dtype.kind == 'f' else np.iinfo
+            block_mins = np.full(buckets, info(inside.dtype).max, dtype=inside.dtype)
+            block_maxs = np.full(buckets, info(inside.dtype).min, dtype=inside.dtype)
+            np.minimum.at(block_mins, index, inside)
+            np.maximum.at(block_maxs, index, inside)
+            for b in np.flatnonzero(block_counts).tolist():
+                counts[b] += int(block_counts[b])
+                low, high = block_mins[b].item(), block_maxs[b].item()
+                mins[b] = low if mins[b] is None else min(mins[b], low)
+                maxs[b] = high if maxs[b] is None else max(maxs[b], high)
+            continue
+        for x in block:
+            if x < lo:
+                below += 1
+            elif x <= hi:
+                b = bisect_right(cuts, x)
+                counts[b] += 1
+                if mins[b] is None:
+                    mins[b] = maxs[b] = x
+                elif x < mins[b]:
+                    mins[b] = x
+                elif x > maxs[b]:
+                    maxs[b] = x
+    return below, counts, mins, maxs
+
+
+def _collect(values, lo, hi) -> list:
+    """收集闭区间 [lo, hi] 内的全部元素并排序"""
+    np = _numpy()
+    candidates = []
+    for block in _blocks(values):
+        if np is not None and isinstance(block, np.ndarray):
+            candidates.extend(block[(block >= lo) & (block <= hi)].tolist())
+        else:
+            candidates.extend(x for x in block if lo <= x <= hi)
+    candidates.sort()
+    return candidates
+
+
+def _bounded_select(values, ranks: list[int], max_candidates: int = MAX_CANDIDATES,
+                    buckets: int = BUCKETS) -> dict:
+    """
+    在不复制数据的前提下求若干名次（从 0 开始）上的值
+
+    每一趟把当前取值区间 [lo, hi] 等分成若干个桶，数出每个目标名次落在哪个桶，
+    下一趟只看这些桶（区间收缩到桶内元素的实际最小/最大值）。
+    落在同一个桶里的名次（例如偶数个数据的两个中间名次）共享后续的扫描。
+    区间上界 hi 本身单独成为最后一个桶，保证每一趟区间都严格缩小。
+    桶内元素不超过 max_candidates 时，把它们收集起来排序即可。
+
+    返回:
+        名次到值的字典
+    """
+    extremes = RunningMinMax()
+    for block in _blocks(values):
+        extremes.extend(block)
+
+    result = {}
+    # 栈中每一项: (区间下界, 区间上界, 比下界小的元素个数, 区间内元素个数, 目标名次)
+    stack = [(extremes.minimum, extremes.maximum, 0, len(values), sorted(set(ranks)))]
+    while stack:
+        lo, hi, below, count, wanted = stack.pop()
+        if lo == hi:
+            for k in wanted:
+                result[k] = lo
+            continue
+        if count <= max_candidates:
+            candidates = _collect(values, lo, hi)
+            for k in wanted:
+                result[k] = candidates[k - below]
+            continue
+
+        step = (hi - lo) / buckets
+        cuts = sorted({lo + step * i for i in range(1, buckets)} | {hi})
+        below, counts, mins, maxs = _scan(values, lo, hi, cuts)
+        groups = {}
+        for b, c in enumerate(counts):
+            for k in wanted:
+                if below <= k < below + c:
+                    groups.setdefault(b, (mins[b], maxs[b], below, c, []))[4].append(k)
+            below += c
+        stack.extend(groups.values())
+    return result
+
+
+def bounded_quantiles(values, qs: list[float], max_candidates: int = MAX_CANDIDATES,
+                      buckets: int = BUCKETS) -> list[float]:
+    """
+    有界内存的分位数（适合内存映射的大文件）
+
+    与 math_utils.quantiles() 结果相同（线性插值），但不会把数据复制进列表：
+    每一趟只顺序扫描数据，额外内存由 max_candidates 和 buckets 决定。
+    均匀分布的数据通常 2~3 趟就能完成。
+
+    参数:
+        values: 一维数字序列，通常是 MappedArray.values
+        qs: 分位点列表，每个都在 0 到 1 之间
+        max_candidates: 收集排序的最大元素个数
+        buckets: 每趟划分的桶数
+
+    返回:
+        与 qs 顺序对应的分位数列表，数据为空时返回空列表
+    """
+    n = len(values)
+    if n == 0:
+        return []
+
+    positions = [_quantile_ranks(n, q) for q in qs]
+    ranks = []
+    for lo, frac in positions:
+        ranks.append(lo)
+        if frac:
+            ranks.append(lo + 1)
+    values_at = _bounded_select(values, ranks, max_candidates, buckets)
+
+    result = []
+    for lo, frac in positions:
+        low_value = values_at[lo]
+        if frac:
+            result.append(low_value + (values_at[lo + 1] - low_value) * frac)
+        else:
+            result.append(float(low_value))
+    return result
+
+
+def bounded_median(values) -> float:
+    """
+    有界内存的中位数，与 math_utils.median() 结果一致
+
+    参数:
+        values: 一维数字序列，通常是 MappedArray.values
+
+    返回:
+        中位数，数据为空时返回 0
+    """
+    n = len(values)
+    if n == 0:
+        return 0
+    mid = n // 2
+    if n % 2 == 1:
+        return _bounded_select(values, [mid])[mid]
+    values_at = _bounded_select(values, [mid - 1, mid])
+    return (values_at[mid - 1] + values_at[mid]) / 2
@@ -0,0 +1,327 @@
+"""
+并行分块归约
+为上亿规模的数据提供多进程版本的 sum_numbers / average / variance / find_max / find_min
+
+做法:
+1. 把数据一次性写入 multiprocessing.shared_memory 共享内存块
+2. 按工作进程数切成若干连续分块，每个进程直接在共享内存上归约自己的分块
+   （只传递共享内存的名字和分块边界，不通过管道复制数据）
+3. 每个分块返回可合并的部分状态（RunningStats / RunningMinMax 序列化后的定长 bytes，
+   或者和恰好等于分块总和的几个浮点数），主进程把它们合并成最终结果；
+   求和只在最后舍入一次，结果与对整个数据做 math.fsum() 相同；整数数据按 int64 精确求和
+
+进程启动和通信有固定开销，数据量低于 min_size 时自动退回串行计算；
+整数列表里有超出 int64 的值时也退回串行计算（转成 float64 会丢掉低位，结果不再精确）。
+交叉点与机器核数有关，可以用 benchmarks.benchmark_parallel_crossover() 测量。
+
+示例:
+    with ParallelReducer(workers=8) as reducer:
+        summary = reducer.describe(big_list)
+        total = reducer.sum_numbers(big_list)
+"""
+
+import math
+import os
+from array import array
+from itertools import chain
+from operator import neg
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional
+
+if __package__:
+    from .math_utils import (
+        RunningStats, RunningMinMax, StatsSummary,
+        describe, sum_numbers, average, find_max, find_min, variance, standard_deviation,
+    )
+else:  # 目录本身在 sys.path 上（直接运行脚本或测试）时按顶层模块导入
+    from math_utils import (
+        RunningStats, RunningMinMax, StatsSummary,
+        describe, sum_numbers, average, find_max, find_min, variance, standard_deviation,
+    )
+
+# 数据量低于这个值时直接串行计算（进程间的固定开销超过并行收益）
+PARALLEL_MIN_SIZE = 1_000_000
+
+# 把列表写入共享内存时每次转换的元素个数，限制转换过程中的临时内存
+_COPY_BLOCK = 1 << 20
+
+
+def _chunk_bounds(n: int, chunks: int) -> list[tuple[int, int]]:
+    """把 [0, n) 尽量均匀地切成 chunks 个连续区间"""
+    chunks = max(1, min(chunks, n))
+    step, extra = divmod(n, chunks)
+    bounds = []
+    start = 0
+    for i in range(chunks):
+        stop = start + step + (1 if i < extra else 0)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def _buffer_typecode(numbers) -> Optional[str]:
+    """支持缓冲区协议的一维数字输入返回其类型码（'d'、'q' 等），否则返回 None"""
+    if isinstance(numbers, list):
+        return None
+    try:
+        view = memoryview(numbers)
+    except TypeError:
+        return None
+    with view:
+        if view.ndim == 1 and view.format in ('d', 'f', 'q', 'l', 'i'):
+            return view.format
+    return None
+
+
+def _fill(target: memoryview, numbers, typecode: str) -> None:
+    """分块把 Python 序列转换成机器数字写入共享内存"""
+    for start in range(0, len(numbers), _COPY_BLOCK):
+        block = numbers[start:start + _COPY_BLOCK]
+        target[start:start + len(block)] = array(typecode, block)
+
+
+def _to_shared_memory(numbers) -> Optional[tuple[shared_memory.SharedMemory, str, int]]:
+    """
+    把输入复制到一块新的共享内存中
+
+    缓冲区输入（array.array、memoryview 等）保留原类型码按字节复制；
+    列表在第一个元素是整数时尝试用 int64 保存（保证整数求和精确），
+    只有遇到浮点数时才改用 float64。
+
+    返回:
+        (共享内存对象, 类型码, 元素个数)；有超出 int64 的整数时返回 None，调用方应当串行计算
+    """
+    n = len(numbers)
+    typecode = _buffer_typecode(numbers)
+    if typecode is not None:
+        source = memoryview(numbers).cast('B')
+        shm = shared_memory.SharedMemory(create=True, size=max(source.nbytes, 1))
+        shm.buf[:source.nbytes] = source
+        source.release()
+        return shm, typecode, n
+
+    candidates = ('q', 'd') if isinstance(numbers[0], int) else ('d',)
+    shm = shared_memory.SharedMemory(create=True, size=max(8 * n, 1))
+    for typecode in candidates:
+        target = shm.buf[:8 * n].cast(typecode)
+        try:
+            _fill(target, numbers, typecode)
+            return shm, typecode, n
+        except TypeError:
+            # int64 装不下浮点数，改用 float64
+            continue
+        except OverflowError:
+            # 超出 int64 的整数：不能悄悄改成 float64，交给串行路径按 Python 整数计算
+            break
+        finally:
+            target.release()
+    else:
+        shm.close()
+        shm.unlink()
+        raise TypeError("并行模式只支持数字序列")
+    shm.close()
+    shm.unlink()
+    return None
+
+
+def _exact_partials(values) -> list[float]:
+    """
+    返回若干个浮点数，它们的和（不舍入）恰好等于 values 的和
+
+    每一轮用 fsum 求出剩余部分正确舍入后的值并记下，下一轮把已记下的值减掉再求；
+    fsum 内部是精确的，通常两三轮余数就是 0。只返回 fsum(values) 的话，
+    主进程再 fsum 一次会舍入两次。
+    """
+    partials = [math.fsum(values)]
+    while math.isfinite(partials[-1]):
+        rest = math.fsum(chain(values, map(neg, partials)))
+        if not rest:
+            break
+        partials.append(rest)
+    return partials
+
+
+def _reduce_chunk(shm_name: str, typecode: str, n: int, start: int, stop: int, op: str):
+    """
+    工作进程：在共享内存上归约 [start, stop) 这一分块，返回可合并的部分状态
+
+    参数:
+        op: 'sum' 返回 (个数, 部分和列表)，列表各项之和恰好等于分块总和；'minmax' 返回 RunningMinMax.serialize()；
+            'stats' 返回 (RunningStats.serialize(), RunningMinMax.serialize())。
+            状态按定长 bytes 返回，比 pickle 累加器对象小，解码也不需要按类名查找
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        itemsize = array(typecode).itemsize
+        view = shm.buf[:n * itemsize].cast(typecode)
+        chunk = view[start:stop]
+        try:
+            if op == 'sum':
+                # 整数分块本身就是精确的；浮点分块返回不舍入的部分和列表
+                return stop - start, (_exact_partials(chunk) if typecode in 'df' else [sum(chunk)])
+            if op == 'minmax':
+                return RunningMinMax(chunk).serialize()
+            return RunningStats(chunk).serialize(), RunningMinMax(chunk).serialize()
+        finally:
+            chunk.release()
+            view.release()
+    finally:
+        shm.close()
+
+
+class ParallelReducer:
+    """
+    并行归约执行器（上下文管理器），进程池在多次调用之间复用
+
+    参数:
+        workers: 工作进程数，默认等于 CPU 核数；为 1 时始终串行
+        min_size: 低于这个数据量时串行计算
+
+    示例:
+        >>> with ParallelReducer(workers=4) as reducer:
+        ...     reducer.average(list(range(10)))
+        4.5
+    """
+
+    def __init__(self, workers: Optional[int] = None, min_size: int = PARALLEL_MIN_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_size = min_size
+        self._executor = None
+
+    def __enter__(self) -> 'ParallelReducer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _serial(self, numbers) -> bool:
+        return (self.workers <= 1 or numbers is None or not hasattr(numbers, '__len__')
+                or len(numbers) == 0 or len(numbers) < self.min_size)
+
+    def _map_chunks(self, numbers, op: str) -> Optional[list]:
+        """
+        把数据放进共享内存，分块交给进程池归约，返回各分块的部分状态
+
+        数据无法精确放进共享内存（整数超出 int64）时返回 None，调用方改为串行计算
+        """
+        shared = _to_shared_memory(numbers)
+        if shared is None:
+            return None
+        shm, typecode, n = shared
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            futures = [
+                self._executor.submit(_reduce_chunk, shm.name, typecode, n, start, stop, op)
+                for start, stop in _chunk_bounds(n, self.workers)
+            ]
+            return [future.result() for future in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def describe(self, numbers) -> StatsSummary:
+        """并行版 describe()"""
+        if self._serial(numbers):
+            return describe(numbers)
+        partials = self._map_chunks(numbers, 'stats')
+        if partials is None:
+            return describe(numbers)
+        stats = RunningStats()
+        extremes = RunningMinMax()
+        for chunk_stats, chunk_extremes in partials:
+            stats.merge(RunningStats.deserialize(chunk_stats))
+            extremes.merge(RunningMinMax.deserialize(chunk_extremes))
+        return StatsSummary(
+            count=stats.count,
+            total=stats.total,
+            mean=stats.mean,
+            minimum=extremes.minimum,
+            maximum=extremes.maximum,
+            variance=stats.variance,
+            sample_variance=stats.sample_variance,
+            stddev=stats.stddev,
+        )
+
+    def _total(self, numbers) -> Optional[tuple[int, float]]:
+        results = self._map_chunks(numbers, 'sum')
+        if results is None:
+            return None
+        partials = list(chain.from_iterable(chunk_partials for _, chunk_partials in results))
+        exact = all(isinstance(total, int) for total in partials)
+        return sum(count for count, _ in results), (sum(partials) if exact else math.fsum(partials))
+
+    def sum_numbers(self, numbers) -> float:
+        """并行版 sum_numbers()"""
+        if self._serial(numbers):
+            return sum_numbers(numbers)
+        total = self._total(numbers)
+        return sum_numbers(numbers) if total is None else total[1]
+
+    def average(self, numbers) -> float:
+        """并行版 average()"""
+        if self._serial(numbers):
+            return average(numbers)
+        total = self._total(numbers)
+        return average(numbers) if total is None else total[1] / total[0]
+
+    def find_max(self, numbers) -> float:
+        """并行版 find_max()"""
+        if self._serial(numbers):
+            return find_max(numbers)
+        extremes = self._extremes(numbers)
+        return find_max(numbers) if extremes is None else extremes.maximum
+
+    def find_min(self, numbers) -> float:
+        """并行版 find_min()"""
+        if self._serial(numbers):
+            return find_min(numbers)
+        extremes = self._extremes(numbers)
+        return find_min(numbers) if extremes is None else extremes.minimum
+
+    def _extremes(self, numbers) -> Optional[RunningMinMax]:
+        partials = self._map_chunks(numbers, 'minmax')
+        if partials is None:
+            return None
+        extremes = RunningMinMax()
+        for partial in partials:
+            extremes.merge(RunningMinMax.deserialize(partial))
+        return extremes
+
+    def variance(self, numbers) -> float:
+        """并行版 variance()"""
+        if self._serial(numbers):
+            return variance(numbers)
+        return self.describe(numbers).variance
+
+    def standard_deviation(self, numbers) -> float:
+        """并行版 standard_deviation()"""
+        if self._serial(numbers):
+            return standard_deviation(numbers)
+        return self.describe(numbers).stddev
+
+
+def parallel_describe(numbers, workers: Optional[int] = None,
+                      min_size: int = PARALLEL_MIN_SIZE) -> StatsSummary:
+    """
+    一次性的并行 describe()：临时创建进程池，用完即关闭
+
+    需要多次调用时请直接使用 ParallelReducer 复用进程池。
+
+    参数:
+        numbers: 数字列表或缓冲区
+        workers: 工作进程数，默认等于 CPU 核数
+        min_size: 低于这个数据量时串行计算
+
+    返回:
+        StatsSummary，与 describe(numbers) 一致
+    """
+    with ParallelReducer(workers, min_size) as reducer:
+        return reducer.describe(numbers)
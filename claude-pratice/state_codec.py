@@ -0,0 +1,125 @@
+"""
+统计状态的二进制编码
+让工作进程只把定长的部分状态发给汇总进程，而不是把原始数据转成 JSON 列表再集中重算
+
+各个可合并的状态自己负责编码（serialize() / deserialize()，格式都是小端、4 字节魔数 + 版本号开头）:
+- RunningStats：48 字节（个数、补偿总和、平均值、偏差平方和）
+- RunningMinMax：32 字节
+- KLLSketch：约 3k 个样本，k=200 时约 5 KB，与数据量无关
+- GroupAccumulator：O(组数)
+
+这个模块在它们之上提供:
+1. decode_state()：按魔数识别类型并解码，汇总端不需要知道收到的是哪一种状态
+2. encode_states() / decode_states()：把一批状态打包成一条消息（头部 + 各段长度 + 各段内容），
+   解码时每一段都是原缓冲区上的 memoryview 切片，不复制
+
+示例:
+    # 工作进程
+    sketch = KLLSketch()
+    sketch.extend(chunk)
+    payload = encode_states([RunningStats(chunk), RunningMinMax(chunk), sketch])
+    # 汇总进程
+    stats, extremes, sketch = decode_states(payload)
+    total_stats.merge(stats)
+"""
+
+import struct
+import sys
+from array import array
+from itertools import accumulate
+
+if __package__:
+    from .math_utils import RunningStats, RunningMinMax, KLLSketch
+    from .grouping import GroupAccumulator
+else:  # 目录本身在 sys.path 上（直接运行脚本或测试）时按顶层模块导入
+    from math_utils import RunningStats, RunningMinMax, KLLSketch
+    from grouping import GroupAccumulator
+
+# 魔数 → 状态类型
+_STATE_TYPES = {
+    b'RSTA': RunningStats,
+    b'RMMX': RunningMinMax,
+    b'KLLS': KLLSketch,
+    b'GRPA': GroupAccumulator,
+}
+
+_BATCH_MAGIC = b'STAB'
+_BATCH_VERSION = 1
+# 魔数、版本、状态个数；之后是每段的字节数（uint64 数组）和各段内容
+_BATCH_HEADER = struct.Struct('<4sBxxxI')
+
+
+def decode_state(data):
+    """
+    按魔数识别状态类型并解码
+
+    参数:
+        data: 某个状态 serialize() 的结果（bytes、bytearray 或 memoryview）
+
+    返回:
+        RunningStats、RunningMinMax、KLLSketch 或 GroupAccumulator
+
+    示例:
+        >>> decode_state(RunningStats([1, 2, 3]).serialize()).mean
+        2.0
+    """
+    view = memoryview(data).cast('B')
+    state_type = _STATE_TYPES.get(bytes(view[:4]))
+    if state_type is None:
+        raise ValueError(f"未知的状态魔数 {bytes(view[:4])!r}")
+    return state_type.deserialize(view)
+
+
+def encode_states(states) -> bytes:
+    """
+    把一批状态打包成一条消息
+
+    参数:
+        states: RunningStats、RunningMinMax、KLLSketch、GroupAccumulator 组成的可迭代对象
+
+    返回:
+        bytes：12 字节头 + 每段的字节数（uint64 数组）+ 各状态 serialize() 的结果
+    """
+    payloads = []
+    for state in states:
+        if type(state) not in _STATE_TYPES.values():
+            raise TypeError(f"不支持编码 {type(state).__name__}")
+        payloads.append(state.serialize())
+    sizes = array('Q', map(len, payloads))
+    if sys.byteorder == 'big':
+        sizes.byteswap()
+    header = _BATCH_HEADER.pack(_BATCH_MAGIC, _BATCH_VERSION, len(payloads))
+    return b''.join([header, sizes] + payloads)
+
+
+def decode_states(data) -> list:
+    """
+    解码 encode_states() 打包的消息
+
+    每个状态直接从原缓冲区的 memoryview 切片上解码，消息本身不会被复制。
+
+    参数:
+        data: bytes、bytearray、memoryview 或 mmap
+
+    返回:
+        状态列表，顺序与编码时相同
+    """
+    view = memoryview(data).cast('B')
+    if len(view) < _BATCH_HEADER.size:
+        raise ValueError("数据太短，不是状态消息")
+    magic, version, n = _BATCH_HEADER.unpack_from(view)
+    if magic != _BATCH_MAGIC:
+        raise ValueError("魔数不匹配，不是状态消息")
+    if version != _BATCH_VERSION:
+        raise ValueError(f"不支持的版本 {version}")
+    offset = _BATCH_HEADER.size + 8 * n
+    if len(view) < offset:
+        raise ValueError("数据长度与头部不一致")
+    sizes = array('Q')
+    sizes.frombytes(view[_BATCH_HEADER.size:offset])
+    if sys.byteorder == 'big':
+        sizes.byteswap()
+    bounds = list(accumulate(sizes, initial=offset))
+    if bounds[-1] != len(view):
+        raise ValueError("数据长度与头部不一致")
+    return [decode_state(view[start:stop]) for start, stop in zip(bounds, bounds[1:])]
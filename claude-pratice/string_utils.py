@@ -3,8 +3,23 @@
 提供常用的字符串处理功能
 """
 
+import codecs
+import heapq
+import os
+import re
+import sys
+import unicodedata
+import zlib
+from array import array
+from collections import Counter, deque
+from itertools import chain, islice
+from operator import itemgetter
 from typing import Optional
-from decorators import validate_string_not_empty
+
+if __package__:
+    from .decorators import validate_string_not_empty
+else:  # 目录本身在 sys.path 上（直接运行脚本或测试）时按顶层模块导入
+    from decorators import validate_string_not_empty
 
 
 @validate_string_not_empty(return_value="")
@@ -65,6 +80,776 @@ def remove_extra_spaces(text: Optional[str]) -> str:
     return ' '.join(text.split())
 
 
+# ---------------------------------------------------------------------------
+# 批量字符串处理
+#
+# 对几百万个短字符串（用户名、标题……）逐个调用上面的函数，每次都要经过一次
+# Python 函数调用和 validate_string_not_empty 包装层。批量版本把整批数据交给一条
+# map() 流水线：str.title、str.split、' '.join、itemgetter(slice(None, None, -1))
+# 都是 C 实现并且在整批数据间共享，循环里没有 Python 字节码，也没有逐个的装饰器开销。
+# 结果与逐个调用完全一致（包括 None 按空字符串处理）。
+# 超大批次可以交给进程池：输入按 chunk_size 分块，结果按原顺序逐块产出。
+# ---------------------------------------------------------------------------
+
+# 进程池模式下每个分块的字符串个数
+BATCH_CHUNK_SIZE = 50_000
+
+_REVERSE = itemgetter(slice(None, None, -1))
+_JOIN_WITH_SPACE = ' '.join
+
+# 批量操作名 → 把一批字符串（不含 None）映射成结果迭代器的函数
+_BATCH_OPERATIONS = {
+    'capitalize_words': lambda texts: map(str.title, texts),
+    'remove_extra_spaces': lambda texts: map(_JOIN_WITH_SPACE, map(str.split, texts)),
+    'reverse_string': lambda texts: map(_REVERSE, texts),
+    'count_words': lambda texts: map(len, map(str.split, texts)),
+}
+
+
+def _without_none(texts):
+    """None 按空字符串处理；不含 None 的列表/元组原样返回（检查本身是一次 C 层扫描）"""
+    if isinstance(texts, (list, tuple)) and None not in texts:
+        return texts
+    return ('' if text is None else text for text in texts)
+
+
+def _run_batch(operation: str, texts: list) -> list:
+    """工作进程中运行：处理一个分块"""
+    return list(_BATCH_OPERATIONS[operation](texts))
+
+
+def _pooled(operation: str, texts, workers: int, executor, chunk_size: int):
+    """
+    把输入分块交给进程池处理，按原顺序逐个产出结果
+
+    同时在途的分块数限制为工作进程数的两倍，输入是生成器时也不会被一次性读完。
+    没有传入 executor 时临时创建进程池，生成器结束（或被关闭）时关闭。
+    """
+    if executor is None:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from _pooled(operation, texts, workers, pool, chunk_size)
+        return
+
+    iterator = iter(texts)
+    pending = deque()
+    window = 2 * workers
+    while True:
+        while len(pending) < window:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            pending.append(executor.submit(_run_batch, operation, chunk))
+        if not pending:
+            return
+        yield from pending.popleft().result()
+
+
+def _apply_many(operation: str, texts, lazy: bool, workers: int, executor, chunk_size: int):
+    if workers < 1 or chunk_size < 1:
+        raise ValueError(f"workers 和 chunk_size 必须是正整数，实际为 {workers!r}、{chunk_size!r}")
+    texts = _without_none(texts if texts is not None else [])
+    if executor is None and workers == 1:
+        results = _BATCH_OPERATIONS[operation](texts)
+    else:
+        results = _pooled(operation, texts, workers, executor, chunk_size)
+    return results if lazy else list(results)
+
+
+def capitalize_words_many(texts, lazy: bool = False, workers: int = 1, executor=None,
+                          chunk_size: int = BATCH_CHUNK_SIZE):
+    """
+    批量版 capitalize_words()
+
+    参数:
+        texts: 字符串列表或任意可迭代对象，None 元素按空字符串处理
+        lazy: True 返回惰性迭代器（逐个产出，适合边处理边写出）；False 返回列表
+        workers: 大于 1 时临时创建这么多个工作进程的进程池；
+                 传入 executor 时表示它的工作进程数（决定同时在途的分块数）
+        executor: 复用已有的执行器（例如 ProcessPoolExecutor），不再临时创建进程池
+        chunk_size: 进程池模式下每个分块的字符串个数
+
+    返回:
+        与输入顺序一致的结果列表（lazy=True 时为迭代器）
+
+    示例:
+        >>> capitalize_words_many(["alice smith", None, "bob"])
+        ['Alice Smith', '', 'Bob']
+    """
+    return _apply_many('capitalize_words', texts, lazy, workers, executor, chunk_size)
+
+
+def remove_extra_spaces_many(texts, lazy: bool = False, workers: int = 1, executor=None,
+                             chunk_size: int = BATCH_CHUNK_SIZE):
+    """
+    批量版 remove_extra_spaces()，参数与 capitalize_words_many() 相同
+
+    示例:
+        >>> remove_extra_spaces_many(["  a   b ", "c"])
+        ['a b', 'c']
+    """
+    return _apply_many('remove_extra_spaces', texts, lazy, workers, executor, chunk_size)
+
+
+def reverse_string_many(texts, lazy: bool = False, workers: int = 1, executor=None,
+                        chunk_size: int = BATCH_CHUNK_SIZE):
+    """
+    批量版 reverse_string()，参数与 capitalize_words_many() 相同
+
+    示例:
+        >>> reverse_string_many(["abc", "xy"])
+        ['cba', 'yx']
+    """
+    return _apply_many('reverse_string', texts, lazy, workers, executor, chunk_size)
+
+
+def count_words_many(texts, lazy: bool = False, workers: int = 1, executor=None,
+                     chunk_size: int = BATCH_CHUNK_SIZE):
+    """
+    批量版 count_words()，参数与 capitalize_words_many() 相同
+
+    示例:
+        >>> count_words_many(["a b c", "", None])
+        [3, 0, 0]
+    """
+    return _apply_many('count_words', texts, lazy, workers, executor, chunk_size)
+
+
+# ---------------------------------------------------------------------------
+# 流式文本处理
+#
+# 上面的函数都需要一个完整的 str。处理几 GB 的日志文件时，
+# 下面的生成器按块读取文件（或任意"文本块"的可迭代对象），内存占用只和块大小有关。
+# 被块边界切开的单词会先暂存，和下一块的开头拼起来再处理，结果与整串处理完全一致。
+# ---------------------------------------------------------------------------
+
+# 从文件对象读取时每块的字符数（二进制文件为字节数）
+STREAM_CHUNK_SIZE = 1 << 16
+
+
+def iter_chunks(source, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    把各种输入统一成"文本块"的生成器
+
+    参数:
+        source: 文件对象（文本或二进制模式）、单个字符串，或文本块的可迭代对象
+        chunk_size: 从文件对象读取时每块的大小
+
+    返回:
+        依次产出 str 文本块；bytes 块按 UTF-8 增量解码（多字节字符被切开也没关系）
+    """
+    if source is None:
+        return
+    if isinstance(source, (str, bytes)):
+        chunks = (source,)
+    elif hasattr(source, 'read'):
+        chunks = iter(lambda: source.read(chunk_size), source.read(0))
+    else:
+        chunks = source
+
+    decoder = None
+    for chunk in chunks:
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8')()
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield chunk
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+def _iter_word_batches(source, chunk_size: int):
+    """
+    按块产出完整单词的列表
+
+    每块末尾如果不是空白，最后一个单词可能还没结束，先留下来拼到下一块的开头。
+    """
+    carry = ''
+    for chunk in iter_chunks(source, chunk_size):
+        text = carry + chunk if carry else chunk
+        words = text.split()
+        if words and not text[-1].isspace():
+            carry = words.pop()
+        else:
+            carry = ''
+        if words:
+            yield words
+    if carry:
+        yield [carry]
+
+
+def stream_words(source, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    逐个产出单词（与 text.split() 的结果相同）
+
+    示例:
+        >>> list(stream_words(["hel", "lo wor", "ld"]))
+        ['hello', 'world']
+    """
+    for words in _iter_word_batches(source, chunk_size):
+        yield from words
+
+
+def stream_word_counts(source, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    每处理完一块产出一次到目前为止已确认的单词总数（运行计数）
+
+    块末尾未结束的单词要等下一块（或输入结束）才计入。
+
+    示例:
+        >>> list(stream_word_counts(["a b ", "c d e"]))
+        [2, 4, 5]
+    """
+    total = 0
+    for words in _iter_word_batches(source, chunk_size):
+        total += len(words)
+        yield total
+
+
+def count_words_stream(source, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+    """
+    流式版 count_words()：返回单词总数
+
+    参数:
+        source: 文件对象、字符串或文本块的可迭代对象
+
+    返回:
+        单词数量，输入为空或 None 时返回 0
+    """
+    total = 0
+    for total in stream_word_counts(source, chunk_size):
+        pass
+    return total
+
+
+def stream_remove_extra_spaces(source, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    流式版 remove_extra_spaces()：产出规范化后的文本块
+
+    把产出的块拼起来，等于对整个文本调用 remove_extra_spaces() 的结果。
+
+    示例:
+        >>> ''.join(stream_remove_extra_spaces(["  hello  wo", "rld  "]))
+        'hello world'
+    """
+    started = False
+    for words in _iter_word_batches(source, chunk_size):
+        text = ' '.join(words)
+        yield ' ' + text if started else text
+        started = True
+
+
+def _is_cased(char: str) -> bool:
+    """判断字符在 str.title() 的规则下是否算"有大小写"的字母"""
+    # title() 遇到有大小写的字符后，下一个字母会转成小写
+    return (char + 'a').title()[-1] == 'a'
+
+
+def stream_capitalize_words(source, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    流式版 capitalize_words()：产出首字母大写后的文本块
+
+    str.title() 对每个字符的处理只取决于它前一个字符是否有大小写，
+    所以只需要记住上一块的最后一个字符。
+
+    示例:
+        >>> ''.join(stream_capitalize_words(["hello wo", "rld"]))
+        'Hello World'
+    """
+    previous_cased = False
+    for chunk in iter_chunks(source, chunk_size):
+        first = chunk[0]
+        titled_first = first.title()
+        head = first.lower() if previous_cased else titled_first
+        yield head + chunk.title()[len(titled_first):]
+        previous_cased = _is_cased(chunk[-1])
+
+
+def stream_reverse(binary_file, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    流式版 reverse_string()：从文件末尾向前读取，产出反转后的文本块
+
+    反转必须从最后一个字符开始输出，因此需要可 seek 的二进制文件（UTF-8 编码）。
+    块的开头如果切在多字节字符中间，这几个字节会留给前一块一起解码。
+
+    参数:
+        binary_file: 以 'rb' 模式打开的文件对象
+
+    返回:
+        依次产出反转后的文本块，拼起来等于 reverse_string(整个文件内容)
+    """
+    end = binary_file.seek(0, os.SEEK_END)
+    carry = b''
+    while end > 0:
+        start = max(0, end - chunk_size)
+        binary_file.seek(start)
+        block = binary_file.read(end - start) + carry
+        end = start
+        # 跳过开头的 UTF-8 续字节（10xxxxxx），它们属于前一块最后一个字符
+        cut = 0
+        if start > 0:
+            while cut < len(block) and block[cut] & 0xC0 == 0x80:
+                cut += 1
+        carry = block[:cut]
+        text = block[cut:].decode('utf-8')
+        if text:
+            yield text[::-1]
+    if carry:
+        yield carry.decode('utf-8')[::-1]
+
+
+# ---------------------------------------------------------------------------
+# 词频索引
+#
+# count_words() 只给出总数。WordIndex 统计每个单词出现的次数并求出现最多的 k 个：
+# - 单个字符串用 re.finditer 逐个取出单词，不生成整篇文本的单词列表；
+#   计数交给 Counter.update()（C 实现），单词先 sys.intern()，
+#   同一个词在各个分片、各个索引之间只保存一份字符串
+# - top-k 用 heapq.nlargest()：大小为 k 的堆，O(n log k)
+# - 词表没有上限时（例如含大量 ID 的日志），可以改用 Count-Min sketch：
+#   固定大小的计数矩阵加上 k 个候选高频词，内存与词表大小无关，
+#   估计值只会偏大、不会偏小
+# - 多个分片分别建索引后可以 merge() 成一个（两个 sketch 的参数必须相同）
+# ---------------------------------------------------------------------------
+
+_WORD_PATTERN = re.compile(r'\S+')
+_match_group = re.Match.group
+
+
+def _iter_words(source, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    逐个产出单词，与 text.split() 的结果相同
+
+    单个字符串直接交给 finditer，不生成整篇文本的单词列表；
+    流式输入沿用 _iter_word_batches() 的分块与边界拼接。
+    """
+    if isinstance(source, str):
+        return map(_match_group, _WORD_PATTERN.finditer(source))
+    return chain.from_iterable(_iter_word_batches(source, chunk_size))
+
+
+def _stable_hashes(word: str) -> tuple[int, int]:
+    """
+    与进程无关的两个哈希值（内置 hash() 对 str 有随机化，不同进程的 sketch 无法合并）
+    """
+    data = word.encode('utf-8', 'surrogatepass')
+    return zlib.crc32(data), zlib.adler32(data) | 1
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch：用固定内存估计每个单词的出现次数
+
+    depth 行、每行 width 个计数器；每个单词在每行落到一个计数器上，
+    估计值取各行计数器的最小值。估计值 >= 真实次数，
+    超出部分以 1 - (1/2)^depth 的概率不超过 2 * 总次数 / width。
+
+    参数:
+        width: 每行计数器个数
+        depth: 行数（独立哈希函数个数）
+    """
+
+    __slots__ = ('width', 'depth', 'total', '_table')
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4):
+        if width < 1 or depth < 1:
+            raise ValueError("width 和 depth 必须是正整数")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self._table = array('Q', bytes(8 * width * depth))
+
+    def _cells(self, word: str):
+        h1, h2 = _stable_hashes(word)
+        width = self.width
+        # 双重哈希（h1 + i*h2）模拟 depth 个独立哈希函数
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, word: str, count: int = 1) -> int:
+        """增加一个单词的计数，返回加完之后的估计值"""
+        table = self._table
+        estimate = None
+        for cell in self._cells(word):
+            value = table[cell] + count
+            table[cell] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        self.total += count
+        return estimate
+
+    def estimate(self, word: str) -> int:
+        """单词出现次数的估计值（不会小于真实值）"""
+        table = self._table
+        return min(table[cell] for cell in self._cells(word))
+
+    def merge(self, other: 'CountMinSketch') -> 'CountMinSketch':
+        """把另一个参数相同的 sketch 累加进来，返回自身"""
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("只能合并 width 和 depth 都相同的 sketch")
+        table = self._table
+        for i, value in enumerate(other._table):
+            if value:
+                table[i] += value
+        self.total += other.total
+        return self
+
+
+class WordIndex:
+    """
+    可合并的词频索引
+
+    参数:
+        top_k: sketch 模式下需要跟踪的高频词个数（精确模式下可省略）
+        sketch_width: 指定后使用 Count-Min sketch 模式（固定内存，计数为估计值）
+        sketch_depth: sketch 的行数
+
+    示例:
+        >>> index = WordIndex()
+        >>> index.add("to be or not to be")
+        >>> index.most_common(2)
+        [('to', 2), ('be', 2)]
+    """
+
+    __slots__ = ('top_k', '_counts', '_sketch', '_candidates', '_floor')
+
+    def __init__(self, top_k: Optional[int] = None, sketch_width: Optional[int] = None,
+                 sketch_depth: int = 4):
+        if sketch_width is not None and not top_k:
+            raise ValueError("sketch 模式需要指定 top_k")
+        self.top_k = top_k
+        self._counts = Counter() if sketch_width is None else None
+        self._sketch = None if sketch_width is None else CountMinSketch(sketch_width, sketch_depth)
+        # sketch 模式下的候选高频词 {单词: 估计值}，最多 top_k 个
+        self._candidates = {}
+        # 候选集合中最小估计值的下界，用来快速跳过低频词
+        self._floor = 0
+
+    @property
+    def total(self) -> int:
+        """单词总数"""
+        return sum(self._counts.values()) if self._sketch is None else self._sketch.total
+
+    @property
+    def exact(self) -> bool:
+        """是否为精确计数模式"""
+        return self._sketch is None
+
+    def add(self, source, chunk_size: int = STREAM_CHUNK_SIZE) -> None:
+        """
+        统计一段文本中的单词
+
+        参数:
+            source: 字符串、文件对象或文本块的可迭代对象（同 iter_chunks）
+        """
+        if source is None:
+            return
+        words = map(sys.intern, _iter_words(source, chunk_size))
+        if self._sketch is None:
+            self._counts.update(words)
+            return
+        sketch = self._sketch
+        for word in words:
+            self._offer(word, sketch.add(word))
+
+    def _offer(self, word: str, estimate: int) -> None:
+        """sketch 模式：用最新估计值更新候选高频词"""
+        candidates = self._candidates
+        if word in candidates:
+            candidates[word] = estimate
+            return
+        if len(candidates) < self.top_k:
+            candidates[word] = estimate
+            self._floor = min(self._floor, estimate) if len(candidates) > 1 else estimate
+            return
+        if estimate <= self._floor:
+            return
+        # 下界可能已经过时（候选词的估计值只增不减），淘汰前重新计算真实最小值
+        weakest = min(candidates, key=candidates.__getitem__)
+        if estimate > candidates[weakest]:
+            del candidates[weakest]
+            candidates[word] = estimate
+        self._floor = min(candidates.values())
+
+    def __getitem__(self, word: str) -> int:
+        """单词出现次数（sketch 模式下为估计值）"""
+        if self._sketch is None:
+            return self._counts[word]
+        return self._sketch.estimate(word)
+
+    def __len__(self) -> int:
+        """不同单词的个数（sketch 模式下为正在跟踪的候选词个数）"""
+        return len(self._counts) if self._sketch is None else len(self._candidates)
+
+    def most_common(self, k: Optional[int] = None) -> list[tuple[str, int]]:
+        """
+        出现次数最多的 k 个单词
+
+        参数:
+            k: 个数，默认为 top_k；精确模式下两者都为 None 时返回全部单词
+
+        返回:
+            (单词, 次数) 列表，按次数从大到小排序，次数相同时保持首次出现的顺序
+        """
+        k = self.top_k if k is None else k
+        if self._sketch is None:
+            items = self._counts.items()
+        else:
+            # 记录的估计值是加入时的值，之后其他单词的碰撞可能让它变大，查询时重新估计
+            estimate = self._sketch.estimate
+            items = [(word, estimate(word)) for word in self._candidates]
+        if k is None:
+            return sorted(items, key=itemgetter(1), reverse=True)
+        return heapq.nlargest(k, items, key=itemgetter(1))
+
+    def merge(self, other: 'WordIndex') -> 'WordIndex':
+        """
+        合并另一个分片的索引，返回自身
+
+        两个索引必须同为精确模式，或同为参数相同的 sketch 模式。
+        """
+        if self.exact != other.exact:
+            raise ValueError("精确模式和 sketch 模式的索引不能合并")
+        if self._sketch is None:
+            self._counts.update(other._counts)
+        else:
+            self._sketch.merge(other._sketch)
+            # 合并后两边的候选词都用合并后的 sketch 重新估计
+            pool = set(self._candidates) | set(other._candidates)
+            self._candidates = {}
+            self._floor = 0
+            for word in pool:
+                self._offer(word, self._sketch.estimate(word))
+        return self
+
+
+def word_frequencies(source, top_k: Optional[int] = None, sketch_width: Optional[int] = None,
+                     sketch_depth: int = 4,
+                     chunk_size: int = STREAM_CHUNK_SIZE) -> list[tuple[str, int]]:
+    """
+    统计词频，返回出现次数最多的单词
+
+    参数:
+        source: 字符串、文件对象或文本块的可迭代对象
+        top_k: 返回前 k 个；None 表示返回全部（仅精确模式）
+        sketch_width: 指定后使用固定内存的 Count-Min sketch 模式
+        sketch_depth: sketch 的行数
+        chunk_size: 从文件对象读取时每块的大小
+
+    返回:
+        (单词, 次数) 列表，按次数从大到小排序；输入为空或 None 时返回空列表
+
+    示例:
+        >>> word_frequencies("a b a c a b", top_k=2)
+        [('a', 3), ('b', 2)]
+    """
+    index = WordIndex(top_k, sketch_width, sketch_depth)
+    index.add(source, chunk_size)
+    return index.most_common()
+
+
+# ---------------------------------------------------------------------------
+# 字节串处理
+#
+# 从网络读到的是 UTF-8 编码的 bytes。下面的函数直接处理 bytes / bytearray / memoryview，
+# 不先解码成 str，也不用 split() 生成单词列表，主要工作都交给
+# bytes.translate() / replace() / reverse() 这些 C 实现的整块操作：
+# - 空白字符按 bytes.split() 的规则，只认 ASCII 空白（空格 \t \n \r \v \f），
+#   所以 U+3000 全角空格等非 ASCII 空白不会被当作分隔符（与 str.split() 不同）
+# - 可以传入调用方预先分配的可写缓冲区 out，结果写进去，返回写入的字节数
+# - 只有 decode=True 时才把结果解码成 str
+# ---------------------------------------------------------------------------
+
+_ASCII_WHITESPACE = b' \t\n\r\x0b\x0c'
+# 把空白映射成 ' '、其余字节映射成 'x'：单词数就是 ' x' 出现的次数（再加上开头的单词）
+_WORD_MASK = bytes(0x20 if b in _ASCII_WHITESPACE else 0x78 for b in range(256))
+# 把所有 ASCII 空白统一成空格
+_SPACE_TABLE = bytes.maketrans(_ASCII_WHITESPACE[1:], b' ' * (len(_ASCII_WHITESPACE) - 1))
+# UTF-8 多字节字符：首字节 + 若干续字节
+_UTF8_MULTIBYTE = re.compile(rb'[\xc0-\xff][\x80-\xbf]*')
+# 字素簇扫描时关心的片段：CRLF 和多字节字符
+_GRAPHEME_PIECE = re.compile(rb'\r\n|[\xc0-\xff][\x80-\xbf]*')
+# 计数时每次转换的字节数，限制临时内存
+_BYTES_BLOCK = 1 << 16
+
+_ZWJ = '\u200d'
+
+
+def _byte_view(data) -> memoryview:
+    """把 bytes / bytearray / memoryview 统一成一维无符号字节视图（不复制）"""
+    view = memoryview(data if data is not None else b'')
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    return view
+
+
+def _emit(result: bytearray, out, decode: bool):
+    """
+    输出结果
+
+    指定了 out 时把结果写进 out，返回写入的字节数；
+    否则返回 result 本身（decode=True 时返回解码后的 str）
+    """
+    if out is None:
+        return result.decode('utf-8') if decode else result
+    target = _byte_view(out)
+    if target.readonly:
+        raise TypeError("out 必须是可写的缓冲区（例如 bytearray）")
+    size = len(result)
+    if len(target) < size:
+        raise ValueError(f"out 至少需要 {size} 字节，实际只有 {len(target)} 字节")
+    target[:size] = result
+    return size
+
+
+def count_words_bytes(data) -> int:
+    """
+    字节串版 count_words()：统计 ASCII 空白分隔的单词数
+
+    用 bytes.translate() 把每块数据映射成"空白/非空白"两种字节，
+    再数 ' x'（单词开头）出现的次数，全部在 C 中完成，不生成单词列表。
+
+    参数:
+        data: bytes、bytearray 或 memoryview
+
+    返回:
+        单词数量，输入为空或 None 时返回 0
+
+    示例:
+        >>> count_words_bytes(b"  hello   world ")
+        2
+    """
+    view = _byte_view(data)
+    total = 0
+    previous = b' '
+    for start in range(0, len(view), _BYTES_BLOCK):
+        # 前面补上一块的最后一个字节，跨块的单词开头也能数到
+        mask = previous + bytes(view[start:start + _BYTES_BLOCK]).translate(_WORD_MASK)
+        total += mask.count(b' x')
+        previous = mask[-1:]
+    return total
+
+
+def remove_extra_spaces_bytes(data, out=None, decode: bool = False):
+    """
+    字节串版 remove_extra_spaces()：去掉首尾空白，单词之间只保留一个空格
+
+    先用 translate() 把所有空白变成空格，再反复把连续空格折半，
+    每一趟都是 C 实现的整块替换；长度为 k 的空白串只需要约 log4(k) 趟。
+
+    参数:
+        data: bytes、bytearray 或 memoryview
+        out: 可选的可写缓冲区，长度至少为结果长度（len(data) 一定够）
+        decode: 没有指定 out 时，True 表示把结果解码成 str
+
+    返回:
+        指定了 out 时返回写入的字节数；否则返回 bytearray（decode=True 时返回 str）。
+        输入为 None 时按空输入处理
+
+    示例:
+        >>> remove_extra_spaces_bytes(b"  hello \t  world ")
+        bytearray(b'hello world')
+    """
+    result = bytearray(_byte_view(data)).translate(_SPACE_TABLE)
+    while b'  ' in result:
+        result = result.replace(b'    ', b' ').replace(b'  ', b' ')
+    return _emit(result.strip(b' '), out, decode)
+
+
+def _is_grapheme_extender(char: str) -> bool:
+    """是否会附着在前一个字符上：组合符号、变体选择符、零宽连接符、肤色修饰符"""
+    return (unicodedata.category(char) in ('Mn', 'Me', 'Mc')
+            or '\ufe00' <= char <= '\ufe0f'
+            or char == _ZWJ
+            or '\U0001f3fb' <= char <= '\U0001f3ff')
+
+
+def _is_regional_indicator(char: str) -> bool:
+    return '\U0001f1e6' <= char <= '\U0001f1ff'
+
+
+def _grapheme_spans(view: memoryview) -> list[list[int]]:
+    """
+    找出所有多字节的字素簇（用户感知的一个字符）的字节区间
+
+    近似 UAX #29 的常见规则：CRLF 不拆开；组合符号、变体选择符、肤色修饰符附着在前一个字符上；
+    零宽连接符（ZWJ）把前后两个字符连在一起（emoji 序列）；区域指示符两两组成国旗。
+    单字节 ASCII 字符各自成簇，不在结果中出现。
+    """
+    spans = []
+    join_next = False
+    open_flag = False
+    for match in _GRAPHEME_PIECE.finditer(view):
+        start, end = match.span()
+        if end - start == 2 and view[start] == 0x0D:
+            spans.append([start, end])
+            join_next = open_flag = False
+            continue
+        char = str(view[start:end], 'utf-8')
+        adjacent = spans and spans[-1][1] == start
+        regional = _is_regional_indicator(char)
+        if adjacent and (join_next or (regional and open_flag)):
+            spans[-1][1] = end
+            open_flag = False
+        elif _is_grapheme_extender(char) and start > 0 and view[start - 1] not in b'\r\n':
+            if adjacent:
+                spans[-1][1] = end
+            else:
+                # 附着在前一个 ASCII 字符上，例如 'e' + U+0301
+                spans.append([start - 1, end])
+            open_flag = False
+        else:
+            spans.append([start, end])
+            open_flag = regional
+        join_next = char == _ZWJ
+    return spans
+
+
+def reverse_bytes(data, mode: str = 'codepoint', out=None, decode: bool = False):
+    """
+    字节串版 reverse_string()
+
+    先用 bytearray.reverse() 把整个字节串原地反转，再把需要保持原顺序的片段按原样写回：
+    - 'bytes'：逐字节反转，不关心编码（适合二进制数据或纯 ASCII）
+    - 'codepoint'：保持每个 UTF-8 字符完整，结果与 reverse_string() 解码后一致
+    - 'grapheme'：保持每个字素簇完整，例如 'e' + 组合重音、emoji 序列、国旗、CRLF
+
+    纯 ASCII 输入在三种模式下都只有一次复制和一次原地反转。
+
+    参数:
+        data: bytes、bytearray 或 memoryview（'codepoint'/'grapheme' 模式要求是合法 UTF-8）
+        mode: 'bytes'、'codepoint' 或 'grapheme'
+        out: 可选的可写缓冲区，长度至少为 len(data)
+        decode: 没有指定 out 时，True 表示把结果解码成 str
+
+    返回:
+        指定了 out 时返回写入的字节数；否则返回 bytearray（decode=True 时返回 str）
+
+    示例:
+        >>> reverse_bytes('héllo'.encode(), decode=True)
+        'olléh'
+    """
+    if mode not in ('bytes', 'codepoint', 'grapheme'):
+        raise ValueError(f"mode 必须是 'bytes'、'codepoint' 或 'grapheme'，而不是 {mode!r}")
+    view = _byte_view(data)
+    n = len(view)
+    result = bytearray(view)
+    result.reverse()
+    if mode == 'bytes' or (mode == 'codepoint' and result.isascii()):
+        # 纯 ASCII 时每个字节就是一个字符（字素模式还要处理 CRLF）
+        spans = ()
+    elif mode == 'codepoint':
+        spans = (match.span() for match in _UTF8_MULTIBYTE.finditer(view))
+    else:
+        spans = _grapheme_spans(view)
+    # 原文中 [start, end) 的片段反转后位于 [n-end, n-start)，把它按原顺序写回
+    for start, end in spans:
+        result[n - end:n - start] = view[start:end]
+    return _emit(result, out, decode)
+
+
 # 测试代码
 if __name__ == "__main__":
     # 测试数据
@@ -79,3 +864,9 @@ if __name__ == "__main__":
     test_spaces = "  hello    world   python  "
     print(f"\n原字符串（多余空格）: '{test_spaces}'")
     print(f"处理后: '{remove_extra_spaces(test_spaces)}'")
+
+    # 流式处理：单词被块边界切开也能正确处理
+    chunks = ["  hel", "lo    wor", "ld   pyth", "on  "]
+    print(f"\n分块输入: {chunks}")
+    print(f"流式单词数: {count_words_stream(chunks)}")
+    print(f"流式规范化: '{''.join(stream_remove_extra_spaces(chunks))}'")
@@ -3,9 +3,47 @@
 测试数学工具和字符串工具的所有功能
 """
 
+import bisect
+import inspect
+import math
+import os
+import tempfile
+import time
 import unittest
-from math_utils import sum_numbers, average, find_max, find_min, median, variance, standard_deviation
+from unittest import mock
+from math_utils import (
+    sum_numbers, average, find_max, find_min, median, variance, standard_deviation,
+    describe, StatsSummary, quantile, quantiles, RunningStats, RunningMinMax,
+    rolling_mean, rolling_std, rolling_min, rolling_max, rolling_median,
+    describe_many, describe_ragged, StatsColumns, KLLSketch,
+    histogram, mode, multimode, frequency_table,
+)
+import math_utils
+import random
+import statistics
+from array import array
 from string_utils import reverse_string, capitalize_words, count_words, remove_extra_spaces
+from string_utils import (
+    iter_chunks, stream_words, stream_word_counts, count_words_stream,
+    stream_remove_extra_spaces, stream_capitalize_words, stream_reverse,
+    WordIndex, CountMinSketch, word_frequencies,
+    count_words_bytes, remove_extra_spaces_bytes, reverse_bytes,
+    capitalize_words_many, remove_extra_spaces_many, reverse_string_many, count_words_many,
+)
+from collections import Counter
+import io
+import decorators
+from decorators import validate_non_empty, validate_string_not_empty, memoize
+from decorators import instrument, instrument_exports, MetricsRegistry, LatencyHistogram
+from parallel import ParallelReducer, parallel_describe, _chunk_bounds
+from mmap_io import write_binary, open_binary, bounded_quantiles, bounded_median
+from async_stats import astats, aaverage, avariance, amedian, aquantiles
+from sorted_series import SortedSeries
+import grouping
+from grouping import group_stats, GroupAccumulator, GroupStats
+from state_codec import encode_states, decode_states, decode_state
+import asyncio
+import benchmarks
 
 
 class TestMathUtils(unittest.TestCase):
@@ -53,6 +91,77 @@ class TestMathUtils(unittest.TestCase):
         # 空列表
         self.assertEqual(median([]), 0)
 
+    def test_median_inplace(self):
+        """测试 median 的原地模式"""
+        data = [5, 1, 4, 2, 3]
+        self.assertEqual(median(data, inplace=True), 3)
+        self.assertEqual(sorted(data), [1, 2, 3, 4, 5])  # 元素不变，只是顺序可能改变
+        # 默认模式不修改输入
+        data = [5, 1, 4, 2, 3]
+        median(data)
+        self.assertEqual(data, [5, 1, 4, 2, 3])
+        # 生成器输入
+        self.assertEqual(median(x for x in [1, 3, 5, 7]), 4.0)
+
+    def test_quantile(self):
+        """测试 quantile / quantiles 函数"""
+        data = [1, 2, 3, 4, 5]
+        self.assertEqual(quantile(data, 0), 1)
+        self.assertEqual(quantile(data, 1), 5)
+        self.assertEqual(quantile(data, 0.5), median(data))
+        self.assertEqual(quantile(data, 0.25), 2.0)
+        self.assertAlmostEqual(quantile([10, 20], 0.3), 13.0)
+        self.assertEqual(quantile([], 0.5), 0)
+        self.assertEqual(quantiles(None, [0.5]), [])
+        self.assertEqual(quantiles(list(range(101)), [0.5, 0.9, 0.99]), [50.0, 90.0, 99.0])
+        with self.assertRaises(ValueError):
+            quantile(data, 1.5)
+        # 非法分位点不论数据是否为空都报错
+        for empty in ([], None, array('d'), iter(())):
+            with self.assertRaises(ValueError):
+                quantile(empty, 2)
+            with self.assertRaises(ValueError):
+                quantiles(empty, [0.5, -0.1])
+        with self.assertRaises(ValueError):
+            quantiles([], [2], nan_policy='omit')
+
+    def test_quantiles_match_statistics(self):
+        """测试 quantiles 与 statistics.quantiles(method='inclusive') 一致"""
+        rng = random.Random(42)
+        data = [rng.uniform(-100, 100) for _ in range(1001)]
+        expected = statistics.quantiles(data, n=10, method='inclusive')
+        ours = quantiles(data, [i / 10 for i in range(1, 10)])
+        for a, b in zip(ours, expected):
+            self.assertAlmostEqual(a, b)
+
+    def test_selection_engine(self):
+        """测试选择引擎（大数据、重复值、已排序数据）"""
+        rng = random.Random(7)
+        cases = [
+            [rng.random() for _ in range(5000)],
+            [rng.randint(0, 3) for _ in range(5000)],  # 大量重复值
+            list(range(5000)),                          # 已排序
+            list(range(5000, 0, -1)),                   # 逆序
+            [1] * 5000,                                 # 全部相同
+        ]
+        for data in cases:
+            ordered = sorted(data)
+            ranks = [0, 1, 2499, 2500, 4998, 4999]
+            result = math_utils._multiselect(data, ranks)
+            self.assertEqual(result, {k: ordered[k] for k in ranks})
+        # median-of-medians 枢轴位于中间区域
+        data = list(range(1000))
+        rng.shuffle(data)
+        pivot = math_utils._median_of_medians(data)
+        self.assertTrue(300 <= pivot <= 700)
+
+    def test_median_large_input(self):
+        """测试超过阈值时走选择引擎的结果与排序一致"""
+        rng = random.Random(1)
+        data = [rng.random() for _ in range(math_utils._SELECT_MIN_SIZE + 1)]
+        self.assertEqual(median(data), statistics.median(data))
+        self.assertEqual(quantile(data, 0.9), quantiles(data, [0.9])[0])
+
     def test_variance(self):
         """测试 variance 函数"""
         # 方差计算：每个数据与平均值的偏差平方的平均
@@ -71,6 +180,1186 @@ class TestMathUtils(unittest.TestCase):
         self.assertEqual(standard_deviation([]), 0)
         self.assertEqual(standard_deviation([42]), 0)
 
+    def test_describe(self):
+        """测试 describe 函数（一次遍历汇总）"""
+        data = [10, 20, 30, 40, 50]
+        s = describe(data)
+        self.assertIsInstance(s, StatsSummary)
+        self.assertEqual(s.count, 5)
+        self.assertEqual(s.total, sum_numbers(data))
+        self.assertEqual(s.mean, average(data))
+        self.assertEqual(s.minimum, find_min(data))
+        self.assertEqual(s.maximum, find_max(data))
+        self.assertAlmostEqual(s.variance, 200.0)
+        self.assertAlmostEqual(s.sample_variance, 250.0)
+        self.assertAlmostEqual(s.stddev, 200.0 ** 0.5)
+        self.assertAlmostEqual(s.sample_stddev, 250.0 ** 0.5)
+        # 支持生成器（只遍历一次）
+        self.assertEqual(describe(x for x in data), s)
+        # 空输入所有字段为 0
+        self.assertEqual(describe([]).count, 0)
+        self.assertEqual(describe(None).total, 0)
+        self.assertEqual(describe(iter([])).mean, 0)
+        # 单个数据方差为 0
+        self.assertEqual(describe([42]).variance, 0)
+
+    def test_describe_precision(self):
+        """测试 describe 的补偿求和精度"""
+        # 朴素 sum() 在这里会丢失 1.0
+        data = [1e100, 1.0, -1e100]
+        self.assertEqual(describe(data).total, 1.0)
+        # 大偏移量下 Welford 方差依然稳定
+        shifted = [1e9 + x for x in [4, 7, 13, 16]]
+        self.assertAlmostEqual(describe(shifted).variance, 22.5)
+
+
+class TestSummationModes(unittest.TestCase):
+    """测试可选的求和策略"""
+
+    MODES = math_utils.SUMMATION_MODES
+
+    def test_sum_accuracy(self):
+        """测试补偿/精确求和消除舍入误差"""
+        for summation in ('neumaier', 'fsum'):
+            self.assertEqual(sum_numbers([0.1] * 10, summation=summation), 1.0)
+            self.assertEqual(average([0.1] * 10, summation=summation), 0.1)
+        # pairwise 的误差随 log(n) 增长，远小于逐个相加的 O(n)
+        data = [0.1] * 100_000
+        exact = math.fsum(data)
+        self.assertLess(abs(sum_numbers(data, summation='pairwise') - exact),
+                        abs(sum(data) - exact))
+        self.assertEqual(sum_numbers([1e16, 1.0, -1e16], summation='fsum'), 1.0)
+        self.assertEqual(sum_numbers([1e16, 1.0, -1e16], summation='neumaier'), 1.0)
+
+    def test_integers_stay_exact(self):
+        """测试整数输入在 pairwise/neumaier 下保持精确"""
+        data = [2 ** 60, 1, 3] * 100
+        for summation in ('pairwise', 'neumaier'):
+            self.assertEqual(sum_numbers(data, summation=summation), sum(data))
+        self.assertEqual(sum_numbers(list(range(1000)), summation='pairwise'), 499500)
+
+    def test_variance_with_large_offset(self):
+        """测试均值远大于离散程度时，两遍算法比 Welford 更准确"""
+        from fractions import Fraction
+        rng = random.Random(16)
+        data = [1e9 + rng.random() for _ in range(2000)]
+        exact = float(statistics.pvariance([Fraction(x) for x in data]))
+        for summation in self.MODES:
+            self.assertAlmostEqual(variance(data, summation=summation) / exact, 1.0, places=12)
+            self.assertAlmostEqual(standard_deviation(data, summation=summation) ** 2 / exact, 1.0, places=12)
+        for summation in self.MODES:
+            self.assertAlmostEqual(variance(array('d', data), summation=summation) / exact, 1.0, places=12)
+
+    def test_edge_cases_and_errors(self):
+        """测试空输入、单个元素和非法策略"""
+        for summation in self.MODES:
+            self.assertEqual(sum_numbers([], summation=summation), 0)
+            self.assertEqual(average(None, summation=summation), 0)
+            self.assertEqual(variance([5.0], summation=summation), 0)
+        self.assertEqual(variance([1, 2, 3, 4, 5], summation='fsum'), 2.0)
+        with self.assertRaises(ValueError):
+            sum_numbers([1.0], summation='kahan')
+        with self.assertRaises(ValueError):
+            variance([1.0, 2.0], summation='decimal')
+
+    @unittest.skipIf(math_utils.np is None, "未安装 NumPy")
+    def test_numpy_arrays(self):
+        """测试 NumPy 数组在各策略下与列表结果一致"""
+        rng = random.Random(17)
+        data = [rng.uniform(-1e6, 1e6) for _ in range(70000)]
+        arr = math_utils.np.array(data)
+        for summation in self.MODES:
+            self.assertAlmostEqual(sum_numbers(arr, summation=summation), math.fsum(data), delta=1e-6)
+            self.assertAlmostEqual(variance(arr, summation=summation) / variance(data, summation='fsum'),
+                                   1.0, places=12)
+
+
+class TestNanPolicy(unittest.TestCase):
+    """测试缺失值（None / NaN）的处理方式"""
+
+    FUNCTIONS = (sum_numbers, average, find_max, find_min, median, variance, standard_deviation)
+
+    def setUp(self):
+        rng = random.Random(23)
+        self.clean = [rng.uniform(-10, 10) for _ in range(500)]
+        self.dirty = list(self.clean)
+        for i in rng.sample(range(len(self.dirty) + 40), 40):
+            self.dirty.insert(i, None if i % 2 else math.nan)
+
+    def inputs(self, data):
+        """同一份数据的列表、元组、生成器、array 形式（array 中 None 换成 NaN）"""
+        yield list(data)
+        yield tuple(data)
+        yield (x for x in data)
+        yield array('d', [math.nan if x is None else x for x in data])
+        if math_utils.np is not None:
+            yield math_utils.np.array([math.nan if x is None else x for x in data])
+
+    def test_omit_matches_filtered_input(self):
+        """测试 'omit' 与先过滤再计算的结果一致"""
+        for func in self.FUNCTIONS:
+            expected = func(self.clean)
+            for data in self.inputs(self.dirty):
+                self.assertAlmostEqual(func(data, nan_policy='omit'), expected, msg=func.__name__)
+        for data in self.inputs(self.dirty):
+            self.assertEqual(quantiles(data, [0.1, 0.9], nan_policy='omit'), quantiles(self.clean, [0.1, 0.9]))
+        summary = describe(self.dirty, nan_policy='omit')
+        self.assertEqual(summary.count, len(self.clean))
+        self.assertAlmostEqual(summary.variance, variance(self.clean))
+
+    def test_propagate_and_raise(self):
+        """测试 'propagate' 返回 NaN，'raise' 抛出 ValueError"""
+        for func in self.FUNCTIONS:
+            for data in self.inputs(self.dirty):
+                self.assertTrue(math.isnan(func(data, nan_policy='propagate')), func.__name__)
+            for data in self.inputs(self.dirty):
+                with self.assertRaises(ValueError):
+                    func(data, nan_policy='raise')
+        self.assertTrue(all(map(math.isnan, quantiles(self.dirty, [0.5, 0.9], nan_policy='propagate'))))
+        self.assertTrue(math.isnan(describe(self.dirty, nan_policy='propagate').mean))
+
+    def test_clean_data_unchanged(self):
+        """测试没有缺失值时任何策略的结果都与默认一致（包括 inf - inf 这类总和为 NaN 的干净数据）"""
+        tricky = self.clean + [math.inf, -math.inf]
+        for policy in math_utils.NAN_POLICIES:
+            for func in self.FUNCTIONS:
+                self.assertEqual(func(self.clean, nan_policy=policy), func(self.clean), func.__name__)
+            self.assertEqual(find_max(tricky, nan_policy=policy), math.inf)
+            self.assertEqual(median(tricky, nan_policy=policy), median(tricky))
+
+    def test_all_missing_and_empty(self):
+        """测试全部缺失或输入为空时按空输入处理"""
+        for data in ([None, math.nan], [], None):
+            self.assertEqual(sum_numbers(data, nan_policy='omit'), 0)
+            self.assertEqual(average(data, nan_policy='omit'), 0)
+            self.assertEqual(find_max(data, nan_policy='omit'), 0)
+            self.assertEqual(median(data, nan_policy='omit'), 0)
+            self.assertEqual(variance(data, nan_policy='omit'), 0)
+            self.assertEqual(quantiles(data, [0.5], nan_policy='omit'), [])
+        self.assertEqual(average(iter([]), nan_policy='propagate'), 0)
+        with self.assertRaises(ValueError):
+            sum_numbers([1.0], nan_policy='skip')
+
+    def test_streaming_accumulators(self):
+        """测试流式累加器的 nan_policy"""
+        stats = RunningStats(nan_policy='omit')
+        extremes = RunningMinMax(nan_policy='omit')
+        for x in self.dirty[:100]:
+            stats.push(x)
+            extremes.push(x)
+        stats.extend(x for x in self.dirty[100:])
+        extremes.extend(self.dirty[100:])
+        self.assertEqual(stats.count, len(self.clean))
+        self.assertAlmostEqual(stats.variance, variance(self.clean))
+        self.assertEqual((extremes.minimum, extremes.maximum), (min(self.clean), max(self.clean)))
+
+        propagated = RunningMinMax(self.clean, nan_policy='propagate')
+        propagated.push(None)
+        propagated.push(1.0)
+        self.assertTrue(math.isnan(propagated.maximum))
+        self.assertTrue(math.isnan(RunningMinMax(self.clean).merge(propagated).minimum))
+        self.assertTrue(math.isnan(RunningStats(self.dirty, nan_policy='propagate').mean))
+        with self.assertRaises(ValueError):
+            RunningStats(nan_policy='raise').push(None)
+
+
+class TestKLLSketch(unittest.TestCase):
+    """测试 KLL 近似分位数草图"""
+
+    QS = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+    def _rank_error(self, ordered, value, q):
+        """估计值在真实数据中的名次与目标名次之差（归一化）"""
+        n = len(ordered)
+        low = bisect.bisect_left(ordered, value) / n
+        high = bisect.bisect_right(ordered, value) / n
+        return 0.0 if low <= q <= high else min(abs(low - q), abs(high - q))
+
+    def test_exact_below_k(self):
+        """测试数据量少于 k 时与 quantile() 完全一致"""
+        data = [random.Random(1).uniform(-100, 100) for _ in range(150)]
+        sketch = KLLSketch(k=200)
+        sketch.extend(data)
+        self.assertEqual(sketch.quantiles(self.QS), quantiles(data, self.QS))
+        self.assertEqual(sketch.median(), median(data))
+        self.assertEqual(len(sketch), 150)
+
+    def test_accuracy_on_benchmark_distributions(self):
+        """测试基准分布上的名次误差不超过 epsilon，中位数接近精确 median()"""
+        size = 50_000
+        for name, generate in benchmarks.NUMBER_DISTRIBUTIONS.items():
+            if name == 'nan':
+                continue
+            with self.subTest(distribution=name):
+                data = generate(size, random.Random(7))
+                sketch = KLLSketch(k=200, seed=3)
+                for x in data[:1000]:
+                    sketch.add(x)
+                sketch.extend(data[1000:])
+                ordered = sorted(data)
+                for q, value in zip(self.QS, sketch.quantiles(self.QS)):
+                    self.assertLessEqual(self._rank_error(ordered, value, q), sketch.epsilon)
+                self.assertLessEqual(self._rank_error(ordered, sketch.median(), 0.5), sketch.epsilon)
+                exact_rank = bisect.bisect_right(ordered, median(data)) / size
+                self.assertAlmostEqual(sketch.rank(median(data)), exact_rank, delta=sketch.epsilon)
+                self.assertEqual(sketch.quantile(0), min(data))
+                self.assertEqual(sketch.quantile(1), max(data))
+                self.assertLess(sketch.retained, 3 * sketch.k)
+
+    def test_merge(self):
+        """测试合并分片草图与整体数据的名次误差"""
+        rng = random.Random(11)
+        data = [rng.gauss(0, 1) for _ in range(40_000)]
+        merged = KLLSketch(k=200, seed=1)
+        for start in range(0, len(data), 5000):
+            shard = KLLSketch(k=200, seed=start)
+            shard.extend(data[start:start + 5000])
+            merged.merge(shard)
+        merged.merge(KLLSketch(k=200))
+        self.assertEqual(merged.count, len(data))
+        ordered = sorted(data)
+        for q, value in zip(self.QS, merged.quantiles(self.QS)):
+            self.assertLessEqual(self._rank_error(ordered, value, q), merged.epsilon)
+        with self.assertRaises(ValueError):
+            merged.merge(KLLSketch(k=100))
+
+    def test_serialize_roundtrip(self):
+        """测试序列化后恢复的草图给出相同的结果，并且可以继续添加数据"""
+        rng = random.Random(5)
+        sketch = KLLSketch(k=100, seed=2)
+        sketch.extend(rng.random() for _ in range(20_000))
+        data = sketch.serialize()
+        self.assertIsInstance(data, bytes)
+        self.assertLess(len(data), 8 * 3 * sketch.k + 100)
+        for source in (data, bytearray(data), memoryview(data)):
+            restored = KLLSketch.deserialize(source)
+            self.assertEqual(restored.quantiles(self.QS), sketch.quantiles(self.QS))
+            self.assertEqual((restored.count, restored.minimum, restored.maximum),
+                             (sketch.count, sketch.minimum, sketch.maximum))
+        restored.extend(rng.random() for _ in range(1000))
+        self.assertEqual(restored.count, 21_000)
+
+        empty = KLLSketch.deserialize(KLLSketch().serialize())
+        self.assertEqual((empty.count, empty.minimum, empty.quantile(0.5)), (0, None, 0))
+
+    def test_deserialize_errors(self):
+        """测试损坏数据的报错"""
+        sketch = KLLSketch()
+        sketch.extend(range(10))
+        data = sketch.serialize()
+        with self.assertRaises(ValueError):
+            KLLSketch.deserialize(b'XXXX' + data[4:])
+        with self.assertRaises(ValueError):
+            KLLSketch.deserialize(data[:-8])
+        with self.assertRaises(ValueError):
+            KLLSketch.deserialize(data[:10])
+
+    def test_parameters(self):
+        """测试 k 的取值范围和按误差创建"""
+        self.assertEqual(KLLSketch().median(), 0)
+        with self.assertRaises(ValueError):
+            KLLSketch(k=4)
+        with self.assertRaises(ValueError):
+            KLLSketch.for_error(0)
+        sketch = KLLSketch.for_error(0.01)
+        self.assertLessEqual(sketch.epsilon, 0.01)
+        self.assertGreater(KLLSketch(sketch.k - 1).epsilon, 0.01)
+        with self.assertRaises(ValueError):
+            sketch.quantile(1.5)
+
+    @unittest.skipIf(math_utils.np is None, "未安装 NumPy")
+    def test_numpy_input(self):
+        """测试 NumPy 数组输入与列表结果一致"""
+        data = [random.Random(9).random() for _ in range(10_000)]
+        from_list = KLLSketch(seed=4)
+        from_list.extend(data)
+        from_array = KLLSketch(seed=4)
+        from_array.extend(math_utils.np.array(data))
+        self.assertEqual(from_array.quantiles(self.QS), from_list.quantiles(self.QS))
+
+
+class TestHistogram(unittest.TestCase):
+    """测试直方图、众数和频数分布表"""
+
+    def setUp(self):
+        rng = random.Random(20)
+        self.data = [rng.gauss(0, 1) for _ in range(5000)]
+
+    def _reference(self, data, edges):
+        """逐个数据按边界计数的参考实现（最后一个桶包含右端点）"""
+        counts = [0] * (len(edges) - 1)
+        for x in data:
+            for i in range(len(counts)):
+                if edges[i] <= x < edges[i + 1] or (i == len(counts) - 1 and x == edges[-1]):
+                    counts[i] += 1
+                    break
+        return counts
+
+    def test_fixed_width(self):
+        """测试等宽直方图：边界、右端点、总数和结果类型"""
+        h = histogram([1, 2, 2, 3, 3, 3, 4], bins=3)
+        self.assertEqual(list(h.counts), [1, 2, 4])
+        self.assertEqual(h.edges, [1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(h.counts.typecode, 'Q')
+
+        h = histogram(self.data, bins=17)
+        self.assertEqual(h.total, len(self.data))
+        self.assertEqual(h.edges[0], min(self.data))
+        self.assertEqual(h.edges[-1], max(self.data))
+        self.assertEqual(list(h.counts), self._reference(self.data, h.edges))
+
+    def test_range_and_streaming(self):
+        """测试指定范围：范围外的数据和 NaN 不计入，生成器只遍历一次"""
+        h = histogram(self.data, bins=8, range=(-1, 1))
+        self.assertEqual(h.edges, [-1.0, -0.75, -0.5, -0.25, 0.0, 0.25, 0.5, 0.75, 1.0])
+        self.assertEqual(h.total, sum(1 for x in self.data if -1 <= x <= 1))
+        self.assertEqual(histogram(iter(self.data), bins=8, range=(-1, 1)), h)
+        self.assertEqual(histogram((x for x in self.data), bins=8), histogram(self.data, bins=8))
+        self.assertEqual(list(histogram([0, 10, math.nan, 5, -1, 11], 2, range=(0, 10)).counts), [1, 2])
+
+    def test_buffer_inputs(self):
+        """测试缓冲区输入与列表结果一致"""
+        expected = histogram(self.data, bins=12)
+        self.assertEqual(histogram(array('d', self.data), bins=12), expected)
+        self.assertEqual(histogram(memoryview(array('d', self.data)), bins=12), expected)
+        ints = [random.Random(21).randrange(50) for _ in range(1000)]
+        self.assertEqual(histogram(array('q', ints), bins=7), histogram(ints, bins=7))
+        if math_utils.np is not None:
+            self.assertEqual(histogram(math_utils.np.array(self.data), bins=12), expected)
+
+    def test_log_and_quantile_bins(self):
+        """测试等比桶和分位数桶"""
+        rng = random.Random(22)
+        data = [rng.lognormvariate(0, 2) for _ in range(4000)]
+        h = histogram(data, bins=6, scale='log')
+        ratios = [b / a for a, b in zip(h.edges, h.edges[1:])]
+        for ratio in ratios:
+            self.assertAlmostEqual(ratio, ratios[0])
+        self.assertEqual(list(h.counts), self._reference(data, h.edges))
+
+        h = histogram(data, bins=4, scale='quantile')
+        self.assertEqual(h.edges, quantiles(data, [0, 0.25, 0.5, 0.75, 1]))
+        self.assertEqual(list(h.counts), [1000] * 4)
+        with self.assertRaises(ValueError):
+            histogram([-1, 1, 2], bins=3, scale='log')
+
+    def test_explicit_edges_and_edge_cases(self):
+        """测试直接给出边界、空输入、常数数据、NaN 和非法参数"""
+        self.assertEqual(list(histogram([1, 2, 3], [0, 1.5, 3]).counts), [1, 2])
+        self.assertEqual(histogram(None, bins=2).edges, [0.0, 0.5, 1.0])
+        self.assertEqual(list(histogram([], bins=2).counts), [0, 0])
+        self.assertEqual(histogram([5, 5], bins=2).edges, [4.5, 5.0, 5.5])
+        # NaN 在任何位置都被忽略
+        self.assertEqual(histogram([math.nan, 1, 3], 2), histogram([1, 3, math.nan], 2))
+        for bad in ({'bins': 0}, {'bins': [1, 0]}, {'scale': 'sqrt'}, {'range': (2, 1)}):
+            with self.assertRaises(ValueError):
+                histogram([1, 2, 3], **bad)
+        with self.assertRaises(ValueError):
+            histogram([1, math.inf])
+
+    def test_mode_and_multimode(self):
+        """测试众数与 statistics 模块一致"""
+        rng = random.Random(23)
+        for _ in range(20):
+            data = [rng.randrange(8) for _ in range(rng.randrange(1, 40))]
+            self.assertEqual(mode(data), statistics.mode(data))
+            self.assertEqual(multimode(data), statistics.multimode(data))
+            self.assertEqual(mode(iter(data)), statistics.mode(data))
+            self.assertEqual(mode(array('q', data)), statistics.mode(data))
+            self.assertEqual(multimode(array('d', data)), [float(x) for x in statistics.multimode(data)])
+        self.assertEqual(mode([]), 0)
+        self.assertEqual(multimode(None), [])
+
+    def test_frequency_table(self):
+        """测试频数分布表的三种排序和派生列"""
+        data = [3, 1, 3, 2, 1, 3]
+        table = frequency_table(data)
+        self.assertEqual(table.values, [1, 2, 3])
+        self.assertEqual(list(table.counts), [2, 1, 3])
+        self.assertEqual(table.counts.typecode, 'Q')
+        self.assertEqual(list(table.cumulative), [2, 3, 6])
+        self.assertEqual(table.relative, [2 / 6, 1 / 6, 3 / 6])
+        self.assertEqual(frequency_table(data, order='count').values, [3, 1, 2])
+        self.assertEqual(frequency_table(data, order='first').values, [3, 1, 2])
+        self.assertEqual(frequency_table(array('d', data)).values, [1.0, 2.0, 3.0])
+        self.assertEqual(dict(zip(*frequency_table(iter(data)))), Counter(data))
+        self.assertEqual(frequency_table(None).total, 0)
+        with self.assertRaises(ValueError):
+            frequency_table(data, order='random')
+
+
+class TestRunningAccumulators(unittest.TestCase):
+    """测试流式累加器"""
+
+    def setUp(self):
+        rng = random.Random(3)
+        self.data = [rng.uniform(-50, 50) for _ in range(1000)]
+
+    def test_running_stats_matches_functions(self):
+        """测试 RunningStats 与 average/variance/standard_deviation 一致"""
+        stats = RunningStats(x for x in self.data)
+        self.assertEqual(stats.count, len(self.data))
+        self.assertAlmostEqual(stats.total, sum_numbers(self.data))
+        self.assertAlmostEqual(stats.mean, average(self.data))
+        self.assertAlmostEqual(stats.variance, variance(self.data))
+        self.assertAlmostEqual(stats.stddev, standard_deviation(self.data))
+        self.assertAlmostEqual(stats.sample_variance, statistics.variance(self.data))
+
+    def test_running_stats_push_and_merge(self):
+        """测试 push 与 merge 的结果与一次 extend 相同"""
+        whole = RunningStats(self.data)
+        pushed = RunningStats()
+        for x in self.data:
+            pushed.push(x)
+        self.assertAlmostEqual(pushed.variance, whole.variance)
+
+        # 分成三片分别累加再合并
+        parts = [RunningStats(self.data[i:i + 300]) for i in range(0, 1000, 300)]
+        merged = RunningStats()
+        for part in parts:
+            merged.merge(part)
+        self.assertEqual(merged.count, whole.count)
+        self.assertAlmostEqual(merged.mean, whole.mean)
+        self.assertAlmostEqual(merged.variance, whole.variance)
+        self.assertAlmostEqual(merged.total, whole.total)
+        # 与空累加器合并不改变结果
+        self.assertEqual(RunningStats().merge(RunningStats()).count, 0)
+
+    def test_running_stats_remove(self):
+        """测试 remove 撤销 push 后与只累加剩余数据的结果一致"""
+        stats = RunningStats(self.data)
+        for x in self.data[:600]:
+            stats.remove(x)
+        rest = RunningStats(self.data[600:])
+        self.assertEqual(stats.count, rest.count)
+        self.assertAlmostEqual(stats.total, rest.total)
+        self.assertAlmostEqual(stats.mean, rest.mean)
+        self.assertAlmostEqual(stats.variance, rest.variance)
+        for x in self.data[600:]:
+            stats.remove(x)
+        self.assertEqual((stats.count, stats.total, stats.mean, stats.variance), (0, 0, 0, 0))
+        with self.assertRaises(ValueError):
+            stats.remove(1.0)
+
+    def test_running_stats_empty(self):
+        """测试空累加器与函数的空值约定一致"""
+        stats = RunningStats()
+        self.assertEqual(stats.mean, average([]))
+        self.assertEqual(stats.variance, variance([]))
+        self.assertEqual(stats.stddev, standard_deviation([]))
+        with self.assertRaises(AttributeError):
+            stats.extra = 1  # __slots__ 不允许新增属性
+
+    def test_running_min_max(self):
+        """测试 RunningMinMax 与 find_min/find_max 一致"""
+        mm = RunningMinMax(x for x in self.data)
+        self.assertEqual(mm.minimum, find_min(self.data))
+        self.assertEqual(mm.maximum, find_max(self.data))
+        left = RunningMinMax(self.data[:500])
+        right = RunningMinMax()
+        for x in self.data[500:]:
+            right.push(x)
+        left.merge(right)
+        self.assertEqual((left.minimum, left.maximum), (mm.minimum, mm.maximum))
+        self.assertEqual(left.count, 1000)
+        self.assertEqual(RunningMinMax().maximum, find_max([]))
+
+
+class TestSortedSeries(unittest.TestCase):
+    """测试保持有序的数值序列"""
+
+    def check(self, series, reference):
+        ordered = sorted(reference)
+        self.assertEqual(list(series), ordered)
+        self.assertEqual(len(series), len(reference))
+        if not reference:
+            self.assertEqual(series.median(), 0)
+            self.assertEqual(series.describe().count, 0)
+            return
+        self.assertEqual(series.median(), median(reference))
+        qs = [0, 0.1, 0.37, 0.99, 1]
+        self.assertEqual(series.quantiles(qs), quantiles(reference, qs))
+        self.assertEqual(series.find_min(), find_min(reference))
+        self.assertEqual(series.find_max(), find_max(reference))
+        self.assertAlmostEqual(series.sum_numbers(), math.fsum(reference), places=6)
+        self.assertAlmostEqual(series.average(), average(reference))
+        self.assertAlmostEqual(series.variance(), variance(reference))
+        self.assertAlmostEqual(series.standard_deviation(), standard_deviation(reference))
+        self.assertEqual(series[0], ordered[0])
+        self.assertEqual(series[-1], ordered[-1])
+        self.assertEqual(series[len(ordered) // 2], ordered[len(ordered) // 2])
+
+    def test_random_operations(self):
+        """测试随机插入/删除/批量插入后与 math_utils 的函数一致（小块，频繁分裂与合并）"""
+        rng = random.Random(22)
+        series = SortedSeries(load=8)
+        reference = []
+        for step in range(3000):
+            r = rng.random()
+            if r < 0.6 or not reference:
+                x = rng.choice([rng.randint(0, 50), rng.uniform(0, 100)])
+                series.add(x)
+                reference.append(x)
+            elif r < 0.9:
+                x = rng.choice(reference)
+                series.remove(x)
+                reference.remove(x)
+            else:
+                batch = [rng.randint(0, 50) for _ in range(rng.randint(0, 40))]
+                series.extend(batch)
+                reference.extend(batch)
+            if step % 50 == 0:
+                self.check(series, reference)
+                x = rng.uniform(0, 60)
+                self.assertEqual(series.rank(x), bisect.bisect_right(sorted(reference), x))
+                self.assertEqual(x in series, x in reference)
+        while reference:
+            series.remove(reference.pop())
+        self.check(series, reference)
+
+    def test_same_surface_as_math_utils(self):
+        """测试方法与 math_utils 同名函数的结果和空值约定一致，函数也能直接接收 SortedSeries"""
+        data = [5, 1, 4, 1, 3]
+        series = SortedSeries(data)
+        for name in ('sum_numbers', 'average', 'find_max', 'find_min', 'median',
+                     'variance', 'standard_deviation', 'describe'):
+            if name in ('variance', 'standard_deviation'):
+                # SortedSeries 用 Welford 增量更新，函数用两遍算法，只差舍入误差
+                self.assertAlmostEqual(getattr(series, name)(), getattr(math_utils, name)(data), msg=name)
+            else:
+                self.assertEqual(getattr(series, name)(), getattr(math_utils, name)(data), name)
+            self.assertEqual(getattr(SortedSeries(), name)(), getattr(math_utils, name)([]), name)
+        self.assertEqual(series.quantile(0.25), quantile(data, 0.25))
+        self.assertEqual(SortedSeries().quantiles([0.5]), [])
+        self.assertAlmostEqual(series.variance(summation='fsum'), variance(data, summation='fsum'))
+        self.assertEqual(median(series), median(data))
+        self.assertEqual(describe(series).total, describe(data).total)
+
+    def test_invalid_input(self):
+        """测试 NaN、删除不存在的数字、下标越界、非法分位点"""
+        series = SortedSeries([1, 2, 3])
+        with self.assertRaises(ValueError):
+            series.add(math.nan)
+        with self.assertRaises(ValueError):
+            series.extend([1.0, math.nan])
+        with self.assertRaises(ValueError):
+            series.remove(10)
+        self.assertFalse(series.discard(10))
+        with self.assertRaises(IndexError):
+            series[3]
+        with self.assertRaises(ValueError):
+            series.quantile(1.5)
+        with self.assertRaises(ValueError):
+            SortedSeries().quantile(-0.1)
+        self.assertEqual(list(series), [1.0, 2.0, 3.0])
+
+
+class TestRollingStatistics(unittest.TestCase):
+    """测试滑动窗口统计"""
+
+    def check_against_slices(self, data, window):
+        windows = [data[i:i + window] for i in range(len(data) - window + 1)]
+        self.assertEqual(list(rolling_median(iter(data), window)), [median(w) for w in windows])
+        self.assertEqual(list(rolling_min(data, window)), [find_min(w) for w in windows])
+        self.assertEqual(list(rolling_max(data, window)), [find_max(w) for w in windows])
+        for ours, expected in zip(rolling_mean(data, window), [average(w) for w in windows]):
+            self.assertAlmostEqual(ours, expected)
+        for ours, expected in zip(rolling_std(data, window), [variance(w) for w in windows]):
+            self.assertAlmostEqual(ours ** 2, expected)
+
+    def test_matches_per_window_functions(self):
+        """测试与逐窗口调用原函数结果一致"""
+        rng = random.Random(11)
+        for window in (1, 2, 3, 7):
+            self.check_against_slices([rng.uniform(-10, 10) for _ in range(100)], window)
+            self.check_against_slices([rng.randint(0, 3) for _ in range(100)], window)
+
+    def test_examples(self):
+        """测试文档中的示例"""
+        self.assertEqual(list(rolling_mean([1, 2, 3, 4, 5], 3)), [2.0, 3.0, 4.0])
+        self.assertEqual(list(rolling_min([4, 2, 5, 1, 3], 2)), [2, 2, 1, 1])
+        self.assertEqual(list(rolling_max([4, 2, 5, 1, 3], 2)), [4, 5, 5, 3])
+        self.assertEqual(list(rolling_median([5, 1, 4, 2, 3], 3)), [4, 2, 3])
+
+    def test_lazy_and_edge_cases(self):
+        """测试惰性求值、窗口大于数据量、None 和非法窗口"""
+        def endless():
+            n = 0
+            while True:
+                n += 1
+                yield n
+        means = rolling_mean(endless(), 2)
+        self.assertEqual([next(means) for _ in range(3)], [1.5, 2.5, 3.5])
+        self.assertEqual(list(rolling_median([1, 2], 5)), [])
+        self.assertEqual(list(rolling_max(None, 3)), [])
+        with self.assertRaises(ValueError):
+            list(rolling_std([1, 2, 3], 0))
+
+
+class TestBatchStatistics(unittest.TestCase):
+    """测试批量/列式统计"""
+
+    def setUp(self):
+        rng = random.Random(21)
+        self.series = [[rng.uniform(-10, 10) for _ in range(rng.randint(0, 12))]
+                       for _ in range(200)]
+
+    def check_columns(self, cols):
+        self.assertIsInstance(cols, StatsColumns)
+        self.assertEqual(len(cols.mean), len(self.series))
+        for i, s in enumerate(self.series):
+            self.assertEqual(cols.count[i], len(s))
+            self.assertAlmostEqual(cols.total[i], sum_numbers(s))
+            self.assertAlmostEqual(cols.mean[i], average(s))
+            self.assertAlmostEqual(cols.minimum[i], find_min(s))
+            self.assertAlmostEqual(cols.maximum[i], find_max(s))
+            self.assertAlmostEqual(cols.variance[i], variance(s))
+            self.assertAlmostEqual(cols.stddev[i], standard_deviation(s))
+            self.assertAlmostEqual(cols.sample_variance[i], describe(s).sample_variance)
+            self.assertAlmostEqual(cols.median[i], median(s))
+
+    def test_describe_many(self):
+        """测试 describe_many 与逐条调用结果一致"""
+        self.check_columns(describe_many(self.series))
+
+    def test_describe_ragged(self):
+        """测试 ragged 布局（values + offsets）"""
+        values = []
+        offsets = [0]
+        for s in self.series:
+            values.extend(s)
+            offsets.append(len(values))
+        self.check_columns(describe_ragged(values, offsets))
+        self.check_columns(describe_ragged(array('d', values), offsets))
+
+    def test_edge_cases(self):
+        """测试空输入与关闭中位数"""
+        self.assertEqual(len(describe_many([]).mean), 0)
+        self.assertEqual(len(describe_many(None).count), 0)
+        cols = describe_many([[1, 2, 3], [10, 20]], with_median=False)
+        self.assertEqual(list(cols.median), [0, 0])
+        self.assertEqual(list(cols.count), [3, 2])
+        # 起点不为 0 的 offsets
+        cols = describe_ragged([99, 1, 2, 3, 10, 20], [1, 4, 6])
+        self.assertEqual(list(cols.median), [2.0, 15.0])
+
+
+class TestGroupStats(unittest.TestCase):
+    """测试分组 / 加权聚合（纯 Python 与 NumPy 两条路径各跑一遍）"""
+
+    def setUp(self):
+        rng = random.Random(24)
+        self.keys = [rng.choice('abcdefg') for _ in range(600)]
+        self.values = [rng.uniform(-50, 50) for _ in range(600)]
+        self.weights = [rng.randint(0, 4) for _ in range(600)]
+        self.original_min_rows = grouping._NUMPY_MIN_ROWS
+
+    def tearDown(self):
+        grouping._NUMPY_MIN_ROWS = self.original_min_rows
+
+    def each_path(self):
+        """依次返回 'python'、'numpy'（未安装 NumPy 时只有前者）"""
+        grouping._NUMPY_MIN_ROWS = 1 << 62
+        yield 'python'
+        if math_utils._numpy() is not None:
+            grouping._NUMPY_MIN_ROWS = 1
+            yield 'numpy'
+
+    def expanded(self, key):
+        """把权重展开成重复的数值"""
+        return [x for k, x, w in zip(self.keys, self.values, self.weights) if k == key
+                for _ in range(w)]
+
+    def test_unweighted_matches_math_utils(self):
+        """测试不加权时与逐组调用 math_utils 一致"""
+        aggs = ['count', 'sum', 'mean', 'variance', 'sample_variance', 'std',
+                'min', 'max', 'median', 'p90', 'p0', 'p100']
+        for path in self.each_path():
+            stats = group_stats(self.keys, self.values, aggs=aggs)
+            self.assertIsInstance(stats, GroupStats)
+            self.assertEqual(stats.keys, list(dict.fromkeys(self.keys)))
+            self.assertEqual(list(stats.columns), aggs)
+            rows = stats.to_dict()
+            for key in stats.keys:
+                group = [x for k, x in zip(self.keys, self.values) if k == key]
+                row = rows[key]
+                self.assertEqual(row['count'], len(group), path)
+                self.assertAlmostEqual(row['sum'], sum_numbers(group), msg=path)
+                self.assertAlmostEqual(row['mean'], average(group), msg=path)
+                self.assertAlmostEqual(row['variance'], variance(group), msg=path)
+                self.assertAlmostEqual(row['sample_variance'], describe(group).sample_variance, msg=path)
+                self.assertAlmostEqual(row['std'], standard_deviation(group), msg=path)
+                self.assertEqual(row['min'], find_min(group), path)
+                self.assertEqual(row['max'], find_max(group), path)
+                self.assertAlmostEqual(row['median'], median(group), msg=path)
+                self.assertAlmostEqual(row['p90'], quantile(group, 0.9), msg=path)
+                self.assertEqual(row['p0'], find_min(group), path)
+                self.assertEqual(row['p100'], find_max(group), path)
+
+    def test_weights_as_frequencies(self):
+        """测试权重按频数理解：与把数值重复 w 次的结果一致"""
+        aggs = ['weight', 'sum', 'mean', 'variance', 'sample_variance', 'min', 'max', 'p25', 'median']
+        for path in self.each_path():
+            rows = group_stats(self.keys, self.values, self.weights, aggs=aggs).to_dict()
+            for key, row in rows.items():
+                group = self.expanded(key)
+                self.assertEqual(row['weight'], len(group), path)
+                self.assertAlmostEqual(row['sum'], sum_numbers(group), msg=path)
+                self.assertAlmostEqual(row['mean'], average(group), msg=path)
+                self.assertAlmostEqual(row['variance'], variance(group), msg=path)
+                self.assertAlmostEqual(row['sample_variance'], describe(group).sample_variance, msg=path)
+                self.assertEqual(row['min'], find_min(group), path)
+                self.assertEqual(row['max'], find_max(group), path)
+                self.assertAlmostEqual(row['p25'], quantile(group, 0.25), msg=path)
+                self.assertAlmostEqual(row['median'], median(group), msg=path)
+
+    @unittest.skipIf(math_utils.np is None, "未安装 NumPy")
+    def test_ndarray_input(self):
+        """测试键、数值、权重都是 ndarray（不能用真值判断空输入）"""
+        np = math_utils.np
+        for path in self.each_path():
+            stats = group_stats(np.array([2, 1, 2]), np.array([1.0, 4.0, 3.0]), np.array([1, 1, 3]),
+                                aggs=['count', 'mean', 'median'])
+            self.assertEqual(stats.keys, [2, 1], path)
+            self.assertIs(type(stats.keys[0]), int)
+            self.assertEqual(stats.to_dict()[2], {'count': 2, 'mean': 2.5, 'median': 3.0}, path)
+            empty = group_stats(np.array([]), np.array([]))
+            self.assertEqual(empty.keys, [])
+            acc = GroupAccumulator().update(np.array(['a', 'b']), np.array([1.0, 2.0]))
+            self.assertEqual(GroupAccumulator.deserialize(acc.serialize()).result().keys, ['a', 'b'])
+
+    def test_merge(self):
+        """测试分片累加再合并与一次处理全部数据一致"""
+        aggs = ['count', 'mean', 'variance', 'min', 'max', 'p75']
+        for path in self.each_path():
+            expected = group_stats(self.keys, self.values, self.weights, aggs=aggs).to_dict()
+            merged = GroupAccumulator(aggs)
+            for start in range(0, 600, 150):
+                part = GroupAccumulator(aggs)
+                part.update(self.keys[start:start + 150], self.values[start:start + 150],
+                            self.weights[start:start + 150])
+                merged.merge(part)
+            self.assertEqual(len(merged), len(expected))
+            result = merged.result().to_dict()
+            for key, row in expected.items():
+                for name, value in row.items():
+                    self.assertAlmostEqual(result[key][name], value, msg=f"{path} {key} {name}")
+
+    def test_edge_cases(self):
+        """测试空输入、零权重组、生成器输入和参数校验"""
+        stats = group_stats([], [])
+        self.assertEqual(stats.keys, [])
+        self.assertEqual(len(stats.columns['mean']), 0)
+        rows = group_stats(['x', 'y', 'y'], [5.0, 1.0, 3.0], [0, 1, 3],
+                           aggs=['count', 'mean', 'min', 'median']).to_dict()
+        self.assertEqual(rows['x'], {'count': 1, 'mean': 0.0, 'min': 0.0, 'median': 0.0})
+        self.assertEqual(rows['y']['mean'], 2.5)
+        self.assertEqual(rows['y']['median'], 3.0)
+        stats = group_stats((k for k in 'abab'), (x for x in [1, 2, 3, 4]), aggs=['sum'])
+        self.assertEqual(list(stats.columns['sum']), [4.0, 6.0])
+        self.assertEqual(list(group_stats([(1, 'a'), (1, 'a')], [1, 2], aggs=['count']).columns['count']), [2])
+        stats = group_stats(array('q', [3, 1, 3]), array('d', [1.0, 2.0, 5.0]), aggs=['mean'])
+        self.assertEqual((stats.keys, list(stats.columns['mean'])), ([3, 1], [3.0, 2.0]))
+        with self.assertRaises(ValueError):
+            group_stats(['a'], [1, 2])
+        with self.assertRaises(ValueError):
+            group_stats(['a'], [1], [-1])
+        for bad in ('mode', 'p101', 'pxx'):
+            with self.assertRaises(ValueError):
+                GroupAccumulator([bad])
+        with self.assertRaises(ValueError):
+            GroupAccumulator(['p50']).merge(GroupAccumulator(['mean']).update(['a'], [1]))
+
+
+class TestStateCodec(unittest.TestCase):
+    """测试统计状态的二进制编码"""
+
+    def test_running_stats_round_trip(self):
+        """测试 RunningStats 往返后状态完全相同，可以继续累加"""
+        for data, policy in (([0.1] * 10 + [1e9, -3.5], None), ([1, 2, 3, 10 ** 12], None),
+                             ([1.0, None, 2.0], 'omit'), ([], None)):
+            stats = RunningStats(data, nan_policy=policy)
+            blob = stats.serialize()
+            self.assertEqual(len(blob), 48)
+            restored = RunningStats.deserialize(blob)
+            self.assertEqual(restored.nan_policy, policy)
+            self.assertEqual((restored.count, restored.total, restored.mean, restored.variance),
+                             (stats.count, stats.total, stats.mean, stats.variance))
+            self.assertIs(type(restored.total), type(stats.total))
+            restored.push(7)
+            stats.push(7)
+            self.assertEqual(restored.variance, stats.variance)
+        # 超出 int64 的整数总和退回 float64
+        self.assertAlmostEqual(RunningStats.deserialize(RunningStats([2 ** 70]).serialize()).total,
+                               float(2 ** 70))
+
+    def test_running_min_max_round_trip(self):
+        """测试 RunningMinMax 往返（整数、浮点数、空、NaN）"""
+        for data in ([3, -1, 4], [2.5, 0.5], [], [1.0, math.nan]):
+            extremes = RunningMinMax(data, nan_policy='propagate' if data[-1:] == [math.nan] else None)
+            blob = extremes.serialize()
+            self.assertEqual(len(blob), 32)
+            restored = RunningMinMax.deserialize(blob)
+            self.assertEqual(restored.count, extremes.count)
+            self.assertEqual(repr(restored), repr(extremes))
+        self.assertIs(type(RunningMinMax.deserialize(RunningMinMax([3, 1]).serialize()).minimum), int)
+
+    def test_constant_size(self):
+        """测试定长状态的大小与数据量无关"""
+        small = encode_states([RunningStats(range(10)), RunningMinMax(range(10))])
+        large = encode_states([RunningStats(range(100_000)), RunningMinMax(range(100_000))])
+        self.assertEqual(len(small), len(large))
+
+    def test_group_accumulator_round_trip(self):
+        """测试 GroupAccumulator 往返（str / int 键，有无分位数）"""
+        rng = random.Random(25)
+        values = [rng.random() for _ in range(300)]
+        for keys in ([rng.choice(['α', 'b', '服务', '']) for _ in range(300)],
+                     [rng.randrange(-5, 5) for _ in range(300)]):
+            for aggs in (['count', 'mean', 'variance', 'min', 'max'], ['sum', 'p90', 'median']):
+                acc = GroupAccumulator(aggs).update(keys, values)
+                restored = GroupAccumulator.deserialize(acc.serialize())
+                self.assertEqual(restored.result().to_dict(), acc.result().to_dict())
+                restored.update(['新'] if isinstance(keys[0], str) else [99], [1.0])
+                self.assertEqual(len(restored), len(acc) + 1)
+        with self.assertRaises(TypeError):
+            GroupAccumulator().update([(1, 2)], [1.0]).serialize()
+
+    def test_batch_zero_copy(self):
+        """测试一条消息打包多种状态，并从更大缓冲区的切片上解码"""
+        sketch = KLLSketch(k=50, seed=1)
+        sketch.extend(range(1000))
+        states = [RunningStats([1.0, 2.0, 4.0]), RunningMinMax([5, 9]), sketch,
+                  GroupAccumulator(['mean']).update(['a', 'b', 'a'], [1, 2, 3])]
+        payload = encode_states(states)
+        buffer = bytearray(b'prefix') + payload
+        stats, extremes, restored, groups = decode_states(memoryview(buffer)[6:])
+        self.assertEqual(stats.variance, states[0].variance)
+        self.assertEqual((extremes.minimum, extremes.maximum), (5, 9))
+        self.assertEqual(restored.quantiles([0.1, 0.5, 0.9]), sketch.quantiles([0.1, 0.5, 0.9]))
+        self.assertEqual(groups.result().to_dict(), {'a': {'mean': 2.0}, 'b': {'mean': 2.0}})
+        self.assertEqual(decode_state(states[0].serialize()).mean, states[0].mean)
+        self.assertEqual(decode_states(encode_states([])), [])
+
+    def test_invalid_payloads(self):
+        """测试魔数、版本、长度错误和不支持的类型"""
+        blob = RunningStats([1.0]).serialize()
+        for bad in (blob[:-1], b'XXXX' + blob[4:], blob[:4] + bytes([9]) + blob[5:]):
+            with self.assertRaises(ValueError):
+                RunningStats.deserialize(bad)
+        with self.assertRaises(ValueError):
+            RunningMinMax.deserialize(blob)
+        with self.assertRaises(ValueError):
+            decode_state(b'ABCD' + bytes(44))
+        payload = encode_states([RunningStats([1.0])])
+        with self.assertRaises(ValueError):
+            decode_states(payload[:-1])
+        with self.assertRaises(ValueError):
+            GroupAccumulator.deserialize(GroupAccumulator().update(['a'], [1]).serialize()[:-1])
+        with self.assertRaises(TypeError):
+            encode_states([[1, 2, 3]])
+
+
+class TestParallelReduction(unittest.TestCase):
+    """测试并行分块归约（min_size=0 强制走多进程路径）"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.reducer = ParallelReducer(workers=2, min_size=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.reducer.close()
+
+    def test_chunk_bounds(self):
+        """测试分块边界覆盖全部数据且互不重叠"""
+        self.assertEqual(_chunk_bounds(10, 3), [(0, 4), (4, 7), (7, 10)])
+        self.assertEqual(_chunk_bounds(2, 4), [(0, 1), (1, 2)])
+
+    def test_parallel_matches_serial(self):
+        """测试并行结果与串行函数一致"""
+        rng = random.Random(8)
+        floats = [rng.uniform(-1, 1) for _ in range(20001)]
+        ints = [rng.randint(-10 ** 12, 10 ** 12) for _ in range(20001)]
+        for data in (floats, ints, array('d', floats), [1, 2.5, 3]):
+            expected = describe(data)
+            ours = self.reducer.describe(data)
+            self.assertEqual(ours.count, expected.count)
+            self.assertAlmostEqual(ours.mean, expected.mean, delta=abs(expected.mean) * 1e-9)
+            self.assertAlmostEqual(ours.variance, expected.variance, delta=expected.variance * 1e-12)
+            self.assertEqual((ours.minimum, ours.maximum), (expected.minimum, expected.maximum))
+            self.assertAlmostEqual(self.reducer.average(data), average(data),
+                                   delta=abs(expected.mean) * 1e-9)
+            self.assertEqual(self.reducer.find_max(data), find_max(data))
+            self.assertEqual(self.reducer.find_min(data), find_min(data))
+            self.assertAlmostEqual(self.reducer.standard_deviation(data), standard_deviation(data),
+                                   delta=expected.stddev * 1e-12)
+        # 整数求和保持精确
+        self.assertEqual(self.reducer.sum_numbers(ints), sum(ints))
+
+    def test_float_sum_rounds_once(self):
+        """测试浮点分块合并只舍入一次，与整体 fsum 相同"""
+        # 两个分块各自舍入都会丢掉 2 ** -53，合并后差一个 ulp
+        data = [1.0, 2.0 ** -53, 2.0 ** -53, 0.0]
+        self.assertEqual(self.reducer.sum_numbers(data), math.fsum(data))
+        self.assertEqual(self.reducer.sum_numbers(array('d', data)), 1.0 + 2.0 ** -52)
+        rng = random.Random(9)
+        floats = [rng.uniform(-1, 1) * 10.0 ** rng.randint(-20, 20) for _ in range(5001)]
+        self.assertEqual(self.reducer.sum_numbers(floats), math.fsum(floats))
+        self.assertEqual(self.reducer.sum_numbers([1.0, math.inf, 2.0]), math.inf)
+
+    def test_big_ints_fall_back_to_serial(self):
+        """测试超出 int64 的整数不会被转成 float64，结果与串行一样精确"""
+        data = [3, 2 ** 70 + 1, -5, 2 ** 64, 7]
+        self.assertEqual(self.reducer.sum_numbers(data), sum(data))
+        self.assertIs(type(self.reducer.sum_numbers(data)), int)
+        self.assertEqual(self.reducer.average(data), average(data))
+        self.assertEqual(self.reducer.find_max(data), 2 ** 70 + 1)
+        self.assertEqual(self.reducer.find_min(data), -5)
+        self.assertEqual(self.reducer.describe(data).total, sum(data))
+        # 含浮点数的列表仍然走 float64 的并行路径
+        self.assertEqual(self.reducer.sum_numbers([1, 2.5, 3]), 6.5)
+        with self.assertRaises(TypeError):
+            self.reducer.sum_numbers([1, "x"])
+
+    def test_serial_fallback(self):
+        """测试小数据、空输入和单进程时走串行路径"""
+        self.assertEqual(self.reducer.sum_numbers([]), 0)
+        self.assertEqual(self.reducer.describe(None).count, 0)
+        self.assertEqual(parallel_describe([1, 2, 3], workers=1).mean, 2.0)
+        self.assertEqual(ParallelReducer(workers=4).variance([1, 2, 3, 4, 5]), 2.0)
+
+
+class TestAsyncStats(unittest.TestCase):
+    """测试 asyncio 版本的统计函数"""
+
+    @staticmethod
+    async def _numbers(values, chunk=None):
+        """不做任何 await 的异步生成器：不主动让出就会一直占住事件循环"""
+        if chunk is None:
+            for x in values:
+                yield x
+        else:
+            for start in range(0, len(values), chunk):
+                yield values[start:start + chunk]
+
+    def _assert_summary(self, ours, expected):
+        self.assertEqual(ours.count, expected.count)
+        self.assertAlmostEqual(ours.mean, expected.mean, delta=abs(expected.mean) * 1e-12)
+        self.assertAlmostEqual(ours.variance, expected.variance, delta=expected.variance * 1e-12)
+        self.assertEqual((ours.minimum, ours.maximum), (expected.minimum, expected.maximum))
+
+    def test_matches_describe(self):
+        """测试逐个数字、数字批次、混合数据源和序列输入的结果与 describe() 一致"""
+        rng = random.Random(18)
+        data = [rng.uniform(-100, 100) for _ in range(30_000)]
+        expected = describe(data)
+
+        async def mixed():
+            yield data[0]
+            yield array('d', data[1:20_000])
+            for x in data[20_000:]:
+                yield x
+
+        async def main():
+            return [
+                await astats(self._numbers(data), batch_size=1000),
+                await astats(self._numbers(data, 7000), batch_size=1000),
+                await astats(self._numbers(data, 7000), offload_threshold=5000),
+                await astats(mixed(), offload_threshold=10_000),
+                await astats(data, offload_threshold=10_000),
+            ]
+
+        for summary in asyncio.run(main()):
+            self._assert_summary(summary, expected)
+
+    def test_convenience_functions(self):
+        """测试 aaverage / avariance / amedian / aquantiles"""
+        data = [random.Random(19).random() for _ in range(5001)]
+
+        async def main():
+            return (
+                await aaverage(self._numbers([1, 2, 3, 4, 5])),
+                await avariance([1, 2, 3, 4, 5]),
+                await amedian(self._numbers(data, 1000)),
+                await aquantiles(self._numbers(data), [0.1, 0.9], offload_threshold=1000),
+                await amedian(self._numbers(data), k=200),
+            )
+
+        mean, var, exact_median, exact_quantiles, approx_median = asyncio.run(main())
+        self.assertEqual((mean, var), (3.0, 2.0))
+        self.assertEqual(exact_median, median(data))
+        self.assertEqual(exact_quantiles, quantiles(data, [0.1, 0.9]))
+        self.assertAlmostEqual(approx_median, median(data), delta=0.03)
+
+    def test_event_loop_stays_responsive(self):
+        """测试处理大量数据时其他协程仍能定期运行"""
+        data = [random.Random(20).random() for _ in range(200_000)]
+
+        async def main():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0)
+
+            task = asyncio.create_task(ticker())
+            await astats(self._numbers(data), batch_size=1000)
+            per_item_ticks = ticks
+            await astats(data, offload_threshold=50_000)
+            task.cancel()
+            return per_item_ticks, ticks - per_item_ticks
+
+        per_item_ticks, offloaded_ticks = asyncio.run(main())
+        self.assertGreaterEqual(per_item_ticks, len(data) // 1000)
+        self.assertGreater(offloaded_ticks, 0)
+
+    def test_empty_and_errors(self):
+        """测试空数据源和非法参数"""
+        async def main():
+            self.assertEqual(await astats(self._numbers([])), describe([]))
+            self.assertEqual(await astats(None), describe(None))
+            self.assertEqual(await amedian(self._numbers([])), 0)
+            self.assertEqual(await aquantiles(self._numbers([]), [0.5], k=50), [])
+            with self.assertRaises(ValueError):
+                await aquantiles(self._numbers([1, 2]), [2.0])
+            with self.assertRaises(ValueError):
+                await astats(self._numbers([1, 2]), batch_size=0)
+
+        asyncio.run(main())
+
+
+class TestMmapIO(unittest.TestCase):
+    """测试内存映射二进制输入"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'data.bin')
+        rng = random.Random(9)
+        self.data = [rng.uniform(-1e6, 1e6) for _ in range(5001)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_header_format(self):
+        """测试自描述文件头格式，映射后的视图可直接用于归约函数"""
+        self.assertEqual(write_binary(self.path, self.data), len(self.data))
+        with open_binary(self.path) as mapped:
+            self.assertEqual(len(mapped), len(self.data))
+            self.assertEqual(mapped.typecode, 'd')
+            self.assertAlmostEqual(average(mapped.values), average(self.data))
+            self.assertEqual(find_max(mapped.values), find_max(self.data))
+            self.assertAlmostEqual(variance(mapped.values), variance(self.data), delta=1e-3)
+
+    def test_sidecar_and_raw(self):
+        """测试 .meta.json 附属文件和直接指定 dtype"""
+        ints = list(range(-50, 51))
+        write_binary(self.path, ints, dtype='int64', header=False)
+        self.assertTrue(os.path.exists(self.path + '.meta.json'))
+        with open_binary(self.path) as mapped:
+            self.assertEqual(sum_numbers(mapped.values), sum(ints))
+        os.remove(self.path + '.meta.json')
+        with open_binary(self.path, dtype='int64') as mapped:
+            self.assertEqual(median(mapped.values), 0)
+        with self.assertRaises(ValueError):
+            open_binary(self.path)
+
+    def test_bounded_quantiles(self):
+        """测试有界内存分位数与 quantiles/median 结果一致"""
+        write_binary(self.path, self.data)
+        rng = random.Random(4)
+        duplicates = [rng.randint(0, 3) for _ in range(4000)]
+        qs = [0, 0.01, 0.25, 0.5, 0.9, 0.99, 1]
+        with open_binary(self.path) as mapped:
+            # 调小 max_candidates 和桶数，强制多趟收缩
+            self.assertEqual(bounded_quantiles(mapped.values, qs, max_candidates=50, buckets=8),
+                             quantiles(self.data, qs))
+            self.assertEqual(bounded_median(mapped.values), median(self.data))
+        self.assertEqual(bounded_quantiles(duplicates, qs, max_candidates=10, buckets=4),
+                         quantiles(duplicates, qs))
+        self.assertEqual(bounded_median(duplicates), median(duplicates))
+
+    def test_empty_file(self):
+        """测试空文件"""
+        write_binary(self.path, [])
+        with open_binary(self.path) as mapped:
+            self.assertEqual(len(mapped), 0)
+            self.assertEqual(sum_numbers(mapped.values), 0)
+            self.assertEqual(bounded_quantiles(mapped.values, [0.5]), [])
+            self.assertEqual(bounded_median(mapped.values), 0)
+
+
+class TestBufferInputs(unittest.TestCase):
+    """测试 array.array / memoryview / NumPy 数组输入"""
+
+    def setUp(self):
+        self.values = [3.5, -1.0, 7.25, 0.5, 2.0, 9.0]
+        self.buffers = [array('d', self.values), memoryview(array('d', self.values))]
+        if math_utils.np is not None:
+            self.buffers.append(math_utils.np.array(self.values))
+
+    def test_buffer_results_match_list(self):
+        """测试缓冲区输入与列表输入结果一致"""
+        for buf in self.buffers:
+            self.assertAlmostEqual(sum_numbers(buf), sum_numbers(self.values))
+            self.assertAlmostEqual(average(buf), average(self.values))
+            self.assertEqual(find_max(buf), find_max(self.values))
+            self.assertEqual(find_min(buf), find_min(self.values))
+            self.assertEqual(median(buf), median(self.values))
+            self.assertAlmostEqual(variance(buf), variance(self.values))
+            self.assertAlmostEqual(standard_deviation(buf), standard_deviation(self.values))
+            self.assertEqual(quantiles(buf, [0.1, 0.9]), quantiles(self.values, [0.1, 0.9]))
+            self.assertAlmostEqual(describe(buf).sample_variance, describe(self.values).sample_variance)
+            self.assertAlmostEqual(RunningStats(buf).variance, variance(self.values))
+            self.assertEqual(RunningMinMax(buf).maximum, find_max(self.values))
+
+    def test_empty_buffers(self):
+        """测试空缓冲区按空输入处理（不能用 == [] 判断）"""
+        empties = [array('d'), memoryview(b'')]
+        if math_utils.np is not None:
+            empties.append(math_utils.np.array([]))
+        for empty in empties:
+            self.assertEqual(sum_numbers(empty), 0)
+            self.assertEqual(median(empty), 0)
+            self.assertEqual(variance(empty), 0)
+
+    @unittest.skipIf(math_utils.np is None, "未安装 NumPy")
+    def test_numpy_zero_copy(self):
+        """测试 array.array 转换为 ndarray 时不复制数据"""
+        buf = array('d', self.values)
+        arr = math_utils._as_ndarray(buf)
+        self.assertTrue(math_utils.np.shares_memory(arr, math_utils.np.frombuffer(buf)))
+        self.assertIsNone(math_utils._as_ndarray(self.values))
+
+    def test_integer_buffer_overflow(self):
+        """测试整数缓冲区的总和超出 int64 时仍然精确（NumPy 的整数求和会回绕）"""
+        buffers = [array('q', [2 ** 62, 2 ** 62]), array('Q', [2 ** 63, 2 ** 63])]
+        if math_utils.np is not None:
+            buffers.append(math_utils.np.array([2 ** 62] * 4, dtype=math_utils.np.int64))
+        for buf in buffers:
+            exact = sum(map(int, buf))
+            self.assertEqual(sum_numbers(buf), exact)
+            self.assertEqual(sum_numbers(buf, summation='pairwise'), exact)
+            self.assertEqual(describe(buf).total, exact)
+            self.assertEqual(RunningStats(buf).total, exact)
+            self.assertEqual(average(buf), exact / len(buf))
+        self.assertEqual(sum_numbers(array('q', [1, 2, 3])), 6)
+
+    def test_integer_buffer_median(self):
+        """测试整数缓冲区的中位数与列表结果类型一致（奇数个时是中间元素本身）"""
+        for values in ([3, 1, 2], [4, 1, 3, 2], [2 ** 62 + 1, 1, 2 ** 62 + 3, 5]):
+            buffers = [array('q', values)]
+            if math_utils.np is not None:
+                buffers.append(math_utils.np.array(values))
+            for buf in buffers:
+                result = median(buf)
+                self.assertEqual(result, median(values))
+                self.assertIs(type(result), type(median(values)))
+        buf = array('q', [5, 3, 1])
+        self.assertEqual(median(buf, inplace=True), 3)
+
 
 class TestStringUtils(unittest.TestCase):
     """测试字符串工具函数"""
@@ -107,6 +1396,560 @@ class TestStringUtils(unittest.TestCase):
         self.assertEqual(remove_extra_spaces("noextra"), "noextra")
 
 
+class TestStringStreaming(unittest.TestCase):
+    """测试流式文本处理"""
+
+    def random_chunks(self, rng, text):
+        cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 6))))
+        return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+    def test_matches_whole_string_functions(self):
+        """测试任意切块方式下结果与整串函数一致"""
+        rng = random.Random(10)
+        alphabet = list("abcDE \t\n  ßéǅ中ﬁ'9")
+        for _ in range(300):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            chunks = self.random_chunks(rng, text)
+            self.assertEqual(list(stream_words(chunks)), text.split())
+            self.assertEqual(count_words_stream(chunks), count_words(text))
+            self.assertEqual(''.join(stream_remove_extra_spaces(chunks)), remove_extra_spaces(text))
+            self.assertEqual(''.join(stream_capitalize_words(chunks)), text.title())
+            for size in (1, 3, 64):
+                self.assertEqual(''.join(stream_reverse(io.BytesIO(text.encode()), size)),
+                                 reverse_string(text))
+
+    def test_file_objects(self):
+        """测试文本/二进制文件对象输入（多字节字符被切开）"""
+        text = "  你好   世界  hello  "
+        self.assertEqual(list(stream_words(io.StringIO(text), chunk_size=2)), ['你好', '世界', 'hello'])
+        self.assertEqual(list(stream_words(io.BytesIO(text.encode()), chunk_size=2)),
+                         ['你好', '世界', 'hello'])
+        self.assertEqual(''.join(iter_chunks(io.BytesIO(text.encode()), chunk_size=1)), text)
+
+    def test_running_counts_and_empty(self):
+        """测试运行计数与空输入"""
+        self.assertEqual(list(stream_word_counts(["a b ", "c d e"])), [2, 4, 5])
+        self.assertEqual(count_words_stream(None), 0)
+        self.assertEqual(count_words_stream(""), 0)
+        self.assertEqual(''.join(stream_remove_extra_spaces(["   ", "  "])), "")
+        self.assertEqual(list(stream_reverse(io.BytesIO(b''))), [])
+
+
+class TestBatchStrings(unittest.TestCase):
+    """测试批量字符串处理"""
+
+    pairs = [
+        (capitalize_words, capitalize_words_many),
+        (remove_extra_spaces, remove_extra_spaces_many),
+        (reverse_string, reverse_string_many),
+        (count_words, count_words_many),
+    ]
+
+    def setUp(self):
+        rng = random.Random(21)
+        alphabet = list("abcDE \t\n  ßéǅ中ﬁ'9")
+        self.texts = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+                      for _ in range(200)] + [None, '', '   ']
+
+    def test_matches_single_functions(self):
+        """测试结果与逐个调用一致（包括 None 和空字符串）"""
+        for single, many in self.pairs:
+            expected = [single(text) for text in self.texts]
+            self.assertEqual(many(self.texts), expected)
+            self.assertEqual(many(tuple(self.texts)), expected)
+            self.assertEqual(many(iter(self.texts)), expected)
+            lazy = many(self.texts, lazy=True)
+            self.assertNotIsInstance(lazy, list)
+            self.assertEqual(list(lazy), expected)
+
+    def test_empty_inputs(self):
+        """测试空输入"""
+        for _, many in self.pairs:
+            self.assertEqual(many([]), [])
+            self.assertEqual(many(None), [])
+            self.assertEqual(list(many(None, lazy=True)), [])
+
+    def test_process_pool(self):
+        """测试进程池模式：分块处理后按原顺序返回"""
+        from concurrent.futures import ProcessPoolExecutor
+        expected = [count_words(text) for text in self.texts]
+        self.assertEqual(count_words_many(self.texts, workers=2, chunk_size=17), expected)
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            for single, many in self.pairs:
+                result = many(iter(self.texts), lazy=True, workers=2, executor=pool, chunk_size=31)
+                self.assertEqual(list(result), [single(text) for text in self.texts])
+
+    def test_invalid_arguments(self):
+        """测试非法参数"""
+        with self.assertRaises(ValueError):
+            reverse_string_many(["a"], workers=0)
+        with self.assertRaises(ValueError):
+            reverse_string_many(["a"], workers=2, chunk_size=0)
+
+
+class TestBytesStringUtils(unittest.TestCase):
+    """测试字节串版本的字符串函数"""
+
+    def test_matches_bytes_split(self):
+        """测试与 bytes.split() / 整串函数的结果一致"""
+        rng = random.Random(13)
+        alphabet = list("ab \t\n\r\x0b\x0cé中😀") + ["   ", "\r\n"]
+        for _ in range(500):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            data = text.encode()
+            self.assertEqual(count_words_bytes(data), len(data.split()))
+            self.assertEqual(remove_extra_spaces_bytes(data), b' '.join(data.split()))
+            self.assertEqual(reverse_bytes(data, decode=True), reverse_string(text) if text else '')
+            self.assertEqual(reverse_bytes(data, mode='bytes'), data[::-1])
+            for view in (bytearray(data), memoryview(data)):
+                self.assertEqual(count_words_bytes(view), len(data.split()))
+
+    def test_count_across_blocks(self):
+        """测试单词跨越计数块边界"""
+        data = b"ab " * 50000 + b"x" * 70000 + b" y"
+        self.assertEqual(count_words_bytes(data), len(data.split()))
+
+    def test_output_buffer_and_decode(self):
+        """测试写入调用方提供的缓冲区、按需解码"""
+        out = bytearray(32)
+        size = remove_extra_spaces_bytes(b"  hello \t world  ", out=out)
+        self.assertEqual(out[:size], b"hello world")
+        self.assertEqual(reverse_bytes("中文".encode(), out=memoryview(out)), 6)
+        self.assertEqual(out[:6].decode(), "文中")
+        self.assertEqual(remove_extra_spaces_bytes(b" a  b ", decode=True), "a b")
+        with self.assertRaises(ValueError):
+            reverse_bytes(b"abcdef", out=bytearray(2))
+        with self.assertRaises(TypeError):
+            reverse_bytes(b"abc", out=bytes(3))
+        with self.assertRaises(ValueError):
+            reverse_bytes(b"abc", mode='word')
+
+    def test_grapheme_mode(self):
+        """测试字素簇模式保持组合字符、emoji 序列、国旗和 CRLF 完整"""
+        cases = {
+            "e\u0301x": "xe\u0301",
+            "a\r\nb": "b\r\na",
+            "\U0001f1e8\U0001f1f3\U0001f1ef\U0001f1f5": "\U0001f1ef\U0001f1f5\U0001f1e8\U0001f1f3",
+            "hi\U0001f469\u200d\U0001f4bb": "\U0001f469\u200d\U0001f4bbih",
+            "\U0001f44d\U0001f3fd!": "!\U0001f44d\U0001f3fd",
+        }
+        for text, expected in cases.items():
+            self.assertEqual(reverse_bytes(text.encode(), mode='grapheme', decode=True), expected)
+
+    def test_empty_input(self):
+        """测试空输入和 None"""
+        self.assertEqual(count_words_bytes(None), 0)
+        self.assertEqual(count_words_bytes(b"   "), 0)
+        self.assertEqual(remove_extra_spaces_bytes(None), b"")
+        self.assertEqual(reverse_bytes(b"", decode=True), "")
+
+
+class TestWordIndex(unittest.TestCase):
+    """测试词频索引与 Count-Min sketch"""
+
+    def test_exact_counts_match_counter(self):
+        """测试精确模式与 Counter(text.split()) 一致（任意切块）"""
+        rng = random.Random(11)
+        alphabet = list("ab c\t\n中 ")
+        for _ in range(200):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 50)))
+            cut = rng.randint(0, len(text))
+            index = WordIndex()
+            index.add([text[:cut], text[cut:]])
+            expected = Counter(text.split())
+            self.assertEqual(dict(index.most_common()), dict(expected))
+            self.assertEqual(index.total, count_words(text))
+            self.assertEqual(len(index), len(expected))
+
+    def test_top_k(self):
+        """测试 top-k 排序与并列时保持首次出现顺序"""
+        self.assertEqual(word_frequencies("a b a c a b", top_k=2), [('a', 3), ('b', 2)])
+        self.assertEqual(word_frequencies("to be or not to be", top_k=3),
+                         [('to', 2), ('be', 2), ('or', 1)])
+        self.assertEqual(word_frequencies(io.StringIO("x y x"), chunk_size=1), [('x', 2), ('y', 1)])
+        self.assertEqual(word_frequencies(None), [])
+        self.assertEqual(word_frequencies("   "), [])
+
+    def test_merge_shards(self):
+        """测试分片合并等于整体统计"""
+        text = "the quick brown fox jumps over the lazy dog the end"
+        left, right = WordIndex(), WordIndex()
+        left.add(text[:20])
+        right.add(text[20:])
+        merged = left.merge(right)
+        # 切点落在单词中间时两个分片各得到半个单词，这里切点选在空格上
+        self.assertEqual(text[19], ' ')
+        self.assertEqual(merged.most_common(), word_frequencies(text))
+        self.assertEqual(merged['the'], 3)
+        with self.assertRaises(ValueError):
+            WordIndex().merge(WordIndex(top_k=2, sketch_width=64))
+
+    def test_sketch_mode(self):
+        """测试 sketch 模式：估计值不小于真实值，能找出高频词，合并后结果一致"""
+        rng = random.Random(12)
+        words = ["hot"] * 500 + ["warm"] * 200 + ["mild"] * 100 + [f"id{i}" for i in range(3000)]
+        rng.shuffle(words)
+        truth = Counter(words)
+        half = len(words) // 2
+        whole = WordIndex(top_k=3, sketch_width=512)
+        whole.add(' '.join(words))
+        left = WordIndex(top_k=3, sketch_width=512)
+        right = WordIndex(top_k=3, sketch_width=512)
+        left.add(' '.join(words[:half]))
+        right.add(' '.join(words[half:]))
+        left.merge(right)
+        for index in (whole, left):
+            self.assertFalse(index.exact)
+            self.assertEqual(index.total, len(words))
+            self.assertEqual([w for w, _ in index.most_common()], ['hot', 'warm', 'mild'])
+            for word in ('hot', 'warm', 'mild', 'id7'):
+                self.assertGreaterEqual(index[word], truth[word])
+        self.assertEqual(whole.most_common(), left.most_common())
+        with self.assertRaises(ValueError):
+            WordIndex(sketch_width=64)
+
+    def test_count_min_sketch(self):
+        """测试 Count-Min sketch 的基本性质"""
+        sketch = CountMinSketch(width=8, depth=3)
+        for word in "a b c d e f g h i j a a".split():
+            sketch.add(word)
+        self.assertGreaterEqual(sketch.estimate('a'), 3)
+        self.assertEqual(sketch.total, 12)
+        with self.assertRaises(ValueError):
+            sketch.merge(CountMinSketch(width=16, depth=3))
+        with self.assertRaises(ValueError):
+            CountMinSketch(width=0)
+
+
+class TestDecorators(unittest.TestCase):
+    """测试验证装饰器"""
+
+    def test_generated_wrapper_keeps_signature(self):
+        """测试生成的包装函数与原函数签名一致，并支持关键字调用"""
+        self.assertEqual(inspect.signature(median), inspect.signature(median.__wrapped__))
+        self.assertEqual(median(numbers=[3, 1, 2]), 2)
+        self.assertEqual(median([], inplace=True), 0)
+
+        @validate_non_empty(return_value=-1)
+        def pick(data, index=0, *, reverse=False):
+            return data[-1 - index] if reverse else data[index]
+
+        self.assertEqual(pick([]), -1)
+        self.assertEqual(pick(None, 1), -1)
+        self.assertEqual(pick([1, 2, 3], 1, reverse=True), 2)
+        self.assertEqual(pick.__name__, 'pick')
+
+    def test_generic_wrapper_fallback(self):
+        """测试带 *args 的函数退回通用包装"""
+        @validate_non_empty(return_value=-1)
+        def first(*args):
+            return args[0][0]
+
+        self.assertEqual(first([]), -1)
+        self.assertEqual(first([5]), 5)
+
+    def test_unsized_inputs_pass_through(self):
+        """测试生成器等没有长度的输入不被当作空值"""
+        @validate_non_empty(return_value=-1)
+        def total(numbers):
+            return sum(numbers)
+
+        self.assertEqual(total(x for x in [1, 2]), 3)
+
+    def test_string_validator(self):
+        """测试字符串验证"""
+        @validate_string_not_empty(return_value="空")
+        def shout(text, suffix="!"):
+            return text.upper() + suffix
+
+        self.assertEqual(shout(""), "空")
+        self.assertEqual(shout(None), "空")
+        self.assertEqual(shout("hi", suffix="?"), "HI?")
+
+    def test_validation_switch(self):
+        """测试关闭验证时直接返回原函数"""
+        def bare(numbers):
+            return max(numbers)
+
+        decorators.set_validation_enabled(False)
+        try:
+            self.assertIs(validate_non_empty(0)(bare), bare)
+            self.assertIs(validate_string_not_empty("")(bare), bare)
+        finally:
+            decorators.set_validation_enabled(True)
+        self.assertIsNot(validate_non_empty(0)(bare), bare)
+
+
+class TestMemoize(unittest.TestCase):
+    """测试结果缓存装饰器"""
+
+    def make_counted(self, **options):
+        calls = []
+
+        @memoize(**options)
+        def total(numbers, scale=1):
+            calls.append(numbers)
+            return sum(numbers) * scale
+
+        return total, calls
+
+    def test_hits_and_fingerprints(self):
+        """测试可哈希参数、列表内容指纹、缓冲区指纹"""
+        total, calls = self.make_counted()
+        self.assertEqual(total((1, 2, 3)), 6)
+        self.assertEqual(total((1, 2, 3)), 6)
+        self.assertEqual(total([1, 2, 3]), 6)
+        self.assertEqual(total([1, 2, 3]), 6)
+        self.assertEqual(total(array('d', [1, 2])), 3)
+        self.assertEqual(total(array('d', [1, 2])), 3)
+        # 类型码不同的缓冲区不能共用结果
+        self.assertEqual(total(array('q', [1, 2])), 3)
+        self.assertEqual(total([1, 2, 3], scale=2), 12)
+        self.assertEqual(len(calls), 5)
+        info = total.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (3, 5, 5))
+
+    def test_typed_keys(self):
+        """测试相等但类型或符号不同的参数不共用结果"""
+        @memoize()
+        def describe_args(*args):
+            return repr(args)
+
+        self.assertEqual(describe_args(1, 2), "(1, 2)")
+        self.assertEqual(describe_args(1.0, 2.0), "(1.0, 2.0)")
+        self.assertEqual(describe_args(True), "(True,)")
+        self.assertEqual(describe_args(0.0), "(0.0,)")
+        self.assertEqual(describe_args(-0.0), "(-0.0,)")
+        self.assertEqual(describe_args((1, -0.0)), "((1, -0.0),)")
+        self.assertEqual(describe_args((1.0, 0.0)), "((1.0, 0.0),)")
+        self.assertEqual(describe_args(1, 2), "(1, 2)")
+        self.assertEqual(describe_args.cache_info().hits, 1)
+
+        @memoize(typed=False)
+        def untyped(x):
+            return repr(x)
+
+        self.assertEqual([untyped(1), untyped(1.0)], ["1", "1"])
+        self.assertEqual(untyped.cache_info().hits, 1)
+
+    def test_mutated_list_is_a_new_key(self):
+        """测试列表内容变化后不会返回旧结果"""
+        total, _ = self.make_counted()
+        data = [1, 2]
+        self.assertEqual(total(data), 3)
+        data.append(3)
+        self.assertEqual(total(data), 6)
+
+    def test_iterators_bypass_cache(self):
+        """测试迭代器参数不走缓存"""
+        total, calls = self.make_counted()
+        self.assertEqual(total(iter([1, 2])), 3)
+        self.assertEqual(total(iter([1, 2])), 3)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(total.cache_info().currsize, 0)
+
+    def test_lru_and_max_bytes_eviction(self):
+        """测试条目数上限和字节数上限"""
+        total, calls = self.make_counted(maxsize=2)
+        total((1,))
+        total((2,))
+        total((1,))
+        total((3,))  # 淘汰最久未使用的 (2,)
+        total((1,))
+        total((2,))
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(total.cache_info().evictions, 2)
+
+        @memoize(maxsize=None, max_bytes=2000)
+        def repeat(text, times):
+            return text * times
+
+        repeat("a", 10)
+        repeat("b", 10)
+        repeat("c", 5000)  # 单个结果超过上限，不缓存
+        info = repeat.cache_info()
+        self.assertEqual(info.currsize, 2)
+        self.assertLessEqual(info.nbytes, 2000)
+
+    def test_ttl_expiration(self):
+        """测试过期条目会被重新计算"""
+        total, calls = self.make_counted(ttl=0.05)
+        total((1, 2))
+        total((1, 2))
+        time.sleep(0.06)
+        total((1, 2))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(total.cache_info().expirations, 1)
+        total.cache_clear()
+        self.assertEqual(total.cache_info(), total.cache_info()._replace(hits=0, misses=0, currsize=0))
+
+    def test_stacks_with_validators(self):
+        """测试与验证装饰器叠加：签名保持不变，空输入正确处理"""
+        calls = []
+
+        @memoize()
+        @validate_non_empty(return_value=0)
+        def outer(numbers, inplace=False):
+            calls.append(1)
+            return max(numbers)
+
+        @validate_string_not_empty(return_value="")
+        @memoize()
+        def inner(text):
+            calls.append(2)
+            return text.title()
+
+        self.assertEqual(str(inspect.signature(outer)), "(numbers, inplace=False)")
+        self.assertEqual(str(inspect.signature(inner)), "(text)")
+        self.assertEqual([outer(None), outer(None), outer([1, 5]), outer([1, 5])], [0, 0, 5, 5])
+        self.assertEqual(outer.cache_info().hits, 2)
+        self.assertEqual([inner(""), inner("ab cd"), inner("ab cd")], ["", "Ab Cd", "Ab Cd"])
+        self.assertEqual(calls.count(2), 1)
+        self.assertEqual(inner.__wrapped__.cache_info().misses, 1)
+
+
+class TestInstrumentation(unittest.TestCase):
+    """测试调用统计"""
+
+    def test_records_calls_sizes_and_errors(self):
+        """测试调用次数、输入规模、异常次数"""
+        registry = MetricsRegistry(enabled=True)
+
+        @instrument(registry=registry)
+        @validate_non_empty(return_value=0)
+        def biggest(numbers, default=None):
+            return max(numbers)
+
+        self.assertEqual(str(inspect.signature(biggest)), "(numbers, default=None)")
+        biggest([1, 2, 3])
+        biggest(numbers=[5] * 10)
+        with self.assertRaises(TypeError):
+            biggest([1, 'a'])
+        stats = registry.snapshot()['biggest']
+        self.assertEqual(stats['calls'], 3)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['input_items_total'], 15)
+        self.assertEqual(stats['input_items_max'], 10)
+        self.assertEqual(sum(stats['latency_buckets'].values()), 3)
+        self.assertLessEqual(stats['latency_seconds']['p50'], stats['latency_seconds']['max'])
+
+    def test_runtime_switch(self):
+        """测试关闭时不记录、打开后立即生效"""
+        registry = MetricsRegistry(enabled=False)
+        wrapped = instrument('upper', registry)(str.upper)
+        self.assertEqual(wrapped("a"), "A")
+        self.assertEqual(registry.snapshot(), {})
+        registry.enabled = True
+        wrapped("b")
+        self.assertEqual(registry.snapshot()['upper']['calls'], 1)
+        registry.reset()
+        self.assertEqual(registry.snapshot(), {})
+        self.assertIn('upper', registry.snapshot(include_idle=True))
+        # reset() 之后包装函数仍然记录到同一个统计对象
+        wrapped("c")
+        self.assertEqual(registry.snapshot()['upper']['calls'], 1)
+
+    def test_histogram_buckets(self):
+        """测试分桶边界与分位数估计的相对误差"""
+        histogram = LatencyHistogram()
+        values = [0, 1, 15, 16, 17, 1000, 123456, 10 ** 9, 10 ** 15]
+        for value in values:
+            histogram.record(value)
+        self.assertEqual(histogram.count, len(values))
+        self.assertEqual(histogram.maximum, 10 ** 15)
+        self.assertEqual(histogram.count_below(1024), 6)
+        histogram = LatencyHistogram()
+        for value in range(1, 10001):
+            histogram.record(value)
+        self.assertLessEqual(abs(histogram.quantile(0.5) - 5000) / 5000, 0.125)
+
+    def test_prometheus_text(self):
+        """测试 Prometheus 文本格式"""
+        registry = MetricsRegistry(enabled=True)
+        instrument('count_words', registry)(count_words)("a b c")
+        text = registry.prometheus()
+        self.assertIn('py_utils_calls_total{function="count_words"} 1', text)
+        self.assertIn('# TYPE py_utils_latency_seconds histogram', text)
+        self.assertIn('py_utils_latency_seconds_bucket{function="count_words",le="+Inf"} 1', text)
+        self.assertIn('py_utils_input_items_total{function="count_words"} 5', text)
+
+    def test_instrument_exports(self):
+        """测试批量装饰时跳过类、生成器函数和装饰器"""
+        registry = MetricsRegistry()
+        namespace = {'median': median, 'RunningStats': RunningStats,
+                     'stream_words': stream_words, 'memoize': memoize}
+        instrument_exports(namespace, list(namespace), registry)
+        self.assertIsNot(namespace['median'], median)
+        self.assertIs(namespace['median'].__wrapped__, median)
+        self.assertIs(namespace['RunningStats'], RunningStats)
+        self.assertIs(namespace['stream_words'], stream_words)
+        self.assertIs(namespace['memoize'], memoize)
+
+
+class TestBenchmarkHarness(unittest.TestCase):
+    """测试基准测试套件的结果格式与基线比较"""
+
+    def test_run_suite_small(self):
+        """测试小数据量运行：结果字段完整，NaN 分布下出错的函数被记录而不是中断"""
+        import benchmarks
+        report = benchmarks.run_suite(sizes=[10], functions=['median', 'count_words'],
+                                      repeat=3, memory=True)
+        self.assertIn('python', report['meta'])
+        rows = report['results']
+        self.assertEqual({row['function'] for row in rows}, {'median', 'count_words'})
+        self.assertEqual(len(rows), len(benchmarks.NUMBER_DISTRIBUTIONS) + len(benchmarks.TEXT_DISTRIBUTIONS))
+        for row in rows:
+            self.assertGreater(row['median_ns'], 0)
+            self.assertGreaterEqual(row['iqr_ns'], 0)
+            self.assertIsNotNone(row['peak_bytes'])
+
+        # 遇到 NaN 就抛异常的函数：这一项记下错误，其余分布照常测完
+        def reject_nan(data):
+            if any(map(math.isnan, data)):
+                raise ValueError("NaN")
+            return sum(data)
+
+        strict = benchmarks.BenchmarkCase('reject_nan', reject_nan)
+        with mock.patch.object(benchmarks, '_cases', return_value=[strict]):
+            report = benchmarks.run_suite(sizes=[200], repeat=1, memory=False)
+        errors = {row['distribution']: row['error'] for row in report['results'] if 'error' in row}
+        self.assertEqual(errors, {'nan': 'ValueError: NaN'})
+        self.assertEqual(len(report['results']), len(benchmarks.NUMBER_DISTRIBUTIONS))
+
+    def test_compare_results(self):
+        """测试回退判断同时考虑相对阈值和 IQR 噪声"""
+        import benchmarks
+
+        def report(*rows):
+            return {'results': [dict(zip(('function', 'distribution', 'size', 'median_ns', 'iqr_ns'), r))
+                                for r in rows]}
+
+        baseline = report(('a', 'random', 10, 100.0, 1.0), ('b', 'random', 10, 100.0, 50.0),
+                          ('c', 'random', 10, 100.0, 1.0))
+        current = report(('a', 'random', 10, 150.0, 1.0), ('b', 'random', 10, 150.0, 1.0),
+                         ('c', 'random', 10, 50.0, 1.0), ('d', 'random', 10, 1.0, 0.0))
+        status = {row['function']: row['status'] for row in benchmarks.compare_results(current, baseline)}
+        self.assertEqual(status, {'a': 'regression', 'b': 'ok', 'c': 'improvement'})
+
+    def test_package_import_is_lazy(self):
+        """测试导入包时不导入任何子模块和 NumPy，访问函数时只导入对应的子模块"""
+        package = benchmarks.IMPORT_PACKAGE_NAME
+        result = benchmarks.measure_import_time(benchmarks.IMPORT_SCENARIOS['package'], repeat=1)
+        self.assertIn(package, result['modules'])
+        self.assertEqual(benchmarks.check_lazy_import(result), [])
+
+        result = benchmarks.measure_import_time(benchmarks.IMPORT_SCENARIOS['math'], repeat=1)
+        self.assertIn(f'{package}.math_utils', result['modules'])
+        self.assertNotIn(f'{package}.string_utils', result['modules'])
+        self.assertNotIn('numpy', result['modules'])
+
+        # 访问全部导出的名字也不会导入 NumPy，直到真正处理缓冲区输入
+        result = benchmarks.measure_import_time(
+            f'import {package}; {package}.describe_many; from {package} import *', repeat=1)
+        self.assertIn(f'{package}.parallel', result['modules'])
+        self.assertNotIn('numpy', result['modules'])
+
+
 def run_tests():
     """运行所有测试并打印结果"""
     # 创建测试套件
@@ -115,7 +1958,29 @@ def run_tests():
 
     # 添加所有测试
     suite.addTests(loader.loadTestsFromTestCase(TestMathUtils))
+    suite.addTests(loader.loadTestsFromTestCase(TestSummationModes))
+    suite.addTests(loader.loadTestsFromTestCase(TestNanPolicy))
+    suite.addTests(loader.loadTestsFromTestCase(TestKLLSketch))
+    suite.addTests(loader.loadTestsFromTestCase(TestHistogram))
+    suite.addTests(loader.loadTestsFromTestCase(TestRunningAccumulators))
+    suite.addTests(loader.loadTestsFromTestCase(TestSortedSeries))
+    suite.addTests(loader.loadTestsFromTestCase(TestRollingStatistics))
+    suite.addTests(loader.loadTestsFromTestCase(TestBatchStatistics))
+    suite.addTests(loader.loadTestsFromTestCase(TestGroupStats))
+    suite.addTests(loader.loadTestsFromTestCase(TestStateCodec))
+    suite.addTests(loader.loadTestsFromTestCase(TestParallelReduction))
+    suite.addTests(loader.loadTestsFromTestCase(TestAsyncStats))
+    suite.addTests(loader.loadTestsFromTestCase(TestMmapIO))
+    suite.addTests(loader.loadTestsFromTestCase(TestBufferInputs))
     suite.addTests(loader.loadTestsFromTestCase(TestStringUtils))
+    suite.addTests(loader.loadTestsFromTestCase(TestStringStreaming))
+    suite.addTests(loader.loadTestsFromTestCase(TestBatchStrings))
+    suite.addTests(loader.loadTestsFromTestCase(TestBytesStringUtils))
+    suite.addTests(loader.loadTestsFromTestCase(TestWordIndex))
+    suite.addTests(loader.loadTestsFromTestCase(TestDecorators))
+    suite.addTests(loader.loadTestsFromTestCase(TestMemoize))
+    suite.addTests(loader.loadTestsFromTestCase(TestInstrumentation))
+    suite.addTests(loader.loadTestsFromTestCase(TestBenchmarkHarness))
 
     # 运行测试
     runner = unittest.TextTestRunner(verbosity=2)